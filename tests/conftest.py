@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# 各模块位于仓库根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    """界面测试用的QApplication（无显示环境时使用offscreen平台），未安装PyQt5时跳过"""
+    pytest.importorskip('PyQt5')
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
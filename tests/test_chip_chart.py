@@ -0,0 +1,122 @@
+"""筹码分布图：多分辨率直方图的分桶、悬停命中，与逐点计算的参考实现对比"""
+import numpy as np
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('matplotlib')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import 筹码图表
+import 筹码引擎
+
+
+@pytest.fixture
+def chart():
+    figure = Figure(figsize=(8, 5), dpi=100)
+    FigureCanvasAgg(figure)
+    chart = 筹码图表.ChipChart(figure)
+    prices, counts = 筹码引擎.generate_runs(100, 10, 1, 3000).histogram()
+    chart.update(prices, counts)
+    return chart
+
+
+def nearest(chart, x, y, radius):
+    """对所有显示的点计算像素距离的参考实现"""
+    xs, ys = chart.points
+    pixels = chart.ax.transData.transform(np.column_stack((xs, ys)))
+    distances = (pixels[:, 0] - x) ** 2 + (pixels[:, 1] - y) ** 2
+    closest = int(np.argmin(distances))
+    if distances[closest] < radius ** 2:
+        return (xs[closest], ys[closest])
+    return None
+
+
+@pytest.mark.parametrize('zoom', [None, (60, 70), (80, 81)])
+def test_point_near_matches_brute_force(chart, zoom):
+    if zoom is not None:
+        chart.ax.set_xlim(*zoom)
+    xs, ys = chart.points
+    pixels = chart.ax.transData.transform(np.column_stack((xs, ys)))
+    rng = np.random.default_rng(0)
+    # 数据点附近和随机位置各取一部分
+    queries = np.concatenate([pixels[rng.integers(0, len(pixels), 50)] +
+                              rng.normal(0, 4, (50, 2)),
+                              rng.uniform(0, 800, (50, 2))])
+    for x, y in queries:
+        for radius in (3, 5, 20):
+            assert chart.point_near(x, y, radius) == nearest(chart, x, y, radius)
+
+
+def test_point_near_without_data():
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    assert 筹码图表.ChipChart(figure).point_near(10, 10, 5) is None
+
+
+def test_set_hover_reports_changes(chart):
+    point = (chart.points[0][0], chart.points[1][0])
+    assert chart.set_hover(point)
+    assert chart.annotation.get_visible()
+    assert not chart.set_hover(point)
+    assert chart.set_hover(None)
+    assert not chart.annotation.get_visible()
+
+
+def bucket_reference(prices, counts, level):
+    """第level层的参考实现：按(向下取整的价位-最低价位)整除2**level逐个累加"""
+    keys = np.floor(prices).astype(np.int64)
+    buckets = {}
+    for key, count in zip((keys - keys[0]) // 2 ** level, counts):
+        buckets[int(key)] = buckets.get(int(key), 0) + int(count)
+    return np.array(sorted(buckets)), np.array([buckets[key] for key in sorted(buckets)])
+
+
+@pytest.mark.parametrize('B2, H2, I2, J2', [(100, 10, 1, 3000), (1000, 50, 0.3, 10 ** 6),
+                                            (10 ** 6, 10, 1, 10 ** 5), (100, 10, 1, 1)])
+def test_pyramid_levels_match_reference(B2, H2, I2, J2):
+    prices, counts = 筹码引擎.generate_runs(B2, H2, I2, J2).histogram()
+    pyramid = 筹码图表.HistogramPyramid(prices, counts)
+    assert len(pyramid.levels[-1][0]) == 1
+    for level in range(1, len(pyramid.levels)):
+        keys, values = pyramid.levels[level]
+        expected_keys, expected_values = bucket_reference(prices, counts, level)
+        np.testing.assert_array_equal(keys, expected_keys)
+        np.testing.assert_array_equal(values, expected_values)
+        assert values.sum() == counts.sum()
+
+
+def test_pyramid_view_covers_visible_range():
+    prices, counts = 筹码引擎.generate_runs(10 ** 6, 10, 1, 10 ** 5).histogram()
+    pyramid = 筹码图表.HistogramPyramid(prices, counts)
+    xmin, xmax = prices[len(prices) // 3], prices[len(prices) // 2]
+    for level in range(len(pyramid.levels)):
+        centers, values, width, _ = pyramid.view(level, xmin, xmax)
+        # 桶[中心-(宽-1)/2, 中心+(宽-1)/2]覆盖的整数价位与可见范围相交，且包含范围内的全部筹码
+        assert (centers + width / 2 >= xmin - 1).all() and (centers - width / 2 <= xmax).all()
+        inside = counts[(prices >= np.ceil(xmin) if level else prices >= xmin) & (prices <= xmax)]
+        assert values.sum() >= inside.sum()
+
+
+@pytest.mark.parametrize('pixels', [100, 600, 4000])
+def test_level_for_limits_bars_and_bucket_width(pixels):
+    prices, counts = 筹码引擎.generate_runs(10 ** 6, 10, 1, 10 ** 5).histogram()
+    pyramid = 筹码图表.HistogramPyramid(prices, counts)
+    for xmin, xmax in [(prices[0], prices[-1]), (prices[100], prices[300]),
+                       (prices[100], prices[101])]:
+        level = pyramid.level_for(xmin, xmax, pixels)
+        lo, hi = pyramid._bounds(level, xmin, xmax)
+        assert hi - lo <= 筹码图表.MAX_BARS
+        # 更细的一层要么桶太窄，要么柱数超过上限
+        if level > 0:
+            finer_lo, finer_hi = pyramid._bounds(level - 1, xmin, xmax)
+            too_narrow = 2 ** (level - 1) * pixels < 筹码图表.MIN_BUCKET_PIXELS * (xmax - xmin)
+            assert too_narrow or finer_hi - finer_lo > 筹码图表.MAX_BARS
+
+
+def test_zoom_rebins_chart(chart):
+    whole = chart.level
+    xs = chart.points[0]
+    chart.ax.set_xlim(xs[len(xs) // 2], xs[len(xs) // 2] + 5)
+    assert chart.level <= whole
+    assert chart.level == chart.pyramid.level_for(*chart.ax.get_xlim(), chart.ax.bbox.width)
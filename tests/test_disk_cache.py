@@ -0,0 +1,109 @@
+"""DiskLadderCache：保存与内存映射读取、版本失效、损坏条目和目录清理"""
+import json
+import os
+
+import numpy as np
+
+import 磁盘缓存
+import 筹码引擎
+
+
+def expanded(B2, H2, I2, J2):
+    return 筹码引擎.generate_runs(B2, H2, I2, J2).expand()
+
+
+def assert_same(result, expected):
+    for column, reference in zip(result.columns, expected.columns):
+        np.testing.assert_array_equal(column, reference)
+
+
+def read_index(directory):
+    with open(os.path.join(directory, 磁盘缓存.INDEX_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_data_stores_runs_expansion_and_loads_memory_mapped(tmp_path):
+    cache = 磁盘缓存.DiskLadderCache(str(tmp_path))
+    assert cache.load(100, 3, 2, 1000) is None
+    stored = cache.data(100, 3, 2, 1000)
+    assert_same(stored, expanded(100, 3, 2, 1000))
+
+    # 重新打开后命中，前J2行与结果列表按需展开的数值相同
+    cache = 磁盘缓存.DiskLadderCache(str(tmp_path))
+    loaded = cache.load(100, 3, 2, 400)
+    assert isinstance(loaded.prices, np.memmap)
+    assert_same(loaded, expanded(100, 3, 2, 400))
+    assert cache.load(100, 3, 2, 1001) is None
+
+
+def test_shorter_result_does_not_replace_longer(tmp_path):
+    cache = 磁盘缓存.DiskLadderCache(str(tmp_path))
+    cache.store(100, 10, 1, expanded(100, 10, 1, 500))
+    cache.store(100, 10, 1, expanded(100, 10, 1, 100))
+    assert cache.load(100, 10, 1, 500) is not None
+
+
+def test_replacing_entry_writes_new_folder_and_removes_old(tmp_path):
+    cache = 磁盘缓存.DiskLadderCache(str(tmp_path))
+    cache.store(100, 10, 1, expanded(100, 10, 1, 100))
+    old = read_index(str(tmp_path))['entries'].popitem()[1]['folder']
+    cache.store(100, 10, 1, expanded(100, 10, 1, 200))
+    entry = next(iter(read_index(str(tmp_path))['entries'].values()))
+    assert entry['folder'] != old and entry['n'] == 200
+    assert not os.path.exists(tmp_path / old)
+    assert os.path.isdir(tmp_path / entry['folder'])
+
+
+def test_engine_version_change_invalidates_entries(tmp_path, monkeypatch):
+    磁盘缓存.DiskLadderCache(str(tmp_path)).data(100, 10, 1, 100)
+    monkeypatch.setattr(筹码引擎, 'ENGINE_VERSION', 筹码引擎.ENGINE_VERSION + 1)
+    cache = 磁盘缓存.DiskLadderCache(str(tmp_path))
+    assert cache.load(100, 10, 1, 100) is None
+    # 旧条目的目录在打开缓存时清理
+    assert [name for name in os.listdir(tmp_path) if name != 磁盘缓存.INDEX_FILE] == []
+
+
+def test_old_format_invalidates_entries(tmp_path):
+    磁盘缓存.DiskLadderCache(str(tmp_path)).data(100, 10, 1, 100)
+    index = read_index(str(tmp_path))
+    del index['format']
+    with open(os.path.join(str(tmp_path), 磁盘缓存.INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    assert 磁盘缓存.DiskLadderCache(str(tmp_path)).load(100, 10, 1, 100) is None
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = 磁盘缓存.DiskLadderCache(str(tmp_path))
+    cache.data(100, 10, 1, 100)
+    folder = next(iter(read_index(str(tmp_path))['entries'].values()))['folder']
+    os.remove(tmp_path / folder / 'prices.npy')
+    assert cache.load(100, 10, 1, 100) is None
+    assert read_index(str(tmp_path))['entries'] == {}
+
+
+def test_load_updates_index_only_on_flush(tmp_path):
+    cache = 磁盘缓存.DiskLadderCache(str(tmp_path))
+    cache.data(100, 10, 1, 100)
+    before = read_index(str(tmp_path))
+    cache.load(100, 10, 1, 100)
+    assert read_index(str(tmp_path)) == before
+    cache.flush()
+    after = next(iter(read_index(str(tmp_path))['entries'].values()))
+    assert after['atime'] >= next(iter(before['entries'].values()))['atime']
+
+
+def test_evicts_least_recently_used_by_size(tmp_path):
+    size = sum(column.nbytes for column in expanded(100, 10, 1, 1000).columns)
+    cache = 磁盘缓存.DiskLadderCache(str(tmp_path), max_bytes=size * 2)
+    for B2 in (100, 200, 300):
+        cache.data(B2, 10, 1, 1000)
+    assert cache.load(100, 10, 1, 1000) is None
+    assert cache.load(300, 10, 1, 1000) is not None
+    assert cache.nbytes <= size * 2
+
+
+def test_sweep_keeps_unrelated_folders(tmp_path):
+    os.makedirs(tmp_path / 'keepme')
+    os.makedirs(tmp_path / ('0' * 16 + '-1.tmp'))    # 未完成的临时目录
+    磁盘缓存.DiskLadderCache(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ['keepme']
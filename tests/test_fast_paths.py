@@ -0,0 +1,211 @@
+"""各快速路径与逐步计算的参考实现对比
+
+随机参数（固定种子）中包含整数网格（强平线常常恰好为整数，取整最容易出错）
+和杠杆倍数不大于1（强平线为0）的情况。
+"""
+import math
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+import 参数扫描
+import 回测
+import 筹码引擎
+
+# 游程结果的累计和按"游程开始前的累计和 + 步数×价位"计算，与逐步累加只差舍入误差
+RTOL = 1e-12
+
+
+def random_params(seed, count, max_j2):
+    """生成(B2, H2, I2, J2)：三分之一为整数参数，另有一部分杠杆倍数不大于1"""
+    rng = np.random.default_rng(seed)
+    params = []
+    for k in range(count):
+        B2 = float(rng.uniform(1, 1000))
+        H2 = float(rng.uniform(1, 60))
+        I2 = float(rng.uniform(0.01, 30))
+        if k % 3 == 0:
+            B2, H2, I2 = float(round(B2)), float(round(H2)), float(round(I2))
+        if k % 7 == 0:
+            H2 = float(rng.choice([0.5, 1.0]))
+        params.append((B2, H2, I2, int(rng.integers(1, max_j2))))
+    return params
+
+
+def step_loop(B2, H2, I2, J2):
+    """逐步递推的参考实现，返回(价位, 均价, 强平线)"""
+    factor = 1 - 1 / max(1, H2)
+    cumulative_sum = 0
+    strong = 0
+    prices, averages, strongs = [], [], []
+    for i in range(1, J2 + 1):
+        price = B2 if i == 1 else math.ceil(strong) + I2
+        cumulative_sum += price
+        average = cumulative_sum / i
+        strong = average * factor
+        prices.append(price)
+        averages.append(average)
+        strongs.append(strong)
+    return np.array(prices, dtype=np.float64), np.array(averages), np.array(strongs)
+
+
+@pytest.mark.parametrize('B2, H2, I2, J2', random_params(1, 60, 3000))
+def test_generate_data_matches_step_loop(B2, H2, I2, J2):
+    prices, averages, strongs = step_loop(B2, H2, I2, J2)
+    result = 筹码引擎.generate_data(B2, H2, I2, J2)
+    np.testing.assert_array_equal(result.prices, prices)
+    np.testing.assert_array_equal(result.averages, averages)
+    np.testing.assert_array_equal(result.strongs, strongs)
+
+
+@pytest.mark.parametrize('B2, H2, I2, J2', random_params(2, 60, 3000))
+def test_generate_runs_matches_step_loop(B2, H2, I2, J2):
+    prices, averages, strongs = step_loop(B2, H2, I2, J2)
+    rows = 筹码引擎.generate_runs(B2, H2, I2, J2).expand()
+    np.testing.assert_array_equal(rows.steps, np.arange(1, J2 + 1))
+    np.testing.assert_array_equal(rows.prices, prices)
+    np.testing.assert_allclose(rows.averages, averages, rtol=RTOL)
+    np.testing.assert_allclose(rows.strongs, strongs, rtol=RTOL)
+
+
+@pytest.mark.parametrize('B2, H2, I2, J2', random_params(3, 12, 300000))
+def test_generate_runs_fast_forward(B2, H2, I2, J2):
+    # 迭代次数较大时游程跳过的区间最长，与逐行结果逐步对比；
+    # 逐步累加的舍入误差随步数增长（约J2倍机器精度），均价的容差按步数放宽
+    rows = 筹码引擎.generate_runs(B2, H2, I2, J2).expand()
+    data = 筹码引擎.generate_data(B2, H2, I2, J2)
+    np.testing.assert_array_equal(rows.prices, data.prices)
+    np.testing.assert_allclose(rows.averages, data.averages,
+                               rtol=max(RTOL, J2 * np.finfo(float).eps))
+
+
+def test_generate_runs_extend_matches_single_pass():
+    # 缓存中分多次扩展与一次算完的结果相同
+    cache = 筹码引擎.LadderCache()
+    for J2 in (10, 1000, 50, 100000):
+        runs = cache.runs(100, 3, 2, J2)
+        once = 筹码引擎.generate_runs(100, 3, 2, J2)
+        np.testing.assert_array_equal(runs.prices, once.prices)
+        np.testing.assert_array_equal(runs.last_steps, once.last_steps)
+        assert runs.total_sum == once.total_sum
+
+
+@pytest.fixture(params=['kernel', 'numpy'])
+def sweep_path(request, monkeypatch):
+    """分别测试编译版本（安装了numba时）和数组版本"""
+    if request.param == 'numpy':
+        monkeypatch.setattr(参数扫描, '_cells_kernel', False)
+    elif not 参数扫描._get_cells_kernel():
+        pytest.skip("未安装numba")
+    return request.param
+
+
+@pytest.mark.parametrize('J2', [1, 2, 50, 5000, 10 ** 6, 10 ** 9])
+def test_sweep_matches_generate_runs(sweep_path, J2):
+    params = random_params(4, 400, 2)
+    B2, H2, I2 = (np.array(column) for column in list(zip(*params))[:3])
+    result = 参数扫描.sweep(B2, H2, I2, J2)
+    for i in range(len(B2)):
+        runs = 筹码引擎.generate_runs(B2[i], H2[i], I2[i], J2)
+        assert result.final_averages[i] == runs.final_average
+        assert result.final_strongs[i] == runs.final_strong
+        assert result.levels[i] == len(runs)
+        assert result.saturation_steps[i] == runs.first_steps[-1]
+        assert result.saturated[i] == runs.saturated
+
+
+def test_sweep_grid_shape(sweep_path):
+    result = 参数扫描.sweep_grid([100, 200], [2, 10, 50], [1, 5, 10, 20], 1000)
+    assert result.shape == (2, 3, 4)
+    runs = 筹码引擎.generate_runs(200, 10, 5, 1000)
+    assert result.levels[1, 1, 1] == len(runs)
+
+
+def tick_reference(B2, H2, I2, J2, tick):
+    """tick模式的分数参考实现，返回各步价位（分数）"""
+    tick = Fraction(str(tick))
+    b_ticks = round(Fraction(str(B2)) / tick)
+    i_ticks = round(Fraction(str(I2)) / tick)
+    factor = 1 - 1 / max(Fraction(1), Fraction(str(H2)))
+    cumulative_sum = Fraction(0)
+    strong = Fraction(0)
+    prices = []
+    for i in range(1, J2 + 1):
+        price = b_ticks if i == 1 else math.ceil(strong) + i_ticks
+        cumulative_sum += price
+        strong = cumulative_sum / i * factor
+        prices.append(price * tick)
+    return prices
+
+
+@pytest.mark.parametrize('tick', ['0.01', '0.5', '1', '0.25'])
+@pytest.mark.parametrize('B2, H2, I2, J2', random_params(5, 10, 2000))
+def test_tick_mode_matches_fractions(B2, H2, I2, J2, tick):
+    B2, H2, I2 = round(B2, 2), round(H2, 2), round(I2, 2)
+    prices = tick_reference(B2, H2, I2, J2, tick)
+    result = 筹码引擎.generate_data(B2, H2, I2, J2, tick=float(tick))
+    np.testing.assert_array_equal(result.prices, [float(price) for price in prices])
+    sums = np.cumsum([float(price) for price in prices])
+    np.testing.assert_allclose(result.averages, sums / np.arange(1, J2 + 1), rtol=RTOL)
+
+
+def bar_loop(runs, high, low, close):
+    """逐根K线回放的参考实现，返回(盈亏, [(K线, 事件, 累计步数)], 是否强平, 成交档数)"""
+    prices, steps, averages, strongs = runs.levels()
+    descending = not (len(prices) > 1 and prices[-1] > prices[0])
+    level = 0
+    equity = np.empty(len(close))
+    events = []
+    for bar in range(len(close)):
+        if descending:
+            while level < len(prices) and low[bar] <= prices[level]:
+                level += 1
+                events.append((bar, '加仓', int(steps[level - 1])))
+        else:
+            while level < len(prices) and high[bar] >= prices[level]:
+                level += 1
+                events.append((bar, '加仓', int(steps[level - 1])))
+        held = int(steps[level - 1]) if level else 0
+        cost = held * averages[level - 1] if level else 0.0
+        if level and low[bar] <= strongs[level - 1]:
+            events.append((bar, '强平', held))
+            equity[bar:] = held * strongs[level - 1] - cost
+            return equity, events, True, level
+        equity[bar] = held * close[bar] - cost
+    return equity, events, False, level
+
+
+def random_bars(seed):
+    """生成一条阶梯和一段K线：价格从初始价位附近带漂移游走，穿过多个价位，部分会强平"""
+    rng = np.random.default_rng(seed)
+    B2 = float(rng.uniform(50, 500))
+    H2 = float(rng.uniform(2, 20))
+    I2 = float(rng.uniform(0.5, 3))
+    if seed % 5 == 0:
+        B2, H2, I2 = float(round(B2)), float(round(H2)), float(round(I2))
+    drift = -1
+    if seed % 4 == 3:
+        I2 += B2 / H2 + 1  # 第二个价位高于初始价位，阶梯向上
+        drift = 1
+    runs = 筹码引擎.generate_runs(B2, H2, I2, int(rng.integers(1, 500)))
+    n = int(rng.integers(1, 5000))
+    volatility = float(rng.choice([0.001, 0.005, 0.02]))
+    close = B2 * np.exp(np.cumsum(rng.normal(drift * volatility / 8, volatility, n)))
+    high = close * (1 + rng.uniform(0, volatility, n))
+    low = close * (1 - rng.uniform(0, volatility, n))
+    return runs, high, low, close
+
+
+@pytest.mark.parametrize('chunk_rows', [7, 1000, 回测.CHUNK_ROWS])
+@pytest.mark.parametrize('seed', range(12))
+def test_backtest_matches_bar_loop(tmp_path, seed, chunk_rows):
+    runs, high, low, close = random_bars(seed)
+    bars = 回测.write_bars(str(tmp_path / 'bars'), high, low, close)
+
+    result = 回测.backtest(runs, bars, chunk_rows=chunk_rows)
+    equity, events, liquidated, level = bar_loop(runs, high, low, close)
+    np.testing.assert_allclose(result.equity, equity, rtol=RTOL, atol=1e-9)
+    assert [(event['bar'], event['event'], event['steps']) for event in result.events] == events
+    assert result.liquidated == liquidated
+    assert result.levels_hit == level
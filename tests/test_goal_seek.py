@@ -0,0 +1,134 @@
+"""反求参数：收敛到满足目标的一侧、无解和端点的情况、参数检查，以及界面按输入精度取整"""
+import numpy as np
+import pytest
+
+import 求解器
+
+# (函数, 参数, 是否取最大值)，结果在区间内部
+INTERIOR = [
+    (求解器.solve_leverage, (100, 1, 30, 求解器.GOAL_DRAWDOWN, 0.4), True),
+    (求解器.solve_leverage, (100, 1, 30, 求解器.GOAL_DEPTH, 10), True),
+    (求解器.solve_offset, (100, 10, 30, 求解器.GOAL_MARGIN, 250), True),
+    (求解器.solve_offset, (100, 10, 30, 求解器.GOAL_DEPTH, 30), False),
+]
+
+
+def metric(solve, params, value):
+    B2, fixed, J2, goal, _ = params
+    if solve is 求解器.solve_leverage:
+        return 求解器.evaluate_goal(goal, B2, value, fixed, J2).item()
+    return 求解器.evaluate_goal(goal, B2, fixed, value, J2).item()
+
+
+@pytest.mark.parametrize('solve, params, maximize', INTERIOR)
+def test_converges_to_satisfied_side(solve, params, maximize):
+    goal, target = params[3:]
+    result = solve(*params, maximize=maximize)
+    assert result.satisfied
+    good, bad = result.bracket
+    assert good == result.value and bad != good
+    # 返回的点满足目标，相邻的不满足点在搜索方向一侧，两点之差不超过容差
+    assert 求解器.goal_met(goal, metric(solve, params, good), target)
+    assert not 求解器.goal_met(goal, metric(solve, params, bad), target)
+    assert (bad > good) == maximize
+    lo, hi = 求解器.LEVERAGE_BOUNDS if solve is 求解器.solve_leverage else (0, params[0])
+    assert abs(bad - good) <= (hi - lo) * 求解器.SEEK_TOLERANCE
+    assert result.metric == metric(solve, params, good)
+    assert result.evaluations == 求解器.SEEK_POINTS * result.rounds
+
+
+@pytest.mark.parametrize('solve, params, maximize', INTERIOR)
+def test_tolerance_and_points(solve, params, maximize):
+    result = solve(*params, maximize=maximize, tolerance=1e-2, points=6)
+    good, bad = result.bracket
+    assert abs(bad - good) <= 1e-2
+    assert 求解器.goal_met(params[3], metric(solve, params, good), params[4])
+
+
+def test_endpoint_satisfied():
+    result = 求解器.solve_leverage(100, 1, 30, 求解器.GOAL_MARGIN, 300)
+    assert result.satisfied and result.value == 100 and result.bracket == (100, 100)
+    assert result.rounds == 1
+    result = 求解器.solve_leverage(100, 1, 30, 求解器.GOAL_MARGIN, 300, maximize=False)
+    assert result.value == 1 and result.bracket == (1, 1)
+
+
+def test_unsatisfied_returns_closest_point():
+    result = 求解器.solve_leverage(100, 1, 30, 求解器.GOAL_DEPTH, 10 ** 6)
+    assert not result.satisfied and result.bracket is None
+    grid = np.linspace(*求解器.LEVERAGE_BOUNDS, 求解器.SEEK_POINTS)
+    metrics = 求解器.evaluate_goal(求解器.GOAL_DEPTH, 100, grid, 1, 30)
+    assert result.metric == metrics.max()
+    assert result.value == grid[np.argmax(metrics)]
+
+
+def test_evaluate_goal_broadcasts():
+    H2 = np.array([[2.0], [5.0], [10.0]])
+    I2 = np.array([0.5, 1, 2, 4])
+    for goal in 求解器.GOALS:
+        metrics = 求解器.evaluate_goal(goal, 100, H2, I2, 30)
+        assert metrics.shape == (3, 4)
+        for i in range(3):
+            for j in range(4):
+                assert metrics[i, j] == 求解器.evaluate_goal(goal, 100, H2[i, 0], I2[j], 30)
+
+
+def test_goal_met_directions():
+    metrics = np.array([1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(求解器.goal_met(求解器.GOAL_DEPTH, metrics, 2),
+                                  [False, True, True])
+    np.testing.assert_array_equal(求解器.goal_met(求解器.GOAL_MARGIN, metrics, 2),
+                                  [True, True, False])
+
+
+@pytest.mark.parametrize('call', [
+    lambda: 求解器.solve_leverage(100, 1, 30, 'unknown', 1),
+    lambda: 求解器.evaluate_goal('unknown', 100, 10, 1, 30),
+    lambda: 求解器.solve_leverage(100, 1, 30, 求解器.GOAL_DEPTH, 10, bounds=(0.5, 10)),
+    lambda: 求解器.solve_leverage(100, 1, 30, 求解器.GOAL_DEPTH, 10, bounds=(10, 10)),
+    lambda: 求解器.solve_offset(100, 10, 30, 求解器.GOAL_DEPTH, 10, bounds=(5, 1)),
+    lambda: 求解器.solve_offset(100, 10, 30, 求解器.GOAL_DEPTH, 10, points=1),
+])
+def test_invalid_arguments(call):
+    with pytest.raises(ValueError):
+        call()
+
+
+class Value:
+    def __init__(self, value):
+        self.value = value
+
+
+@pytest.mark.parametrize('solve_for, params, goal, target, maximize', [
+    (0, (100, 10, 1, 30), 求解器.GOAL_DRAWDOWN, 0.4, True),
+    (0, (100, 10, 1, 30), 求解器.GOAL_DEPTH, 10, True),
+    (1, (100, 10, 1, 30), 求解器.GOAL_MARGIN, 250, True),
+    (1, (100, 10, 1, 30), 求解器.GOAL_DEPTH, 30, False),
+])
+def test_round_to_input_precision(qapp, solve_for, params, goal, target, maximize):
+    import 汇总窗口v6
+
+    worker = 汇总窗口v6.SolveWorker(solve_for, params, goal, target, None, maximize, 2)
+    solve = 求解器.solve_leverage if solve_for == 0 else 求解器.solve_offset
+    args = [params[0], params[2 - solve_for], params[3], goal, target]
+    result = solve(*args, maximize=maximize)
+    value, rounded_metric = worker._round(result)
+    # 两位小数，向满足目标的一侧取整，最多多移动一个单位
+    assert round(value * 100) == pytest.approx(value * 100)
+    assert 求解器.goal_met(goal, rounded_metric, target)
+    assert rounded_metric == metric(solve, args, value)
+    if maximize:
+        assert result.value - 0.02 - 1e-9 <= value <= result.value
+    else:
+        assert result.value <= value <= result.value + 0.02 + 1e-9
+
+
+def test_round_steps_one_unit_toward_satisfied_side(qapp):
+    import 汇总窗口v6
+
+    worker = 汇总窗口v6.SolveWorker(0, (100, 10, 1, 30), 求解器.GOAL_DRAWDOWN, 0.4, None, True, 2)
+    # 最大杠杆约7.2441：7.25不满足，退一个单位到7.24
+    assert worker._round(Value(7.251))[0] == 7.24
+    assert worker._round(Value(7.2499999))[0] == 7.24
+    # 7.26和退一个单位的7.25都不满足
+    assert worker._round(Value(7.26)) is None
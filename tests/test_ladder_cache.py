@@ -0,0 +1,78 @@
+"""LadderCache：扩展、截取与一次算完的结果相同，按条目数和内存淘汰最久未使用的条目"""
+import numpy as np
+import pytest
+
+import 筹码引擎
+
+
+def assert_same_data(result, expected):
+    for column, reference in zip(result.columns, expected.columns):
+        np.testing.assert_array_equal(column, reference)
+
+
+def assert_same_runs(runs, expected):
+    for field in ('prices', 'counts', 'first_steps', 'last_steps', 'sums_before'):
+        np.testing.assert_array_equal(getattr(runs, field), getattr(expected, field))
+    assert runs.total_sum == expected.total_sum
+    assert runs.saturated == expected.saturated
+
+
+@pytest.mark.parametrize('B2, H2, I2', [(100, 10, 1), (100, 3, 2), (37.5, 0.5, 0.25)])
+def test_data_extend_and_slice(B2, H2, I2):
+    cache = 筹码引擎.LadderCache()
+    # 增大（扩容）、减小（截取）、再增大
+    for J2 in (10, 1000, 50, 1, 5000, 0):
+        assert_same_data(cache.data(B2, H2, I2, J2), 筹码引擎.generate_data(B2, H2, I2, J2))
+    assert len(cache) == 1
+
+
+def test_data_columns_are_read_only():
+    result = 筹码引擎.LadderCache().data(100, 10, 1, 100)
+    with pytest.raises(ValueError):
+        result.prices[0] = 0
+
+
+@pytest.mark.parametrize('B2, H2, I2', [(100, 10, 1), (100, 3, 2), (250, 50, 0.5)])
+def test_runs_extend_and_slice(B2, H2, I2):
+    cache = 筹码引擎.LadderCache()
+    for J2 in (10, 10 ** 6, 50, 1, 10 ** 9, 3):
+        assert_same_runs(cache.runs(B2, H2, I2, J2), 筹码引擎.generate_runs(B2, H2, I2, J2))
+
+
+def test_data_and_runs_are_separate_entries():
+    cache = 筹码引擎.LadderCache()
+    cache.data(100, 10, 1, 10)
+    cache.runs(100, 10, 1, 10)
+    assert len(cache) == 2
+
+
+def test_evicts_least_recently_used_entry():
+    cache = 筹码引擎.LadderCache(max_entries=2)
+    cache.data(100, 10, 1, 10)
+    cache.data(200, 10, 1, 10)
+    cache.data(100, 10, 1, 5)     # 使用后变为最近使用
+    cache.data(300, 10, 1, 10)
+    assert [key[1] for key in cache._entries] == [100, 300]
+
+
+def test_evicts_by_bytes_but_keeps_latest_entry():
+    probe = 筹码引擎.LadderCache()
+    probe.data(100, 10, 1, 1000)
+    cache = 筹码引擎.LadderCache(max_bytes=probe.nbytes * 2)
+    for B2 in (100, 200):
+        cache.data(B2, 10, 1, 1000)
+    assert len(cache) == 2
+    cache.data(300, 10, 1, 1000)
+    assert [key[1] for key in cache._entries] == [200, 300]
+    assert cache.nbytes <= cache.max_bytes
+    # 单个条目超过上限时仍保留，结果不受影响
+    result = cache.data(400, 10, 1, 100000)
+    assert [key[1] for key in cache._entries] == [400]
+    assert_same_data(result, 筹码引擎.generate_data(400, 10, 1, 100000))
+
+
+def test_clear():
+    cache = 筹码引擎.LadderCache()
+    cache.runs(100, 10, 1, 10)
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
@@ -0,0 +1,141 @@
+"""实时行情：报价解析、持仓状态与逐个报价重新计算的参考实现对比、文件回放和TCP读取"""
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+import 实时行情
+import 筹码引擎
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('100.5\n', (None, 100.5)),
+    ('  99 \r\n', (None, 99.0)),
+    ('1700000000,98.25\n', (1700000000.0, 98.25)),
+    ('1700000000123,98,extra\n', (1700000000123.0, 98.0)),
+    ('\n', None),
+    ('time,price\n', None),
+    ('price\n', None),
+    ('1700000000,\n', None),
+])
+def test_parse_tick(line, expected):
+    assert 实时行情.parse_tick(line) == expected
+
+
+@pytest.mark.parametrize('value, scale', [(1.7e9, 1.0), (1.7e12, 1e3), (1.7e15, 1e6),
+                                          (1.7e18, 1e9), (0.0, 1.0)])
+def test_time_scale(value, scale):
+    assert 实时行情._time_scale(value) == scale
+
+
+def reference(runs, ticks):
+    """逐个报价重新计算：成交档数为报价累计极值已触及的价位数，每次成交后检查强平"""
+    prices, _, _, strongs = runs.levels()
+    descending = not (len(prices) > 1 and prices[-1] > prices[0])
+    states = []
+    level, liquidated = 0, False
+    for i, price in enumerate(ticks):
+        if not liquidated:
+            seen = ticks[:i + 1]
+            if descending:
+                level = int((prices >= min(seen)).sum())
+            else:
+                level = int((prices <= max(seen)).sum())
+            liquidated = level > 0 and price <= strongs[level - 1]
+        states.append((price, level, liquidated))
+    return states
+
+
+@pytest.mark.parametrize('params', [(100, 10, 1, 300), (100, 10, -1, 50), (100, 10, 10, 50),
+                                    (100, 0.5, 1, 50)])
+def test_monitor_matches_reference(params):
+    runs = 筹码引擎.generate_runs(*params)
+    prices = runs.levels()[0]
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        # 从初始价位上方出发的随机游走，包含跳空越过几个价位的大幅变动
+        ticks = (prices[0] + 2 + np.cumsum(rng.normal(-0.3, 3, 200))).tolist()
+        monitor = 实时行情.PositionMonitor(runs)
+        states = []
+        for price in ticks:
+            filled = monitor.update(price)
+            assert filled == monitor.state[1] - (states[-1][1] if states else 0)
+            states.append(monitor.state)
+        assert states == reference(runs, ticks)
+
+
+def test_details():
+    runs = 筹码引擎.generate_runs(100, 10, 1, 300)
+    prices, steps, averages, strongs = runs.levels()
+    monitor = 实时行情.PositionMonitor(runs)
+    info = monitor.details()
+    assert info['status'] == 实时行情.STATUS_WAITING and info['next_price'] == prices[0]
+
+    monitor.update(prices[1])
+    info = monitor.details()
+    assert info['steps'] == steps[1] and info['next_price'] == prices[2]
+    assert info['distance'] == pytest.approx(prices[1] - strongs[1])
+    assert info['margin_ratio'] == pytest.approx((prices[1] - strongs[1]) / (averages[1] - strongs[1]))
+    assert info['status'] == 实时行情.STATUS_NORMAL
+
+    monitor.update(strongs[1] + 0.01)
+    assert monitor.details()['status'] == 实时行情.STATUS_WARNING
+
+    last = len(prices) - 1
+    monitor.update(prices[last])
+    info = monitor.details()
+    assert info['next_price'] is None and info['steps'] == steps[last]
+
+    monitor.update(strongs[last])
+    assert monitor.details()['status'] == 实时行情.STATUS_LIQUIDATED
+    # 强平后不再成交
+    assert monitor.update(0) == 0 and monitor.state == (0, last + 1, True)
+
+
+def test_monitor_rejects_empty_ladder():
+    with pytest.raises(ValueError):
+        实时行情.PositionMonitor(筹码引擎.generate_runs(100, 10, 1, 0))
+
+
+def test_file_ticks(tmp_path):
+    path = tmp_path / 'ticks.txt'
+    path.write_text('\ufeffprice\n100\n\n99.5\n98\n', encoding='utf-8')
+    assert list(实时行情.file_ticks(str(path))) == [(None, 100.0), (None, 99.5), (None, 98.0)]
+    assert list(实时行情.file_ticks(str(path), rate=1e6)) == [(None, 100.0), (None, 99.5),
+                                                           (None, 98.0)]
+
+
+def test_file_ticks_stops_while_waiting(tmp_path):
+    path = tmp_path / 'ticks.txt'
+    # 毫秒时间戳，第二个报价在0.5秒后（不超过REPLAY_MAX_GAP）
+    path.write_text('1700000000000,100\n1700000000500,99\n', encoding='utf-8')
+    stop = threading.Event()
+    ticks = 实时行情.file_ticks(str(path), stop_event=stop)
+    assert next(ticks) == (1700000000000.0, 100.0)
+    threading.Timer(0.05, stop.set).start()
+    assert list(ticks) == []
+
+
+def test_socket_ticks():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            conn.sendall(b'price\n100\n1700000000,9')
+            conn.sendall(b'9.5\n98')    # 报价跨两次发送，最后一行没有换行符
+        server.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ticks = list(实时行情.open_source(f'127.0.0.1:{port}'))
+    assert ticks == [(None, 100.0), (1700000000.0, 99.5), (None, 98.0)]
+
+
+def test_socket_ticks_stopped_before_connect():
+    stop = threading.Event()
+    stop.set()
+    assert list(实时行情.socket_ticks('127.0.0.1', 1, stop)) == []
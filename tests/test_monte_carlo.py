@@ -0,0 +1,94 @@
+"""蒙特卡洛模拟：固定种子的可重复性、与进程数无关，以及与逐路径逐步模拟的参考实现对比"""
+import numpy as np
+import pytest
+
+import 筹码引擎
+import 蒙特卡洛
+
+FIELDS = ('levels_hit', 'liquidated', 'liquidation_times')
+
+
+def assert_same(result, expected):
+    for field in FIELDS:
+        np.testing.assert_array_equal(getattr(result, field), getattr(expected, field))
+
+
+def reference(runs, model, n_paths, n_steps, seed):
+    """单块时的参考实现：用同一随机数流逐条路径逐步推进成交档和强平"""
+    prices, _, strongs = 蒙特卡洛.ladder_levels(runs)
+    child = np.random.SeedSequence(seed).spawn(1)[0]
+    paths = np.cumsum(model.log_returns(np.random.default_rng(child), n_paths, n_steps), axis=1)
+    with np.errstate(divide='ignore'):
+        log_prices = np.log(np.where(prices > 0, prices, 0) / prices[0])
+        log_strongs = np.log(np.where(strongs > 0, strongs, 0) / prices[0])
+    results = []
+    for path in paths:
+        level, time = 1, 0
+        for t, price in enumerate(path):
+            while level < len(prices) and price <= log_prices[level]:
+                level += 1
+            if price <= log_strongs[level - 1]:
+                time = t + 1
+                break
+        results.append((level, time > 0, time))
+    return [np.array(column) for column in zip(*results)]
+
+
+@pytest.mark.parametrize('params, model', [
+    ((100, 10, 1, 300), 蒙特卡洛.PathModel(volatility=0.5)),
+    ((100, 10, -1, 50), 蒙特卡洛.PathModel(drift=-0.2, volatility=0.3)),
+    ((100, 10, 1, 300), 蒙特卡洛.PathModel(volatility=0.3, jump_rate=5, jump_mean=-0.1, jump_std=0.05)),
+    ((100, 10, 10, 50), 蒙特卡洛.PathModel()),
+    ((100, 0.5, 1, 50), 蒙特卡洛.PathModel(volatility=2)),
+])
+def test_simulate_matches_reference(params, model):
+    runs = 筹码引擎.generate_runs(*params)
+    result = 蒙特卡洛.simulate(runs, 300, 100, model, seed=7, chunk_size=300)
+    for field, expected in zip(FIELDS, reference(runs, model, 300, 100, 7)):
+        np.testing.assert_array_equal(getattr(result, field), expected)
+
+
+def test_same_seed_gives_same_result():
+    runs = 筹码引擎.generate_runs(100, 10, 1, 300)
+    first = 蒙特卡洛.simulate(runs, 2000, 50, seed=1, chunk_size=300)
+    assert_same(蒙特卡洛.simulate(runs, 2000, 50, seed=1, chunk_size=300), first)
+    assert first.summary() == 蒙特卡洛.simulate(runs, 2000, 50, seed=1, chunk_size=300).summary()
+    other = 蒙特卡洛.simulate(runs, 2000, 50, seed=2, chunk_size=300)
+    assert not np.array_equal(other.levels_hit, first.levels_hit)
+
+
+def test_result_does_not_depend_on_workers():
+    runs = 筹码引擎.generate_runs(100, 10, 1, 300)
+    model = 蒙特卡洛.PathModel(volatility=0.4, jump_rate=2, jump_mean=-0.05, jump_std=0.1)
+    calls = []
+    expected = 蒙特卡洛.simulate(runs, 1000, 50, model, seed=3, chunk_size=128)
+    result = 蒙特卡洛.simulate(runs, 1000, 50, model, seed=3, chunk_size=128, workers=2,
+                            progress=lambda done, total: calls.append((done, total)))
+    assert_same(result, expected)
+    assert [done for done, _ in calls] == sorted(done for done, _ in calls)
+    assert calls[-1] == (1000, 1000)
+
+
+def test_statistics_are_consistent():
+    runs = 筹码引擎.generate_runs(100, 10, 1, 300)
+    result = 蒙特卡洛.simulate(runs, 2000, 100, seed=0)
+    hit_rates = result.level_hit_rates()
+    assert hit_rates[0] == 1 and (np.diff(hit_rates) <= 0).all()
+    assert result.level_liquidation_rates().sum() == pytest.approx(result.liquidation_rate)
+    steps, paths = result.fill_distribution()
+    assert paths.sum() == len(result)
+    assert (steps * paths).sum() / len(result) == pytest.approx(result.summary()['mean_fills'])
+    assert (result.liquidation_times[~result.liquidated] == 0).all()
+    assert (result.liquidation_times[result.liquidated] >= 1).all()
+
+
+def test_invalid_input():
+    runs = 筹码引擎.generate_runs(100, 10, 1, 10)
+    with pytest.raises(ValueError):
+        蒙特卡洛.simulate(筹码引擎.generate_runs(100, 10, 1, 0), 10)
+    with pytest.raises(ValueError):
+        蒙特卡洛.simulate(runs, 10, 0)
+    with pytest.raises(ValueError):
+        蒙特卡洛.PathModel(volatility=-1)
+    with pytest.raises(ValueError):
+        蒙特卡洛.PathModel(dt=0)
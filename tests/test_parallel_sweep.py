@@ -0,0 +1,75 @@
+"""多进程扫描与单进程sweep的结果对比，以及进度和取消"""
+import threading
+
+import numpy as np
+import pytest
+
+import 参数扫描
+
+FIELDS = ('final_averages', 'final_strongs', 'levels', 'saturation_steps', 'saturated')
+
+
+def grid():
+    B, H, I = np.meshgrid(np.linspace(50, 500, 6), np.linspace(0.5, 60, 7),
+                          np.linspace(0.5, 30, 5), indexing='ij')
+    # 一部分取整数，覆盖强平线恰好为整数的情况
+    B[::2] = np.round(B[::2])
+    return B, H, I
+
+
+def assert_same(result, expected):
+    assert result.shape == expected.shape
+    for field in FIELDS:
+        np.testing.assert_array_equal(getattr(result, field), getattr(expected, field))
+
+
+@pytest.mark.parametrize('J2', [1, 500, 10 ** 9])
+def test_parallel_sweep_matches_sweep(J2):
+    B, H, I = grid()
+    expected = 参数扫描.sweep(B, H, I, J2)
+    # 块大小不整除场景数，最后一块较短
+    result = 参数扫描.parallel_sweep(B, H, I, J2, workers=2, chunk_size=37)
+    assert_same(result, expected)
+
+
+def test_parallel_sweep_single_worker():
+    B, H, I = grid()
+    calls = []
+    result = 参数扫描.parallel_sweep(B, H, I, 100, workers=1,
+                                 progress=lambda done, total: calls.append((done, total)))
+    assert_same(result, 参数扫描.sweep(B, H, I, 100))
+    assert calls == [(B.size, B.size)]
+
+
+def test_parallel_sweep_progress():
+    B, H, I = grid()
+    calls = []
+    参数扫描.parallel_sweep(B, H, I, 100, workers=2, chunk_size=50,
+                        progress=lambda done, total: calls.append((done, total)))
+    done = [done for done, _ in calls]
+    assert done == sorted(done)
+    assert calls[-1] == (B.size, B.size)
+
+
+def test_parallel_sweep_cancelled_before_start():
+    B, H, I = grid()
+    cancel = threading.Event()
+    cancel.set()
+    assert 参数扫描.parallel_sweep(B, H, I, 100, workers=2, chunk_size=10,
+                               cancel_event=cancel) is None
+
+
+def test_parallel_sweep_cancelled_while_running():
+    B, H, I = grid()
+    cancel = threading.Event()
+    calls = []
+
+    def progress(done, total):
+        calls.append(done)
+        cancel.set()
+
+    result = 参数扫描.parallel_sweep(B, H, I, 100, workers=2, chunk_size=5,
+                                 progress=progress, cancel_event=cancel)
+    assert result is None
+    # 取消后不再分发新的任务
+    assert calls[-1] < B.size
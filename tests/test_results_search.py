@@ -0,0 +1,85 @@
+"""结果列表的查找、筛选和跳转：游程上的索引查询与逐行展开的结果逐一对比"""
+import numpy as np
+import pytest
+
+import 筹码引擎
+
+LADDERS = [(100, 10, 1, 3000), (100, 3, 2, 500), (250.5, 50, 0.75, 20000), (100, 0.5, 5, 50),
+           (100, 10, 15, 200)]   # 最后一组第二个价位高于初始价位，强平线上升
+
+
+def first_step(mask):
+    hits = np.flatnonzero(mask)
+    return int(hits[0]) + 1 if len(hits) else None
+
+
+@pytest.mark.parametrize('B2, H2, I2, J2', LADDERS)
+def test_steps_at_price(B2, H2, I2, J2):
+    runs = 筹码引擎.generate_runs(B2, H2, I2, J2)
+    rows = runs.expand()
+    for price in np.unique(rows.prices):
+        steps = np.flatnonzero(rows.prices == price) + 1
+        assert runs.steps_at_price(price) == (steps[0], steps[-1])
+        assert runs.steps_at_price(price + 筹码引擎.PRICE_TOLERANCE / 2) == (steps[0], steps[-1])
+    assert runs.steps_at_price(rows.prices.max() + 0.5) is None
+
+
+@pytest.mark.parametrize('B2, H2, I2, J2', LADDERS)
+def test_first_step_distance_below(B2, H2, I2, J2):
+    runs = 筹码引擎.generate_runs(B2, H2, I2, J2)
+    distances = runs.expand().distances
+    values = np.concatenate([np.quantile(distances, np.linspace(0, 1, 23)),
+                             [distances.min(), distances.min() + 1e-9, distances.max() + 1]])
+    for value in values:
+        assert runs.first_step_distance_below(value) == first_step(distances < value)
+
+
+@pytest.mark.parametrize('B2, H2, I2, J2', LADDERS)
+def test_first_step_strong_crosses(B2, H2, I2, J2):
+    runs = 筹码引擎.generate_runs(B2, H2, I2, J2)
+    strongs = runs.expand().strongs
+    rising = strongs[-1] >= strongs[0]
+    values = np.concatenate([np.quantile(strongs, np.linspace(0, 1, 23)),
+                             [strongs[0] - 1, strongs[0] + 1, strongs[-1]]])
+    for level in values:
+        reached = strongs >= level if rising else strongs <= level
+        if reached[0] and strongs[0] != level:
+            expected = 0    # 第1步已经越过
+        else:
+            expected = first_step(reached)
+        assert runs.first_step_strong_crosses(level) == expected
+
+
+def test_search_filter_and_jump(qapp):
+    import 汇总窗口v6
+    runs = 筹码引擎.generate_runs(100, 10, 1, 3000)
+    window = 汇总窗口v6.ResultsWindow(runs)
+    model = window.model
+
+    def search(mode, text):
+        window.search_mode.setCurrentIndex(mode)
+        window.search_input.setText(text)
+        window.search()
+        return window.table.selectionModel().selectedRows()
+
+    selected = search(0, '1500')
+    assert model.offset + selected[0].row() == 1499
+    search(0, '3001')
+    assert '超出范围' in window.search_label.text()
+
+    # 按价位筛选：只显示该价位的各步
+    first, last = runs.steps_at_price(runs.prices[3])
+    search(1, str(runs.prices[3]))
+    assert (model.offset, model.stop) == (first - 1, last) and model.is_filtered()
+    window.show_all()
+    assert not model.is_filtered() and model.offset == 0
+
+    step = runs.first_step_distance_below(5)
+    selected = search(2, '5')
+    assert model.offset + selected[0].row() == step - 1
+
+    # 强平线第1步已经越过目标时只提示，不跳转
+    window.table.clearSelection()
+    assert search(3, '1000') == []
+    assert '已越过' in window.search_label.text()
+    window.close()
@@ -0,0 +1,149 @@
+"""可变筹码的加仓计划：与逐步搜索最小单位数的参考实现对比、结束原因、批量求解与预算上限"""
+import math
+
+import numpy as np
+import pytest
+
+import 求解器
+import 筹码引擎
+
+CASES = [
+    (100, 10, 1, 2, 200, None),          # 单位数逐步增大直到无解
+    (100, 10, 1, 50, 200, None),         # 第2步即无解
+    (100, 10, 1, 3, 10 ** 5, 1000),      # 超出预算
+    (100, 10, 1, 1e-9, 300, None),       # 每步1个单位，达到迭代次数
+    (100, 0.5, 1, 1, 10, None),          # 杠杆倍数不足1
+    (100, 10, 1, 2, 0, None),
+]
+
+
+def reference(B2, H2, I2, target, J2, budget):
+    """逐步计算：每步的单位数为满足目标边际的最小整数（倍增后二分查找）"""
+    factor = 1 - 1 / max(1, H2)
+    limit = min(budget, 求解器.MAX_UNITS) if budget is not None else 求解器.MAX_UNITS
+    chips, total, cumulative_sum, strong = [], 0, 0.0, 0.0
+    for i in range(1, J2 + 1):
+        if i == 1:
+            price, count = B2, 1
+        else:
+            price = math.ceil(strong) + I2
+
+            def enough(count):
+                return price - (cumulative_sum + count * price) / (total + count) * factor >= target
+
+            if not enough(1):
+                if (1 - factor) * price - target <= 0:
+                    return chips, 求解器.STOP_INFEASIBLE
+                hi = 2
+                while not enough(hi):
+                    hi *= 2
+                lo = hi // 2
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    lo, hi = (lo, mid) if enough(mid) else (mid, hi)
+                count = hi
+            else:
+                count = 1
+        if total + count > limit:
+            return chips, 求解器.STOP_BUDGET
+        total += count
+        cumulative_sum += count * price
+        strong = cumulative_sum / total * factor
+        chips.append(count)
+    return chips, 求解器.STOP_ITERATIONS
+
+
+@pytest.mark.parametrize('B2, H2, I2, target, J2, budget', CASES)
+def test_chip_schedule_matches_reference(B2, H2, I2, target, J2, budget):
+    result, stop = 求解器.chip_schedule(B2, H2, I2, target, J2, budget)
+    chips, expected_stop = reference(B2, H2, I2, target, J2, budget)
+    assert stop == expected_stop
+    np.testing.assert_array_equal(result.chips, chips)
+    # 每步加仓后都满足目标边际
+    assert (result.columns[-1][1:] >= target).all()
+
+
+def test_counts_near_max_units_are_minimal():
+    # 单位数达到10^15量级时，浮点舍入使目标边际的判断不再单调，逐步检查多一个、少一个单位
+    result, stop = 求解器.chip_schedule(1000, 20, 0.5, 5, 10 ** 4)
+    assert stop == 求解器.STOP_BUDGET and result.chips.max() > 2 ** 50
+    factor = 1 - 1 / 20
+    total, cumulative_sum = 0, 0.0
+    for price, count in zip(result.prices.tolist(), result.chips.tolist()):
+        def margin(count):
+            return price - (cumulative_sum + count * price) / (total + count) * factor
+
+        if total:
+            assert margin(count) >= 5
+            assert count == 1 or margin(count - 1) < 5
+        total += count
+        cumulative_sum += count * price
+
+
+def test_stop_reasons():
+    assert 求解器.chip_schedule(100, 10, 1, 2, 20)[1] == 求解器.STOP_ITERATIONS
+    assert 求解器.chip_schedule(100, 10, 1, 2, 200)[1] == 求解器.STOP_INFEASIBLE
+    result, stop = 求解器.chip_schedule(100, 10, 1, 3, 10 ** 5, budget=1000)
+    assert stop == 求解器.STOP_BUDGET and result.chips.sum() <= 1000
+
+
+def test_tiny_target_matches_fixed_ladder():
+    result, _ = 求解器.chip_schedule(100, 10, 1, 1e-9, 300)
+    for column, expected in zip(result.columns, 筹码引擎.generate_data(100, 10, 1, 300).columns):
+        np.testing.assert_array_equal(column, expected)
+
+
+def test_huge_budget_is_clamped():
+    expected, stop = 求解器.chip_schedule(1000, 20, 0.5, 5, 10 ** 4)
+    for budget in (2.0 ** 60, 1e300, float('inf')):
+        result, clamped_stop = 求解器.chip_schedule(1000, 20, 0.5, 5, 10 ** 4, budget)
+        np.testing.assert_array_equal(result.chips, expected.chips)
+        assert clamped_stop == stop
+    assert expected.chips.sum() <= 求解器.MAX_UNITS
+
+
+def summary_of(B2, H2, I2, target, J2, budget):
+    result, stop = 求解器.chip_schedule(B2, H2, I2, target, J2, budget)
+    if len(result.prices) == 0:
+        return (0, 0, 0, np.nan, np.nan, np.nan, stop)
+    return (len(result.prices), result.chips.sum(), result.chips[-1], result.prices[-1],
+            result.averages[-1], result.strongs[-1], stop)
+
+
+def test_sizing_sweep_matches_chip_schedule():
+    targets = np.array([1e-9, 0.5, 1, 2, 3, 5, 8, 50])
+    budgets = np.array([[100], [1e6], [1e300]])
+    summary = 求解器.sizing_sweep(100, 10, 1, targets, 3000, budgets)
+    assert summary.shape == (3, 8) and len(summary) == 24
+    fields = ('steps', 'total_chips', 'last_chips', 'final_prices', 'final_averages',
+              'final_strongs', 'stops')
+    for i, budget in enumerate(budgets[:, 0]):
+        for j, target in enumerate(targets):
+            expected = summary_of(100, 10, 1, target, 3000, budget)
+            actual = tuple(getattr(summary, field)[i, j] for field in fields)
+            np.testing.assert_array_equal(actual, expected)
+
+
+def test_sizing_sweep_broadcasts_parameters():
+    B2 = np.array([100, 1000, 37.5])
+    H2 = np.array([10, 20, 0.5])
+    summary = 求解器.sizing_sweep(B2, H2, 1, 2, 500)
+    for k in range(3):
+        expected = summary_of(B2[k], H2[k], 1, 2, 500, None)
+        assert (summary.steps[k], summary.total_chips[k], summary.stops[k]) == \
+            (expected[0], expected[1], expected[-1])
+
+
+def test_sizing_sweep_without_steps():
+    summary = 求解器.sizing_sweep(100, 10, 1, [1, 2], 0)
+    assert (summary.steps == 0).all() and np.isnan(summary.final_prices).all()
+    assert (summary.stops == 求解器.STOP_ITERATIONS).all()
+
+
+@pytest.mark.parametrize('target, budget', [(0, None), (-1, None), (float('nan'), None),
+                                            (1, 0.5), (1, 0)])
+def test_invalid_target_or_budget(target, budget):
+    with pytest.raises(ValueError):
+        求解器.chip_schedule(100, 10, 1, target, 10, budget)
+    with pytest.raises(ValueError):
+        求解器.sizing_sweep(100, 10, 1, [1, target], 10, budget)
@@ -0,0 +1,454 @@
+"""批量参数扫描
+
+安装了numba时逐个场景按游程递推（与筹码引擎.generate_runs的计算完全相同）并即时编译，
+每个场景的耗时与不同价位的个数成正比，与J2无关（每个游程约70ns）。
+
+未安装numba时对多组(B2, H2, I2)同时推进，全部运算都在NumPy数组上进行，
+每轮循环让所有场景各前进一个游程（同一价位的一段连续步数），循环次数为各场景
+不同价位个数的最大值，每轮都要遍历全部未完成的场景，约慢3倍。
+
+100^3的网格（10^6个场景）单核实测：J2=50约2秒，J2=5000约5秒，J2=10^9约14秒，
+整数参数网格J2=10^6约17秒；更大的网格可用parallel_sweep分到多个进程。
+"""
+import numpy as np
+import 筹码引擎
+
+# 剩余场景少于该数量时改用逐个场景的游程计算，避免数组运算的固定开销
+SCALAR_THRESHOLD = 32
+
+# 浮点校正的最大轮数，仍未收敛的场景交给逐个场景的二分查找
+MAX_CORRECTIONS = 4
+
+
+class SweepResult:
+    """批量扫描结果，每个属性都是与输入参数广播后形状相同的数组
+
+        final_averages    最终均价 (float64)
+        final_strongs     最终强平线 (float64)
+        levels            不同加仓价位的个数 (int64)
+        saturation_steps  最后一个价位开始的步数 (int64)
+        saturated         最后一个价位是否会永远保持不变，即阶梯已完整 (bool)
+    """
+    def __init__(self, final_averages, final_strongs, levels, saturation_steps, saturated):
+        self.final_averages = final_averages
+        self.final_strongs = final_strongs
+        self.levels = levels
+        self.saturation_steps = saturation_steps
+        self.saturated = saturated
+
+    def __len__(self):
+        return self.final_averages.size
+
+    @property
+    def shape(self):
+        return self.final_averages.shape
+
+    def reshape(self, shape):
+        """返回按新形状排列的结果"""
+        return SweepResult(self.final_averages.reshape(shape),
+                           self.final_strongs.reshape(shape),
+                           self.levels.reshape(shape),
+                           self.saturation_steps.reshape(shape),
+                           self.saturated.reshape(shape))
+
+
+# 以下四个函数逐个场景按游程递推，与筹码引擎中的_change_estimate、_run_end、
+# _RunsState.extend/build逐行对应，浮点表达式相同，结果与generate_runs完全一致。
+# 安装了numba时按依赖顺序即时编译（见_get_cells_kernel）。
+
+def _cell_change_estimate(excess, price, ceil_strong, factor):
+    """筹码引擎._change_estimate的浮点版本，永不变化时返回-1（有效的估计值至少为1）"""
+    if excess > 0:
+        gap = (ceil_strong - 1) - factor * price
+        if gap > 0:
+            return np.ceil(factor * excess / gap)
+    elif excess < 0:
+        gap = factor * price - ceil_strong
+        if gap > 0:
+            return np.floor(-factor * excess / gap) + 1
+    return -1.0
+
+
+def _cell_holds(cumulative_sum, n, price, ceil_strong, factor, t):
+    return np.ceil((cumulative_sum + (t - n) * price) / t * factor) == ceil_strong
+
+
+def _cell_run_end(cumulative_sum, n, price, ceil_strong, factor, J2):
+    """筹码引擎._run_end的编译版本"""
+    estimate = _cell_change_estimate(cumulative_sum - n * price, price, ceil_strong, factor)
+    if estimate < 0:
+        estimate = J2 + 1
+    # 先在浮点数上截取范围再转为整数，避免很大的估计值溢出
+    estimate = int(min(max(estimate, n + 1), J2 + 1))
+
+    if estimate <= J2 and _cell_holds(cumulative_sum, n, price, ceil_strong, factor, estimate):
+        lo, stride = estimate, 1
+        while True:
+            hi = lo + stride
+            if hi > J2:
+                hi = J2 + 1
+                break
+            if not _cell_holds(cumulative_sum, n, price, ceil_strong, factor, hi):
+                break
+            lo, stride = hi, stride * 2
+    else:
+        hi, stride = estimate, 1
+        while True:
+            lo = hi - stride
+            if lo <= n:
+                lo = n
+                break
+            if _cell_holds(cumulative_sum, n, price, ceil_strong, factor, lo):
+                break
+            hi, stride = lo, stride * 2
+
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if _cell_holds(cumulative_sum, n, price, ceil_strong, factor, mid):
+            lo = mid
+        else:
+            hi = mid
+    return min(hi, J2)
+
+
+def _sweep_cells(B2, factors, I2, J2, final_averages, final_strongs, levels,
+                 saturation_steps, saturated):
+    """逐个场景计算摘要，结果写入输出数组"""
+    for i in range(len(B2)):
+        factor = factors[i]
+        run_price = B2[i]
+        run_first = 1
+        run_sum = 0.0
+        cumulative_sum = B2[i]
+        n = 1
+        count = 1
+        while n < J2:
+            ceil_strong = np.ceil(cumulative_sum / n * factor)
+            price = ceil_strong + I2[i]
+            last = _cell_run_end(cumulative_sum, n, price, ceil_strong, factor, J2)
+            if price != run_price:
+                run_price = price
+                run_first = n + 1
+                run_sum = cumulative_sum
+                count += 1
+            cumulative_sum = run_sum + (last - run_first + 1) * run_price
+            n = last
+
+        total_sum = run_sum + (J2 - run_first + 1) * run_price
+        final_averages[i] = total_sum / J2
+        final_strongs[i] = final_averages[i] * factor
+        levels[i] = count
+        saturation_steps[i] = run_first
+        ceil_strong = np.ceil(total_sum / J2 * factor)
+        price = ceil_strong + I2[i]
+        saturated[i] = (price == run_price and
+                        _cell_change_estimate(total_sum - J2 * price, price,
+                                              ceil_strong, factor) < 0)
+
+
+# 逐个场景递推的编译版本，首次调用时决定；未安装numba时为False，使用数组版本
+_cells_kernel = None
+
+
+def _get_cells_kernel():
+    global _cells_kernel, _cell_change_estimate, _cell_holds, _cell_run_end
+    if _cells_kernel is None:
+        try:
+            from numba import njit
+        except ImportError:
+            _cells_kernel = False
+        else:
+            # 被调用的函数先编译并替换模块中的名称，调用方编译时才能引用编译版本
+            jit = njit(cache=True, nogil=True)
+            _cell_change_estimate = jit(_cell_change_estimate)
+            _cell_holds = jit(_cell_holds)
+            _cell_run_end = jit(_cell_run_end)
+            _cells_kernel = jit(_sweep_cells)
+    return _cells_kernel
+
+
+def _holds(cumulative_sums, n, prices, ceil_strongs, factors, t):
+    """游程延续到第t步时，强平线向上取整是否仍不变（与逐步计算的浮点表达式一致）"""
+    return np.ceil((cumulative_sums + (t - n) * prices) / t * factors) == ceil_strongs
+
+
+def _change_estimates(excess, prices, ceil_strongs, factors, J2):
+    """_change_estimate的数组版本，永不变化的场景返回J2 + 1并标记为permanent"""
+    estimates = np.full(len(excess), float(J2 + 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 均价下降，强平线降到 ceil_strong - 1 及以下时变化
+        gap = (ceil_strongs - 1) - factors * prices
+        down = (excess > 0) & (gap > 0)
+        estimates[down] = np.ceil(factors[down] * excess[down] / gap[down])
+        # 均价上升，强平线超过 ceil_strong 时变化
+        gap = factors * prices - ceil_strongs
+        up = (excess < 0) & (gap > 0)
+        estimates[up] = np.floor(-factors[up] * excess[up] / gap[up]) + 1
+    permanent = ~(down | up)
+    return np.minimum(estimates, J2 + 1), permanent
+
+
+def _run_ends(cumulative_sums, n, prices, ceil_strongs, factors, J2):
+    """筹码引擎._run_end的数组版本，返回每个场景当前游程的最后一步"""
+    estimates, _ = _change_estimates(cumulative_sums - n * prices, prices,
+                                     ceil_strongs, factors, J2)
+    ends = np.maximum(estimates, n + 1).astype(np.int64)
+
+    # 用逐步计算的浮点表达式校正解析估计，通常一轮即可
+    for _ in range(MAX_CORRECTIONS):
+        back = (ends - 1 > n) & ~_holds(cumulative_sums, n, prices, ceil_strongs,
+                                        factors, ends - 1)
+        forward = (ends <= J2) & _holds(cumulative_sums, n, prices, ceil_strongs,
+                                        factors, np.minimum(ends, J2))
+        if not (back.any() or forward.any()):
+            break
+        ends[back] -= 1
+        ends[forward] += 1
+    else:
+        for i in np.nonzero(back | forward)[0]:
+            ends[i] = 筹码引擎._run_end(cumulative_sums[i], int(n[i]), prices[i],
+                                        ceil_strongs[i], factors[i], J2)
+    return np.minimum(ends, J2)
+
+
+def sweep(B2, H2, I2, J2):
+    """批量计算多组参数的加仓阶梯摘要
+
+    参数:
+        B2, H2, I2: 初始价位、杠杆倍数、新入价-强平距，可以是标量或可广播的数组
+        J2: 迭代次数（所有场景相同）
+
+    返回:
+        SweepResult: 形状为B2/H2/I2广播后的形状
+    """
+    B2, H2, I2 = np.broadcast_arrays(np.asarray(B2, dtype=np.float64),
+                                     np.asarray(H2, dtype=np.float64),
+                                     np.asarray(I2, dtype=np.float64))
+    shape = B2.shape
+    B2 = B2.ravel()
+    H2 = H2.ravel()
+    I2 = I2.ravel()
+    count = len(B2)
+    J2 = max(0, int(J2))
+
+    # 避免除零错误（杠杆倍数至少为1）
+    factors = 1 - 1 / np.maximum(1.0, H2)
+
+    final_averages = np.zeros(count)
+    final_strongs = np.zeros(count)
+    levels = np.zeros(count, dtype=np.int64)
+    saturation_steps = np.zeros(count, dtype=np.int64)
+    saturated = np.zeros(count, dtype=bool)
+    result = SweepResult(final_averages, final_strongs, levels, saturation_steps, saturated)
+    if J2 == 0 or count == 0:
+        return result.reshape(shape)
+
+    kernel = _get_cells_kernel()
+    if kernel:
+        kernel(B2, factors, I2, J2, final_averages, final_strongs, levels,
+               saturation_steps, saturated)
+        return result.reshape(shape)
+
+    # 仍在计算中的场景（按原始下标压缩存储）
+    active = np.arange(count)
+    n = np.ones(count, dtype=np.int64)
+    cumulative_sums = B2.copy()   # 第一行价格为初始价位
+    last_prices = B2.copy()
+    run_levels = np.ones(count, dtype=np.int64)
+    run_firsts = np.ones(count, dtype=np.int64)
+    factor = factors
+    offset = I2
+
+    while len(active):
+        if len(active) <= SCALAR_THRESHOLD:
+            # 剩下的场景逐个计算
+            for i in active:
+                runs = 筹码引擎.generate_runs(B2[i], H2[i], I2[i], J2)
+                final_averages[i] = runs.final_average
+                final_strongs[i] = runs.final_strong
+                levels[i] = len(runs)
+                saturation_steps[i] = runs.first_steps[-1]
+                saturated[i] = runs.saturated
+            break
+
+        # 上行强平线向上取整，得到下一个游程的价位
+        ceil_strongs = np.ceil(cumulative_sums / n * factor)
+        prices = ceil_strongs + offset
+
+        # 已到达J2的场景：记录结果，并判断最后一个价位是否永久不变
+        done = n >= J2
+        if done.any():
+            idx = active[done]
+            averages = cumulative_sums[done] / J2
+            final_averages[idx] = averages
+            final_strongs[idx] = averages * factor[done]
+            levels[idx] = run_levels[done]
+            saturation_steps[idx] = run_firsts[done]
+            _, permanent = _change_estimates(
+                cumulative_sums[done] - J2 * prices[done], prices[done],
+                ceil_strongs[done], factor[done], J2)
+            saturated[idx] = (prices[done] == last_prices[done]) & permanent
+
+            keep = ~done
+            active = active[keep]
+            n = n[keep]
+            cumulative_sums = cumulative_sums[keep]
+            last_prices = last_prices[keep]
+            run_levels = run_levels[keep]
+            run_firsts = run_firsts[keep]
+            factor = factor[keep]
+            offset = offset[keep]
+            ceil_strongs = ceil_strongs[keep]
+            prices = prices[keep]
+
+        # 所有场景各前进一个游程
+        ends = _run_ends(cumulative_sums, n, prices, ceil_strongs, factor, J2)
+        new_level = prices != last_prices
+        run_levels += new_level
+        run_firsts = np.where(new_level, n + 1, run_firsts)
+        cumulative_sums = cumulative_sums + (ends - n) * prices
+        n = ends
+        last_prices = prices
+
+    return result.reshape(shape)
+
+
+def sweep_grid(B2_values, H2_values, I2_values, J2):
+    """对B2、H2、I2取值做笛卡尔积扫描
+
+    返回的SweepResult形状为 (len(B2_values), len(H2_values), len(I2_values))。
+    耗时与场景数乘以平均价位数成正比，参考模块说明中的实测数据。
+    """
+    B2 = np.asarray(B2_values, dtype=np.float64)[:, None, None]
+    H2 = np.asarray(H2_values, dtype=np.float64)[None, :, None]
+    I2 = np.asarray(I2_values, dtype=np.float64)[None, None, :]
+    return sweep(B2, H2, I2, J2)
+
+
+# 共享内存中各列的名称与类型：前三列为输入参数，其余为结果
+_SHARED_COLUMNS = [
+    ('B2', np.float64),
+    ('H2', np.float64),
+    ('I2', np.float64),
+    ('final_averages', np.float64),
+    ('final_strongs', np.float64),
+    ('levels', np.int64),
+    ('saturation_steps', np.int64),
+    ('saturated', np.bool_),
+]
+
+# 工作进程中挂接的共享内存（由_attach_shared初始化）
+_worker_blocks = []
+_worker_arrays = {}
+
+
+def _shared_views(blocks, count):
+    """把共享内存块包装成NumPy数组"""
+    return {name: np.ndarray((count,), dtype=dtype, buffer=block.buf)
+            for (name, dtype), block in zip(_SHARED_COLUMNS, blocks)}
+
+
+def _attach_shared(names, count):
+    """工作进程初始化：按名称挂接共享内存"""
+    from multiprocessing import shared_memory
+    _worker_blocks[:] = [shared_memory.SharedMemory(name=name) for name in names]
+    _worker_arrays.clear()
+    _worker_arrays.update(_shared_views(_worker_blocks, count))
+
+
+def _sweep_chunk(start, stop, J2):
+    """工作进程任务：计算[start, stop)区间的场景并直接写入共享内存"""
+    arrays = _worker_arrays
+    result = sweep(arrays['B2'][start:stop], arrays['H2'][start:stop],
+                   arrays['I2'][start:stop], J2)
+    arrays['final_averages'][start:stop] = result.final_averages
+    arrays['final_strongs'][start:stop] = result.final_strongs
+    arrays['levels'][start:stop] = result.levels
+    arrays['saturation_steps'][start:stop] = result.saturation_steps
+    arrays['saturated'][start:stop] = result.saturated
+    return stop - start
+
+
+def parallel_sweep(B2, H2, I2, J2, workers=None, chunk_size=8192,
+                   progress=None, cancel_event=None):
+    """多进程批量扫描，参数与sweep相同
+
+    参数网格按chunk_size切分后分发到进程池，输入参数和结果都放在共享内存中，
+    工作进程直接读写，不需要在进程间传递数组。
+
+    参数:
+        workers: 进程数，默认为CPU核数
+        chunk_size: 每个任务包含的场景数
+        progress: 进度回调 progress(已完成场景数, 总场景数)
+        cancel_event: threading.Event等带is_set()的对象，置位后停止分发剩余任务
+
+    返回:
+        SweepResult；被取消时返回None
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    from multiprocessing import shared_memory
+    import os
+
+    B2, H2, I2 = np.broadcast_arrays(np.asarray(B2, dtype=np.float64),
+                                     np.asarray(H2, dtype=np.float64),
+                                     np.asarray(I2, dtype=np.float64))
+    shape = B2.shape
+    count = B2.size
+    workers = workers or os.cpu_count() or 1
+    if count == 0 or workers == 1:
+        result = sweep(B2, H2, I2, J2)
+        if progress:
+            progress(count, count)
+        return result
+
+    blocks = [shared_memory.SharedMemory(create=True, size=max(1, count * np.dtype(dtype).itemsize))
+              for _, dtype in _SHARED_COLUMNS]
+    try:
+        arrays = _shared_views(blocks, count)
+        arrays['B2'][:] = B2.ravel()
+        arrays['H2'][:] = H2.ravel()
+        arrays['I2'][:] = I2.ravel()
+
+        chunks = [(start, min(start + chunk_size, count))
+                  for start in range(0, count, chunk_size)]
+        finished = 0
+        cancelled = False
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared,
+                                 initargs=([block.name for block in blocks], count)) as executor:
+            # 同时在途的任务数保持为进程数的两倍，便于及时响应取消
+            pending = set()
+            chunk_iter = iter(chunks)
+            while True:
+                while not cancelled and len(pending) < workers * 2:
+                    chunk = next(chunk_iter, None)
+                    if chunk is None:
+                        break
+                    pending.add(executor.submit(_sweep_chunk, chunk[0], chunk[1], J2))
+                if not pending:
+                    break
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished += future.result()
+                if done and progress:
+                    progress(finished, count)
+                if not cancelled and cancel_event is not None and cancel_event.is_set():
+                    # 撤销尚未开始的任务，只等待正在运行的任务结束
+                    cancelled = True
+                    for future in pending:
+                        future.cancel()
+                    pending = {future for future in pending if not future.cancelled()}
+        if cancelled:
+            return None
+
+        # 复制出共享内存后再释放
+        result = SweepResult(arrays['final_averages'].copy(),
+                             arrays['final_strongs'].copy(),
+                             arrays['levels'].copy(),
+                             arrays['saturation_steps'].copy(),
+                             arrays['saturated'].copy())
+        return result.reshape(shape)
+    finally:
+        arrays = None
+        for block in blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,335 @@
+"""历史K线回测
+
+把CSV格式的K线转换为按列保存的.npy文件（目录中另有meta.json记录行数），
+回测时用np.load(mmap_mode='r')内存映射读取，按块处理，不把整个文件读入内存。
+
+按加仓阶梯逐根K线回放：阶梯的第一个价位即初始价位，与后面的价位一样作为
+挂单价，K线触及时按该价位成交（跳空越过几个价位时一起成交）。价格单调下降的
+阶梯看最低价，上升的阶梯看最高价；同一根K线内先成交加仓，再用最低价检查
+强平线，强平后不再加仓。输出每根K线收盘时的盈亏曲线和加仓、强平事件记录。
+
+python 回测.py convert 行情.csv 行情目录
+python 回测.py run 行情目录 100 10 10 50 --equity 盈亏.npy --events 事件.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import 筹码引擎
+
+# 列名，time为Unix时间（秒），其余为价格
+COLUMNS = ('time', 'open', 'high', 'low', 'close')
+
+# CSV表头中可识别的列名（不区分大小写）
+COLUMN_ALIASES = {
+    'time': ('time', 'date', 'datetime', 'timestamp', '时间', '日期'),
+    'open': ('open', '开盘', '开盘价'),
+    'high': ('high', '最高', '最高价'),
+    'low': ('low', '最低', '最低价'),
+    'close': ('close', '收盘', '收盘价'),
+}
+
+META_FILE = 'meta.json'
+
+# 回测和转换时每块的行数
+CHUNK_ROWS = 1 << 20
+
+
+class BarFile:
+    """内存映射的K线目录，各列为只读的np.memmap，没有时间列时time为None
+
+    参数:
+        directory: convert_csv或write_bars生成的目录
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        try:
+            with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+            self.rows = int(meta['rows'])
+            columns = meta['columns']
+        except (OSError, ValueError, KeyError) as e:
+            raise ValueError(f"不是有效的K线目录: {directory}") from e
+        missing = {'high', 'low', 'close'} - set(columns)
+        if missing:
+            raise ValueError(f"K线目录缺少列: {', '.join(sorted(missing))}")
+        self.columns = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')[:self.rows]
+                        for name in columns}
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def time(self):
+        return self.columns.get('time')
+
+
+def _create_columns(directory, names, rows):
+    """在directory中为各列创建rows行的.npy文件，返回{列名: 可写的memmap}"""
+    os.makedirs(directory, exist_ok=True)
+    return {name: np.lib.format.open_memmap(os.path.join(directory, name + '.npy'), mode='w+',
+                                            dtype=np.int64 if name == 'time' else np.float64,
+                                            shape=(rows,))
+            for name in names}
+
+
+def _write_meta(directory, names, rows):
+    with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'rows': rows, 'columns': list(names)}, f, ensure_ascii=False)
+
+
+def write_bars(directory, high, low, close, open=None, time=None):
+    """把数组形式的K线写入directory，返回BarFile"""
+    arrays = {'time': time, 'open': open, 'high': high, 'low': low, 'close': close}
+    arrays = {name: np.asarray(array) for name, array in arrays.items() if array is not None}
+    rows = len(arrays['close'])
+    columns = _create_columns(directory, arrays, rows)
+    for name, array in arrays.items():
+        columns[name][:] = array
+        columns[name].flush()
+    _write_meta(directory, arrays, rows)
+    return BarFile(directory)
+
+
+def _header_columns(header):
+    """从CSV表头找出各列的位置，返回{列名: 位置}"""
+    fields = [field.strip().strip('"').lower() for field in header.split(',')]
+    found = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        for i, field in enumerate(fields):
+            if field in aliases:
+                found[name] = i
+                break
+    missing = {'high', 'low', 'close'} - set(found)
+    if missing:
+        raise ValueError(f"CSV表头中找不到列: {', '.join(sorted(missing))}")
+    return found
+
+
+def _parse_times(values):
+    """时间列转换为Unix时间（秒）：数字原样使用，否则按ISO日期时间解析"""
+    try:
+        return values.astype(np.float64).astype(np.int64)
+    except ValueError:
+        return values.astype('datetime64[s]').astype(np.int64)
+
+
+def _count_lines(path):
+    count = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 24), b''):
+            count += block.count(b'\n')
+    return count + 1  # 最后一行可能没有换行符
+
+
+def convert_csv(source, directory, chunk_rows=CHUNK_ROWS, progress=None):
+    """把CSV格式的K线（带表头，逗号分隔）逐块转换为K线目录，返回BarFile
+
+    先统计行数创建定长的.npy文件，再逐块解析写入，内存只与chunk_rows有关。
+    progress: 进度回调 progress(已转换行数, 总行数估计)
+    """
+    total = _count_lines(source)
+    with open(source, encoding='utf-8-sig') as f:
+        header = f.readline()
+        positions = _header_columns(header)
+        names = [name for name in COLUMNS if name in positions]
+        columns = _create_columns(directory, names, total)
+        prices = [name for name in names if name != 'time']
+        rows = 0
+        while True:
+            lines = [line for line in itertools.islice(f, chunk_rows) if line.strip()]
+            if not lines:
+                break
+            values = np.loadtxt(lines, delimiter=',', ndmin=2, dtype=np.float64,
+                                usecols=[positions[name] for name in prices])
+            stop = rows + len(lines)
+            for i, name in enumerate(prices):
+                columns[name][rows:stop] = values[:, i]
+            if 'time' in positions:
+                times = np.loadtxt(lines, delimiter=',', ndmin=1, dtype=str,
+                                   usecols=positions['time'])
+                columns['time'][rows:stop] = _parse_times(np.char.strip(times, '"'))
+            rows = stop
+            if progress:
+                progress(rows, total)
+    for column in columns.values():
+        column.flush()
+    _write_meta(directory, names, rows)
+    return BarFile(directory)
+
+
+class BacktestResult:
+    """回测结果
+
+        equity      每根K线收盘时的盈亏 (float64)：持仓筹码×(收盘价-均价)，
+                    强平后固定为强平时的亏损；指定了equity_path时为该文件的memmap
+        events      事件记录，每条为dict: bar（K线序号）, time, event（加仓/强平）,
+                    price, steps（累计步数）, average, strong
+        liquidated  是否被强平
+        levels_hit  成交的价位档数
+        seconds     回测耗时（秒）
+    """
+    def __init__(self, equity, events, liquidated, levels_hit, seconds):
+        self.equity = equity
+        self.events = events
+        self.liquidated = liquidated
+        self.levels_hit = levels_hit
+        self.seconds = seconds
+
+    def __len__(self):
+        return len(self.equity)
+
+    @property
+    def final_equity(self):
+        return float(self.equity[-1]) if len(self.equity) else 0.0
+
+    @property
+    def bars_per_second(self):
+        return len(self) / self.seconds if self.seconds else float('inf')
+
+
+def backtest(runs, bars, chunk_rows=CHUNK_ROWS, equity_path=None, progress=None):
+    """用K线回放加仓阶梯
+
+    参数:
+        runs: 加仓阶梯（LadderRuns，如generate_runs的结果）
+        bars: BarFile
+        chunk_rows: 每块的K线数
+        equity_path: 盈亏曲线保存为该.npy文件（内存映射写入），默认放在内存中
+        progress: 进度回调 progress(已处理K线数, 总K线数)
+
+    返回:
+        BacktestResult
+    """
+    if runs.n_steps == 0:
+        raise ValueError("加仓阶梯为空")
+    start_time = time.perf_counter()
+    prices, steps, averages, strongs = runs.levels()
+    n_levels = len(prices)
+    descending = not (n_levels > 1 and prices[-1] > prices[0])
+    # 以下数组的下标为已成交的档数，0表示尚未建仓
+    strong_at = np.concatenate(([-np.inf], strongs))
+    steps_at = np.concatenate(([0], steps))
+    cost_at = np.concatenate(([0.0], steps * averages))
+    search_prices = prices[::-1] if descending else prices
+
+    n = len(bars)
+    if equity_path:
+        equity = np.lib.format.open_memmap(equity_path, mode='w+', dtype=np.float64, shape=(n,))
+    else:
+        equity = np.empty(n, dtype=np.float64)
+    times = bars.time
+    events = []
+    extreme = np.inf if descending else -np.inf
+    level = 0
+    liquidated = False
+
+    def record(bar, event, index):
+        events.append({'bar': bar, 'time': None if times is None else int(times[bar]),
+                       'event': event, 'price': float(prices[index - 1]),
+                       'steps': int(steps_at[index]),
+                       'average': float(averages[index - 1]), 'strong': float(strongs[index - 1])})
+
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        low = np.asarray(bars['low'][start:stop])
+        if descending:
+            running = np.minimum.accumulate(low)
+            np.minimum(running, extreme, out=running)
+            count = lambda values: n_levels - np.searchsorted(search_prices, values, side='left')
+        else:
+            running = np.maximum.accumulate(np.asarray(bars['high'][start:stop]))
+            np.maximum(running, extreme, out=running)
+            count = lambda values: np.searchsorted(search_prices, values, side='right')
+        extreme = running[-1]
+        # 成交档数在块内单调，首尾相同时整块都是同一档数，不必逐根查找
+        if count(running[-1]) == level:
+            levels = level
+        else:
+            levels = count(running)
+        hit = low <= strong_at[levels]
+        if hit.any():
+            liquidated = True
+            last = int(hit.argmax())
+            low = low[:last + 1]
+            if not np.isscalar(levels):
+                levels = levels[:last + 1]
+
+        if not np.isscalar(levels):
+            # 成交档数变化的K线上逐档记录加仓
+            for i in np.flatnonzero(np.diff(levels, prepend=level)):
+                for index in range(level + 1, int(levels[i]) + 1):
+                    record(start + int(i), '加仓', index)
+                level = int(levels[i])
+
+        close = np.asarray(bars['close'][start:start + len(low)])
+        equity[start:start + len(low)] = steps_at[levels] * close - cost_at[levels]
+        if liquidated:
+            bar = start + last
+            record(bar, '强平', level)
+            # 按强平线平仓，亏损为全部保证金
+            equity[bar:] = steps_at[level] * strong_at[level] - cost_at[level]
+            break
+        if progress:
+            progress(stop, n)
+
+    if progress:
+        progress(n, n)
+    if equity_path:
+        equity.flush()
+    return BacktestResult(equity, events, liquidated, level, time.perf_counter() - start_time)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="用历史K线回测加仓阶梯")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help="把CSV格式的K线转换为内存映射的K线目录")
+    convert.add_argument('source', help="CSV文件（带表头，需有high、low、close列）")
+    convert.add_argument('directory', help="输出目录")
+
+    run = commands.add_parser('run', help="回测")
+    run.add_argument('directory', help="K线目录")
+    run.add_argument('B2', type=float, help="初始价位")
+    run.add_argument('H2', type=float, help="杠杆倍数")
+    run.add_argument('I2', type=float, help="新入价-强平距")
+    run.add_argument('J2', type=int, help="迭代次数")
+    run.add_argument('--equity', help="盈亏曲线保存为该.npy文件")
+    run.add_argument('--events', help="事件记录保存为该JSONL文件（默认输出到标准输出）")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'convert':
+            start = time.perf_counter()
+            bars = convert_csv(args.source, args.directory)
+            print(f"已转换 {len(bars)} 根K线，用时 {time.perf_counter() - start:.2f}s")
+            return 0
+        bars = BarFile(args.directory)
+        runs = 筹码引擎.generate_runs(args.B2, args.H2, args.I2, args.J2)
+        result = backtest(runs, bars, equity_path=args.equity)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    out = open(args.events, 'w', encoding='utf-8') if args.events else sys.stdout
+    try:
+        for event in result.events:
+            out.write(json.dumps(event, ensure_ascii=False) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"K线 {len(result)} 根，成交 {result.levels_hit} 档，"
+          f"{'已强平' if result.liquidated else '未强平'}，最终盈亏 {result.final_equity:.4f}，"
+          f"用时 {result.seconds:.3f}s（{result.bars_per_second / 1e6:.1f}M根/秒）",
+          file=sys.stderr if out is sys.stdout else sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,425 @@
+"""性能基准测试
+
+python 基准测试.py                 运行全部测试并与基线比较
+python 基准测试.py engine table    只运行指定的测试
+python 基准测试.py --save          运行并把结果保存为新的基线
+python 基准测试.py --quick         只测较小的迭代次数
+
+测试项:
+    engine    计算引擎（逐行generate_data与游程generate_runs）
+    binning   按价位统计筹码并建立多分辨率直方图
+    plotting  绘制筹码分布图（Agg，不显示窗口）
+    table     创建结果列表窗口并滚动到底部
+    startup   窗口版从启动进程到第一次显示窗口的时间
+    montecarlo  蒙特卡洛模拟（一年252个时间步的随机路径）
+    backtest  用内存映射的K线回测（随机游走生成的K线）
+    sizing    可变单位的加仓计划（单个目标和100个目标的批量求解，单位数逐步变化）
+    sweep     批量参数扫描（网格扫描，以及多进程扫描在不同进程数下的耗时）
+
+每项记录最快耗时（多次运行取最小值）和tracemalloc统计的内存峰值，
+与基线相比变慢或内存增加超过容差时视为退化，退出码为1。
+图形界面默认使用offscreen平台运行，不弹出窗口。
+"""
+import argparse
+import functools
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 基线文件
+BASELINE_FILE = os.path.join(HERE, '基准数据.json')
+
+# 测试参数：初始价位、新入价-强平距、各迭代次数和杠杆倍数
+B2 = 100
+I2 = 10
+SIZES = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+QUICK_SIZES = [10 ** 2, 10 ** 3, 10 ** 4]
+LEVERAGES = [2, 10, 50]
+
+# 价位很多的阶梯(B2, H2, I2)：不同价位数随迭代次数增长（J2=10^6时约13万个），
+# 覆盖多分桶的直方图、绘图和表格；上面几组杠杆的阶梯最多只有几十个价位
+DEEP_LADDER = (10 ** 6, 10, 1)
+
+# 蒙特卡洛模拟的路径数和阶梯迭代次数
+MC_PATHS = [10 ** 4, 10 ** 5]
+MC_J2 = 1000
+
+# 回测的K线数
+BACKTEST_BARS = [10 ** 4, 10 ** 6]
+
+# 可变单位加仓计划的新入价-强平距和目标边际：单位数逐步变化且能加满J2次
+SIZING_I2 = 1
+SIZING_TARGET = 1.5
+
+# 批量求解的目标边际个数和范围
+SIZING_TARGETS = 100
+SIZING_TARGET_RANGE = (1.1, 1.9)
+
+# 参数扫描的网格（每个维度的取值个数）和迭代次数
+SWEEP_GRID = 40
+SWEEP_J2 = [50, 10 ** 9]
+
+# 每项的运行次数（耗时取最小值）
+REPEAT = 3
+
+# 默认容差：比基线慢或内存多50%以上视为退化
+TOLERANCE = 0.5
+
+# 小于该差值的变化视为噪声（秒、字节）
+TIME_NOISE = 0.005
+MEMORY_NOISE = 1024 * 1024
+
+# 启动到第一次显示窗口的时间上限（秒，取多次的中位数）
+STARTUP_LIMIT = 0.5
+
+# 在新进程中启动窗口版，事件循环开始后输出是否已导入matplotlib并退出
+STARTUP_SCRIPT = """
+import sys
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+import 汇总窗口v6
+app = QApplication(sys.argv)
+window = 汇总窗口v6.MainWindow()
+window.show()
+def ready():
+    print('matplotlib' in sys.modules, flush=True)
+    app.quit()
+QTimer.singleShot(0, ready)
+app.exec_()
+"""
+
+
+def offscreen_env():
+    """子进程环境：未指定Qt平台时使用offscreen"""
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return env
+
+
+def measure(func, repeat=REPEAT):
+    """运行func，返回{'time': 最快耗时, 'peak': 内存峰值}"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    # 内存单独统计一次，避免tracemalloc影响计时
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'time': min(times), 'peak': peak}
+
+
+def scenarios(sizes):
+    """生成(名称, B2, H2, I2, J2)，名称用于结果的键"""
+    ladders = [(f'H2={H2}', B2, H2, I2) for H2 in LEVERAGES]
+    ladders.append(('deep',) + DEEP_LADDER)
+    for name, b2, h2, i2 in ladders:
+        for J2 in sizes:
+            yield name, b2, h2, i2, J2
+
+
+def bench_engine(sizes):
+    import 筹码引擎
+    筹码引擎.generate_data(B2, 2, I2, 10)  # 预先编译（安装了numba时）
+    results = {}
+    for name, b2, h2, i2, J2 in scenarios(sizes):
+        results[f'engine/generate_data/{name}/J2={J2}'] = measure(
+            functools.partial(筹码引擎.generate_data, b2, h2, i2, J2))
+        results[f'engine/generate_runs/{name}/J2={J2}'] = measure(
+            functools.partial(筹码引擎.generate_runs, b2, h2, i2, J2))
+    return results
+
+
+def bench_binning(sizes):
+    import 筹码引擎
+    import 筹码图表
+
+    def binning(runs):
+        prices, counts = runs.histogram()
+        筹码图表.HistogramPyramid(prices, counts)
+
+    results = {}
+    for name, b2, h2, i2, J2 in scenarios(sizes):
+        runs = 筹码引擎.generate_runs(b2, h2, i2, J2)
+        results[f'binning/{name}/J2={J2}'] = measure(functools.partial(binning, runs))
+    return results
+
+
+def bench_plotting(sizes):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import 筹码引擎
+    import 筹码图表
+
+    def plot(prices, counts):
+        # 与窗口版相同，每次在已有的图表上原地更新后完整绘制
+        figure = Figure(figsize=(11, 4.8))
+        canvas = FigureCanvasAgg(figure)
+        chart = 筹码图表.ChipChart(figure)
+        chart.update(prices, counts)
+        canvas.draw()
+
+    results = {}
+    for name, b2, h2, i2, J2 in scenarios(sizes):
+        prices, counts = 筹码引擎.generate_runs(b2, h2, i2, J2).histogram()
+        results[f'plotting/{name}/J2={J2}'] = measure(functools.partial(plot, prices, counts))
+    return results
+
+
+def bench_table(sizes):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    import 筹码引擎
+    import 汇总窗口v6
+    app = QApplication.instance() or QApplication([])
+
+    def table(runs):
+        window = 汇总窗口v6.ResultsWindow(runs)
+        window.show()
+        app.processEvents()
+        window.table.scrollToBottom()
+        app.processEvents()
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+
+    results = {}
+    for name, b2, h2, i2, J2 in scenarios(sizes):
+        runs = 筹码引擎.generate_runs(b2, h2, i2, J2)
+        results[f'table/{name}/J2={J2}'] = measure(functools.partial(table, runs))
+    return results
+
+
+def measure_startup(repeat=5):
+    """启动repeat次窗口版，返回(每次到第一次显示窗口的秒数, 启动时是否已导入matplotlib)"""
+    times = []
+    loaded = False
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, '-c', STARTUP_SCRIPT], cwd=HERE,
+                                env=offscreen_env(), stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True)
+        line = proc.stdout.readline()
+        times.append(time.perf_counter() - start)
+        proc.wait()
+        if not line:
+            raise RuntimeError("窗口版启动失败")
+        loaded = loaded or line.strip() == 'True'
+    return times, loaded
+
+
+def bench_startup(sizes):
+    times, loaded = measure_startup()
+    median = statistics.median(times)
+    # 除与基线比较外，启动时导入matplotlib或超过上限也视为退化
+    problems = []
+    if loaded:
+        problems.append('启动时导入了matplotlib')
+    if median > STARTUP_LIMIT:
+        problems.append(f'超过上限{STARTUP_LIMIT}s')
+    # 子进程的内存不在本进程统计范围内
+    return {'startup': {'time': median, 'peak': None, 'problems': problems}}
+
+
+def bench_montecarlo(sizes):
+    import 筹码引擎
+    import 蒙特卡洛
+
+    results = {}
+    for H2 in LEVERAGES:
+        runs = 筹码引擎.generate_runs(B2, H2, I2, MC_J2)
+        for n_paths in MC_PATHS:
+            if n_paths > max(sizes):
+                continue
+            results[f'montecarlo/H2={H2}/paths={n_paths}'] = measure(
+                functools.partial(蒙特卡洛.simulate, runs, n_paths, seed=0))
+    return results
+
+
+def bench_backtest(sizes):
+    import shutil
+    import tempfile
+    import numpy as np
+    import 筹码引擎
+    import 回测
+
+    directory = tempfile.mkdtemp()
+    try:
+        results = {}
+        rng = np.random.default_rng(0)
+        for n_bars in BACKTEST_BARS:
+            if n_bars > max(sizes):
+                continue
+            close = B2 * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+            bars = 回测.write_bars(os.path.join(directory, str(n_bars)),
+                                   close * 1.001, close * 0.999, close)
+            for H2 in LEVERAGES:
+                runs = 筹码引擎.generate_runs(B2, H2, 1, 1000)
+                results[f'backtest/H2={H2}/bars={n_bars}'] = measure(
+                    functools.partial(回测.backtest, runs, bars))
+            del bars
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_sizing(sizes):
+    import numpy as np
+    import 求解器
+    # 预先编译（安装了numba时）
+    求解器.chip_schedule(B2, 2, SIZING_I2, SIZING_TARGET, 10)
+    求解器.sizing_sweep(B2, 2, SIZING_I2, [SIZING_TARGET], 10)
+
+    results = {}
+    targets = np.linspace(*SIZING_TARGET_RANGE, SIZING_TARGETS)
+    for name, b2, h2, _, J2 in scenarios(sizes):
+        results[f'sizing/schedule/{name}/J2={J2}'] = measure(
+            functools.partial(求解器.chip_schedule, b2, h2, SIZING_I2, SIZING_TARGET, J2))
+        results[f'sizing/sweep/{name}/J2={J2}'] = measure(
+            functools.partial(求解器.sizing_sweep, b2, h2, SIZING_I2, targets, J2))
+    return results
+
+
+def bench_sweep(sizes):
+    import numpy as np
+    import 参数扫描
+    参数扫描.sweep(B2, 2, I2, 10)  # 预先编译（安装了numba时）
+
+    grid = (np.linspace(50, 500, SWEEP_GRID), np.linspace(1.5, 100, SWEEP_GRID),
+            np.linspace(0.5, 50, SWEEP_GRID))
+    B, H, I = np.meshgrid(*grid, indexing='ij')
+    # 进程数取2的幂直到CPU核数（至少测2个进程，覆盖进程池的开销）
+    cpus = os.cpu_count() or 1
+    workers = [2 ** k for k in range(1, cpus.bit_length() + 1) if 2 ** k <= max(2, cpus)]
+
+    results = {}
+    name = f'{SWEEP_GRID}^3'
+    for J2 in SWEEP_J2:
+        results[f'sweep/grid={name}/J2={J2}'] = measure(
+            functools.partial(参数扫描.sweep, B, H, I, J2))
+        for n in workers:
+            results[f'sweep/parallel/grid={name}/J2={J2}/workers={n}'] = measure(
+                functools.partial(参数扫描.parallel_sweep, B, H, I, J2, workers=n))
+    return results
+
+
+BENCHMARKS = {
+    'engine': bench_engine,
+    'binning': bench_binning,
+    'plotting': bench_plotting,
+    'table': bench_table,
+    'startup': bench_startup,
+    'montecarlo': bench_montecarlo,
+    'backtest': bench_backtest,
+    'sizing': bench_sizing,
+    'sweep': bench_sweep,
+}
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['results']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def save_baseline(path, results):
+    # 只更新本次运行的项，保留其他项的基线
+    baseline = load_baseline(path)
+    baseline.update({name: {'time': result['time'], 'peak': result['peak']}
+                     for name, result in results.items()})
+    data = {
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': dict(sorted(baseline.items())),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def format_bytes(n):
+    if n is None:
+        return '-'
+    if n < 1024 * 1024:
+        return f'{n / 1024:.0f}KB'
+    return f'{n / 1024 / 1024:.1f}MB'
+
+
+def compare(name, result, base, tolerance):
+    """输出一项结果与基线的比较，返回是否退化"""
+    line = f"{name:<40} {result['time']:>9.4f}s {format_bytes(result['peak']):>9}"
+    problems = result.get('problems', [])
+    if base is None:
+        line += "   （无基线）"
+        if problems:
+            line += "   退化: " + "、".join(problems)
+        print(line)
+        return bool(problems)
+
+    regressed = list(problems)
+    ratio = result['time'] / base['time'] if base['time'] else 1
+    if (result['time'] - base['time'] > TIME_NOISE
+            and result['time'] > base['time'] * (1 + tolerance)):
+        regressed.append('耗时')
+    if (result['peak'] is not None and base['peak'] is not None
+            and result['peak'] - base['peak'] > MEMORY_NOISE
+            and result['peak'] > base['peak'] * (1 + tolerance)):
+        regressed.append('内存')
+    line += f"   基线 {base['time']:.4f}s {format_bytes(base['peak'])} ({ratio - 1:+.0%})"
+    if regressed:
+        line += "   退化: " + "、".join(regressed)
+    print(line)
+    return bool(regressed)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="运行性能基准测试并与基线比较")
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help="要运行的测试（默认全部）: " + ", ".join(BENCHMARKS))
+    parser.add_argument('--save', action='store_true', help="把本次结果保存为基线")
+    parser.add_argument('--quick', action='store_true', help="只测较小的迭代次数")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help=f"视为退化的变慢比例（默认{TOLERANCE}）")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="基线文件")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的测试: {', '.join(unknown)}（可选: {', '.join(BENCHMARKS)}）")
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = 0
+    for name in args.names or list(BENCHMARKS):
+        for case, result in BENCHMARKS[name](sizes).items():
+            results[case] = result
+            regressions += compare(case, result, baseline.get(case), args.tolerance)
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"基线已保存: {args.baseline}")
+    elif regressions:
+        print(f"{regressions} 项比基线退化")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,274 @@
+"""实时行情监控
+
+按加仓阶梯监控持仓：每个报价只做常数次运算（成交档数只增不减，逐档前进的总次数
+不超过价位档数），更新距强平线的距离、下一个加仓价位和保证金状态，不重新计算阶梯。
+
+行情来源为本地文件回放或TCP连接，每行一个报价："价格"或"时间,价格"（时间为秒、毫秒、微秒或纳秒时间戳）。
+
+python 实时行情.py 100 10 10 50 --file 行情.txt --rate 10000
+python 实时行情.py 100 10 10 50 --connect 127.0.0.1:9000
+"""
+import argparse
+import socket
+import sys
+import time
+
+import 筹码引擎
+
+# 保证金率（(价格-强平线)/(均价-强平线)）低于该值时为警告状态
+MARGIN_WARNING = 0.3
+
+STATUS_WAITING = '等待建仓'
+STATUS_NORMAL = '正常'
+STATUS_WARNING = '警告'
+STATUS_LIQUIDATED = '已强平'
+
+# 文件回放时，领先计划时间超过该值（秒）才等待，避免逐个报价sleep
+REPLAY_SLACK = 0.001
+
+# 按时间列回放时，相邻报价间隔超过该值（秒，如隔夜休市）时按该值回放
+REPLAY_MAX_GAP = 1.0
+
+# 时间列的单位按第一个时间戳的大小判断：超过阈值时除以对应的倍数换算为秒
+# （当前的秒级时间戳约1.7e9，毫秒约1.7e12，微秒约1.7e15，纳秒约1.7e18）
+TIME_UNITS = [(1e17, 1e9), (1e14, 1e6), (1e11, 1e3)]
+
+# TCP读取的超时（秒），用于及时响应停止请求
+SOCKET_TIMEOUT = 0.2
+
+# TCP连接的总超时（秒），期间每SOCKET_TIMEOUT检查一次停止请求
+CONNECT_TIMEOUT = 10.0
+
+
+class PositionMonitor:
+    """沿加仓阶梯建立的持仓的实时状态
+
+    阶梯的第一个价位即初始价位，与后面的价位一样在报价触及时成交（跳空越过几个
+    价位时一起成交），成交后报价不高于强平线即强平，之后不再成交。
+
+    每次update()最后一次性替换state = (价格, 已成交档数, 是否强平)，
+    其他线程读取state得到的总是同一个报价的一致状态。
+
+    参数:
+        runs: 加仓阶梯（LadderRuns）
+        level: 已成交的价位档数，默认0即尚未建仓
+    """
+    def __init__(self, runs, level=0):
+        if runs.n_steps == 0:
+            raise ValueError("加仓阶梯为空")
+        prices, steps, averages, strongs = runs.levels()
+        # 逐个报价访问单个元素，Python列表比NumPy数组快
+        self.prices = prices.tolist()
+        self.steps = steps.tolist()
+        self.averages = averages.tolist()
+        self.strongs = strongs.tolist()
+        self.descending = not (len(prices) > 1 and prices[-1] > prices[0])
+        self.level = level
+        self.liquidated = False
+        self.state = (None, level, False)
+
+    def update(self, price):
+        """处理一个报价，返回本次新成交的档数"""
+        level = self.level
+        if not self.liquidated:
+            prices = self.prices
+            n = len(prices)
+            if self.descending:
+                while level < n and price <= prices[level]:
+                    level += 1
+            else:
+                while level < n and price >= prices[level]:
+                    level += 1
+            if level and price <= self.strongs[level - 1]:
+                self.liquidated = True
+        filled = level - self.level
+        self.level = level
+        self.state = (price, level, self.liquidated)
+        return filled
+
+    def details(self, state=None):
+        """由state（默认为当前状态）计算显示用的各项数值，返回dict
+
+            price, steps, average, strong  报价、持仓步数、均价、强平线（未建仓时后三项为None）
+            distance      报价-强平线
+            next_price    下一个加仓价位，已全部成交时为None
+            margin_ratio  保证金率，1为报价等于均价，0为到达强平线
+            status        STATUS_WAITING/STATUS_NORMAL/STATUS_WARNING/STATUS_LIQUIDATED
+        """
+        price, level, liquidated = state or self.state
+        info = {'price': price, 'steps': 0, 'average': None, 'strong': None,
+                'distance': None, 'margin_ratio': None,
+                'next_price': self.prices[level] if level < len(self.prices) else None}
+        if level == 0:
+            info['status'] = STATUS_WAITING
+            return info
+        average = self.averages[level - 1]
+        strong = self.strongs[level - 1]
+        info.update(steps=self.steps[level - 1], average=average, strong=strong)
+        if price is not None:
+            info['distance'] = price - strong
+            margin = average - strong
+            info['margin_ratio'] = (price - strong) / margin if margin else None
+        if liquidated:
+            info['status'] = STATUS_LIQUIDATED
+        elif info['margin_ratio'] is not None and info['margin_ratio'] < MARGIN_WARNING:
+            info['status'] = STATUS_WARNING
+        else:
+            info['status'] = STATUS_NORMAL
+        return info
+
+
+def parse_tick(line):
+    """解析一行报价，返回(时间或None, 价格)；空行和表头返回None"""
+    fields = line.strip().split(',')
+    try:
+        if len(fields) == 1:
+            return None, float(fields[0])
+        return float(fields[0]), float(fields[1])
+    except ValueError:
+        return None
+
+
+def _time_scale(value):
+    """由时间戳的大小判断单位，返回换算为秒需要除以的倍数"""
+    for threshold, scale in TIME_UNITS:
+        if abs(value) >= threshold:
+            return scale
+    return 1.0
+
+
+def file_ticks(path, rate=None, stop_event=None):
+    """逐行回放行情文件，生成(时间, 价格)
+
+    rate为每秒报价数时按该速度回放；为None时有时间列则按时间间隔回放
+    （秒、毫秒、微秒、纳秒时间戳自动识别，超过REPLAY_MAX_GAP的间隔按REPLAY_MAX_GAP回放），
+    没有时间列则不等待。stop_event（threading.Event）置位后停止，等待期间也会立即响应。
+    """
+    start = time.perf_counter()
+    scale = None
+    last_time = None
+    elapsed = 0.0  # 按时间列计划的回放时间（秒）
+    count = 0
+    with open(path, encoding='utf-8-sig') as f:
+        for line in f:
+            tick = parse_tick(line)
+            if tick is None:
+                continue
+            if stop_event is not None and stop_event.is_set():
+                return
+            if rate:
+                due = start + count / rate
+            elif tick[0] is not None:
+                if scale is None:
+                    scale = _time_scale(tick[0])
+                else:
+                    elapsed += min(max(0.0, (tick[0] - last_time) / scale), REPLAY_MAX_GAP)
+                last_time = tick[0]
+                due = start + elapsed
+            else:
+                due = None
+            if due is not None:
+                ahead = due - time.perf_counter()
+                if ahead > REPLAY_SLACK:
+                    if stop_event is None:
+                        time.sleep(ahead)
+                    elif stop_event.wait(ahead):
+                        return
+            count += 1
+            yield tick
+
+
+def _connect(host, port, stop_event=None):
+    """连接TCP行情服务，每SOCKET_TIMEOUT检查一次停止请求；已停止时返回None
+
+    超过CONNECT_TIMEOUT仍未连上时抛出socket.timeout（OSError）。
+    """
+    deadline = time.perf_counter() + CONNECT_TIMEOUT
+    while True:
+        if stop_event is not None and stop_event.is_set():
+            return None
+        try:
+            return socket.create_connection((host, port), timeout=SOCKET_TIMEOUT)
+        except socket.timeout:
+            if time.perf_counter() >= deadline:
+                raise
+
+
+def socket_ticks(host, port, stop_event=None):
+    """连接TCP行情服务，逐行生成(时间, 价格)，连接关闭或stop_event置位后停止"""
+    conn = _connect(host, port, stop_event)
+    if conn is None:
+        return
+    with conn:
+        conn.settimeout(SOCKET_TIMEOUT)
+        buffer = b''
+        while stop_event is None or not stop_event.is_set():
+            try:
+                data = conn.recv(65536)
+            except socket.timeout:
+                continue
+            if not data:
+                break
+            lines = (buffer + data).split(b'\n')
+            buffer = lines.pop()
+            for line in lines:
+                tick = parse_tick(line.decode('utf-8', 'replace'))
+                if tick is not None:
+                    yield tick
+        if buffer:
+            tick = parse_tick(buffer.decode('utf-8', 'replace'))
+            if tick is not None:
+                yield tick
+
+
+def open_source(source, rate=None, stop_event=None):
+    """按来源文字打开行情："主机:端口"为TCP连接，其他为文件路径"""
+    host, sep, port = source.rpartition(':')
+    if sep and host and port.isdigit():
+        return socket_ticks(host, int(port), stop_event)
+    return file_ticks(source, rate, stop_event)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="按加仓阶梯实时监控持仓")
+    parser.add_argument('B2', type=float, help="初始价位")
+    parser.add_argument('H2', type=float, help="杠杆倍数")
+    parser.add_argument('I2', type=float, help="新入价-强平距")
+    parser.add_argument('J2', type=int, help="迭代次数")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--file', help="回放的行情文件")
+    group.add_argument('--connect', metavar='HOST:PORT', help="TCP行情服务地址")
+    parser.add_argument('--rate', type=float, default=None, help="回放速度（每秒报价数）")
+    args = parser.parse_args(argv)
+
+    runs = 筹码引擎.generate_runs(args.B2, args.H2, args.I2, args.J2)
+    monitor = PositionMonitor(runs)
+    ticks = file_ticks(args.file, args.rate) if args.file else open_source(args.connect)
+    count = 0
+    last = None
+    start = time.perf_counter()
+    try:
+        for _, price in ticks:
+            count += 1
+            monitor.update(price)
+            info = monitor.details()
+            # 只在加仓或状态变化时输出
+            if (info['status'], info['steps']) != last:
+                last = (info['status'], info['steps'])
+                line = f"#{count} 价格 {price:g} 持仓 {info['steps']} 步 状态 {info['status']}"
+                if info['distance'] is not None:
+                    line += f" 距强平 {info['distance']:.4f}"
+                if info['next_price'] is not None:
+                    line += f" 下一加仓 {info['next_price']:g}"
+                print(line, flush=True)
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        parser.error(str(e))
+    seconds = time.perf_counter() - start
+    print(f"共 {count} 个报价，用时 {seconds:.3f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
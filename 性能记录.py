@@ -0,0 +1,199 @@
+"""性能记录
+
+按阶段计时并写入结构化日志（每条记录一行JSON），可选用cProfile或
+tracemalloc采集详细数据。鼠标悬停、拖拽等高频事件只累计次数和耗时，
+由flush_handler_stats()汇总写入一条记录，单次超过SLOW_EVENT的事件另行记录。
+
+环境变量:
+    LADDER_PERF_LOG     日志文件路径，设置后各条记录追加写入该文件
+    LADDER_PROFILE      cprofile、tracemalloc或cprofile,tracemalloc，开启对应的采集
+    LADDER_PROFILE_DIR  cProfile结果（.prof文件）的保存目录，默认为当前目录
+
+环境变量的值无效或日志文件无法打开时只在标准错误输出警告，关闭对应功能，不影响程序运行。
+"""
+import contextlib
+import functools
+import json
+import os
+import sys
+import time
+
+# 支持的采集方式
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+
+# 单次耗时超过该值（秒）的事件单独记录
+SLOW_EVENT = 0.05
+
+# tracemalloc记录中保留的分配最多的代码行数
+TRACEMALLOC_TOP = 10
+
+_logger = None          # 设置了日志文件后才创建（延迟导入logging以加快启动）
+_profile_modes = set()
+_handler_stats = {}     # 事件名 -> [次数, 总耗时, 最长耗时]
+
+
+def _warn(message):
+    print(f"性能记录: {message}", file=sys.stderr)
+
+
+def configure(path=None):
+    """按参数或环境变量设置日志文件和采集方式，设置无效时警告并关闭对应功能"""
+    global _logger
+    path = path or os.environ.get('LADDER_PERF_LOG')
+    if path:
+        import logging
+        logger = logging.getLogger('筹码.性能')
+        try:
+            if not any(getattr(h, 'baseFilename', None) == os.path.abspath(path)
+                       for h in logger.handlers):
+                handler = logging.FileHandler(path, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+        except OSError as e:
+            _warn(f"无法打开日志文件，不写入性能日志（{e}）")
+        else:
+            _logger = logger
+    modes = os.environ.get('LADDER_PROFILE', '')
+    try:
+        set_profile_modes(mode.strip() for mode in modes.split(',') if mode.strip())
+    except ValueError as e:
+        _warn(f"LADDER_PROFILE无效，不采集性能数据（{e}）")
+        set_profile_modes([])
+
+
+def set_profile_modes(modes):
+    """设置采集方式（PROFILE_MODES中的若干项，空则关闭）"""
+    modes = set(modes)
+    unknown = modes - set(PROFILE_MODES)
+    if unknown:
+        raise ValueError(f"未知的采集方式: {', '.join(sorted(unknown))}")
+    _profile_modes.clear()
+    _profile_modes.update(modes)
+
+
+def profile_modes():
+    return set(_profile_modes)
+
+
+def write(record):
+    """写入一条记录，自动加上时间；未设置日志文件时忽略"""
+    if _logger is None:
+        return
+    record = dict(record, time=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    _logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+class Recorder:
+    """记录一次操作中各阶段的耗时
+
+    参数:
+        operation: 操作名称，如"计算并绘图"
+    """
+    def __init__(self, operation):
+        self.operation = operation
+        self.stages = []    # [(阶段, 秒)]，按发生顺序
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds in self.stages)
+
+    def summary(self):
+        """状态栏中显示的各阶段耗时，如"计算 0.012s · 绘制 0.300s\""""
+        return ' · '.join(f'{name} {seconds:.3f}s' for name, seconds in self.stages)
+
+    def finish(self, **fields):
+        """写入日志，fields为附加字段（如参数、行数）"""
+        write(dict(fields, operation=self.operation,
+                   stages={name: round(seconds, 6) for name, seconds in self.stages},
+                   total=round(self.total, 6)))
+
+
+def stage(recorder, name):
+    """recorder为None时不计时的recorder.stage(name)"""
+    if recorder is None:
+        return contextlib.nullcontext()
+    return recorder.stage(name)
+
+
+@contextlib.contextmanager
+def profiling(name):
+    """按当前的采集方式采集一段代码（只采集当前线程的cProfile）"""
+    modes = profile_modes()
+    if not modes:
+        yield
+        return
+
+    profiler = None
+    tracing = False
+    if 'cprofile' in modes:
+        import cProfile
+        profiler = cProfile.Profile()
+    if 'tracemalloc' in modes:
+        import tracemalloc
+        tracing = not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            directory = os.environ.get('LADDER_PROFILE_DIR', '.')
+            path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+            try:
+                profiler.dump_stats(path)
+            except OSError as e:
+                _warn(f"无法保存cProfile结果（{e}）")
+            else:
+                write({'operation': name, 'cprofile': path})
+        if 'tracemalloc' in modes:
+            import tracemalloc
+            peak = tracemalloc.get_traced_memory()[1]
+            top = tracemalloc.take_snapshot().statistics('lineno')[:TRACEMALLOC_TOP]
+            if tracing:
+                tracemalloc.stop()
+            write({'operation': name, 'tracemalloc_peak': peak,
+                   'tracemalloc_top': [str(stat) for stat in top]})
+
+
+def timed_handler(name):
+    """装饰高频事件处理函数：累计次数和耗时，过慢的单次事件单独记录"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                stats = _handler_stats.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+                if seconds > SLOW_EVENT:
+                    write({'operation': name, 'slow_event': round(seconds, 6)})
+        return wrapper
+    return decorator
+
+
+def flush_handler_stats():
+    """把累计的事件统计写入一条记录并清零"""
+    if not _handler_stats:
+        return
+    write({'operation': '交互事件',
+           'handlers': {name: {'count': count, 'total': round(total, 6), 'max': round(longest, 6)}
+                        for name, (count, total, longest) in _handler_stats.items()}})
+    _handler_stats.clear()
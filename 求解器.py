@@ -0,0 +1,453 @@
+"""加仓单位求解
+
+按"每次加仓多少单位，才能让强平线与现价保持设定的安全边际"计算可变筹码的加仓计划：
+加仓价位与计算引擎相同（上一步强平线向上取整 + 新入价-强平距I2），每一步按闭式解
+取满足 价位-强平线 >= 目标边际 的最少单位数，不逐个单位试算。
+
+第n步以价位p加c个单位后，强平线 = (累计金额 + c*p) / (累计单位 + c) * factor，
+要求 p - 强平线 >= D，整理得
+    c >= (factor*累计金额 - (p-D)*累计单位) / ((1-factor)*p - D)
+分母不为正时（p/杠杆倍数 <= D）加多少单位都达不到目标，计划在这一步结束。
+目标边际不超过1个单位时已有的距离，每步都是1个单位，结果与generate_data相同。
+
+反求参数（solve_leverage/solve_offset）：给定目标（加仓价位数、可承受跌幅或保证金），
+在区间内找满足目标的最大（或最小）杠杆倍数或新入价-强平距。每轮用参数扫描.sweep
+一次计算区间内的一组等分点，保留"满足/不满足"交界处的相邻两点继续细分，
+区间宽度到达容差即停止，几轮即可得到结果。
+"""
+import math
+import numpy as np
+import 筹码引擎
+import 参数扫描
+
+# 计划结束的原因
+STOP_ITERATIONS = 0   # 达到迭代次数
+STOP_INFEASIBLE = 1   # 价位过低，加多少单位都达不到目标边际
+STOP_BUDGET = 2       # 总单位数超出预算
+STOP_REASONS = {
+    STOP_ITERATIONS: '达到迭代次数',
+    STOP_INFEASIBLE: '无法达到目标边际',
+    STOP_BUDGET: '超出单位预算',
+}
+
+# 总单位数上限（指定的预算更大时也按该值）：浮点数能精确表示的最大整数，
+# 单位数在此范围内用整数累计、参与浮点运算时都没有舍入
+MAX_UNITS = 2.0 ** 53
+
+# 预分配的行数，不够时加倍，避免按很大的迭代次数一次性分配
+INITIAL_ROWS = 1024
+
+# 内核中表示缓冲区已填满、需要继续计算
+_BUFFER_FULL = -1
+
+# _size_step中表示本步可以加仓
+_SIZED = -1
+
+# 以下三个函数安装了numba时按依赖顺序即时编译（见_get_kernels）。
+
+
+def _size_step(i, B2, factor, I2, target, budget, total_chips, cumulative_sum, strong):
+    """第i步的加仓价位和单位数
+
+    total_chips（整数）、cumulative_sum、strong为第i-1步结束时的累计单位、累计金额和强平线，
+    budget不超过MAX_UNITS。返回(结束原因, 价位, 单位数)，可以加仓时结束原因为_SIZED。
+    """
+    if i == 1:
+        return _SIZED, B2, 1  # 第一步固定1个单位
+    price = math.ceil(strong) + I2
+    # 先看1个单位是否已满足目标
+    count = 1
+    if price - (cumulative_sum + price) / (total_chips + 1) * factor < target:
+        denominator = (1.0 - factor) * price - target
+        if denominator <= 0:
+            return STOP_INFEASIBLE, price, 0
+        # np.ceil保持浮点类型（numba中math.ceil返回int64，单位数很大时会溢出）
+        estimate = np.ceil((factor * cumulative_sum - (price - target) * total_chips)
+                           / denominator)
+        # 接近无解时单位数急剧增大，先检查预算再转为整数做舍入校正
+        if total_chips + estimate > budget:
+            return STOP_BUDGET, price, 0
+        if estimate > 1.0:
+            count = int(estimate)
+        # 浮点舍入可能差一个单位，按与计算结果相同的表达式向上、向下校正
+        while (price - (cumulative_sum + count * price) / (total_chips + count) * factor
+               < target):
+            count += 1
+        while (count > 1 and price - (cumulative_sum + (count - 1) * price)
+               / (total_chips + count - 1) * factor >= target):
+            count -= 1
+    if total_chips + count > budget:
+        return STOP_BUDGET, price, 0
+    return _SIZED, price, count
+
+
+def _fill_sizing(B2, factor, I2, target, budget, start, total_chips, cumulative_sum, strong,
+                 prices, chips, averages, strongs):
+    """从第start+1步开始逐步计算加仓单位，填充预分配的数组
+
+    total_chips、cumulative_sum、strong为第start步结束时的状态（见_size_step）。
+    返回(本次填充的行数, 结束原因, 累计单位, 累计金额, 强平线)；
+    缓冲区填满时结束原因为_BUFFER_FULL，可用返回的状态继续计算。
+    """
+    for j in range(len(prices)):
+        stop, price, count = _size_step(start + j + 1, B2, factor, I2, target, budget,
+                                        total_chips, cumulative_sum, strong)
+        if stop != _SIZED:
+            return j, stop, total_chips, cumulative_sum, strong
+
+        total_chips += count
+        cumulative_sum += count * price
+        average = cumulative_sum / total_chips
+        strong = average * factor
+
+        prices[j] = price
+        chips[j] = count
+        averages[j] = average
+        strongs[j] = strong
+    return len(prices), _BUFFER_FULL, total_chips, cumulative_sum, strong
+
+
+def _sweep_sizing(B2, factors, I2, targets, budgets, J2, steps, total_chips, last_chips,
+                  final_prices, final_averages, final_strongs, stops):
+    """所有场景一起按步推进，每一步只处理尚未结束的场景
+
+    输入为长度相同的一维数组，每个场景的状态（累计单位、累计金额、强平线）各占数组的一项；
+    汇总结果写入steps及之后的数组。浮点表达式与_fill_sizing相同，结果与chip_schedule一致。
+    """
+    cumulative_sums = np.zeros(len(B2))
+    strong_lines = np.zeros(len(B2))
+    active = np.arange(len(B2))    # 尚未结束的场景，前running项有效
+    running = len(B2)
+    i = 0
+    while running and i < J2:
+        i += 1
+        kept = 0
+        for a in range(running):
+            k = active[a]
+            stop, price, count = _size_step(i, B2[k], factors[k], I2[k], targets[k], budgets[k],
+                                            total_chips[k], cumulative_sums[k], strong_lines[k])
+            if stop != _SIZED:
+                stops[k] = stop
+                continue
+            total_chips[k] += count
+            cumulative_sums[k] += count * price
+            average = cumulative_sums[k] / total_chips[k]
+            strong_lines[k] = average * factors[k]
+
+            steps[k] = i
+            last_chips[k] = count
+            final_prices[k] = price
+            final_averages[k] = average
+            final_strongs[k] = strong_lines[k]
+            active[kept] = k
+            kept += 1
+        running = kept
+
+
+# 核心函数，首次调用时决定使用numba编译版本还是纯Python版本
+_kernel = None
+_sweep_kernel = None
+
+
+def _get_kernels():
+    """返回(chip_schedule的内核, sizing_sweep的内核)"""
+    global _kernel, _sweep_kernel, _size_step
+    if _kernel is None:
+        try:
+            from numba import njit
+        except ImportError:
+            _kernel, _sweep_kernel = _fill_sizing, _sweep_sizing
+        else:
+            # 被调用的函数先编译并替换模块中的名称，调用方编译时才能引用编译版本
+            jit = njit(cache=True, nogil=True)
+            _size_step = jit(_size_step)
+            _kernel, _sweep_kernel = jit(_fill_sizing), jit(_sweep_sizing)
+    return _kernel, _sweep_kernel
+
+
+def _factor(H2):
+    return 1 - 1 / max(1, H2)  # 避免除零错误（杠杆倍数至少为1）
+
+
+def _check(target, budget):
+    if not target > 0:
+        raise ValueError("目标边际必须大于0")
+    if budget is not None and budget < 1:
+        raise ValueError("单位预算至少为1")
+
+
+def chip_schedule(B2, H2, I2, target, J2, budget=None):
+    """计算可变筹码的加仓计划
+
+    参数:
+        B2: 初始价位
+        H2: 杠杆倍数
+        I2: 新入价-强平距（决定下一次加仓的价位）
+        target: 目标边际，每次加仓后 新入价-强平 不小于该值
+        J2: 最多加仓次数
+        budget: 总单位数上限，None或超过MAX_UNITS时为MAX_UNITS
+
+    返回:
+        (LadderResult, 结束原因)，结束原因为STOP_*之一，筹码列为每步的单位数
+    """
+    _check(target, budget)
+    J2 = max(0, int(J2))
+    kernel, _ = _get_kernels()
+    factor = _factor(H2)
+    limit = min(float(budget), MAX_UNITS) if budget is not None else MAX_UNITS
+    size = min(J2, INITIAL_ROWS)
+    prices = np.empty(size)
+    chips = np.empty(size, dtype=np.int64)
+    averages = np.empty(size)
+    strongs = np.empty(size)
+    n = 0
+    state = (0, 0.0, 0.0)
+    stop = STOP_ITERATIONS
+    while n < J2:
+        if n == len(prices):
+            # 缓冲区已满，加倍后继续
+            size = min(J2, 2 * len(prices))
+            prices, chips, averages, strongs = (np.resize(column, size) for column in
+                                                (prices, chips, averages, strongs))
+        filled, stop, *state = kernel(float(B2), factor, float(I2), float(target), limit, n,
+                                      *state,
+                                      prices[n:], chips[n:], averages[n:], strongs[n:])
+        n += filled
+        if stop != _BUFFER_FULL:
+            break
+    if stop == _BUFFER_FULL:
+        stop = STOP_ITERATIONS
+
+    steps = np.arange(1, n + 1, dtype=np.int64)
+    prices, averages, strongs = prices[:n], averages[:n], strongs[:n]
+    result = 筹码引擎.LadderResult(steps, prices, chips[:n], averages, strongs,
+                                   prices - strongs)
+    return result, stop
+
+
+class SizingSummary:
+    """批量求解结果，每个属性都是与输入参数广播后形状相同的数组
+
+        steps          加仓次数 (int64)
+        total_chips    总单位数 (int64)
+        last_chips     最后一次加仓的单位数 (int64)
+        final_prices   最后一次加仓的价位 (float64)
+        final_averages 最终均价 (float64)
+        final_strongs  最终强平线 (float64)
+        stops          结束原因，STOP_*之一 (int8)
+    """
+    def __init__(self, steps, total_chips, last_chips, final_prices, final_averages,
+                 final_strongs, stops):
+        self.steps = steps
+        self.total_chips = total_chips
+        self.last_chips = last_chips
+        self.final_prices = final_prices
+        self.final_averages = final_averages
+        self.final_strongs = final_strongs
+        self.stops = stops
+
+    def __len__(self):
+        return self.steps.size
+
+    @property
+    def shape(self):
+        return self.steps.shape
+
+
+def sizing_sweep(B2, H2, I2, targets, J2, budget=None):
+    """对多组参数（通常是多个目标边际）批量求解，只保留每组的汇总
+
+    B2、H2、I2、targets、budget按NumPy规则广播（budget为None或超过MAX_UNITS时为MAX_UNITS）；
+    所有场景在同一轮按步推进，每个场景只保存当前状态，内存与迭代次数无关。
+    每个场景的每一步仍要按闭式解计算一次，耗时与 场景数×步数 成正比
+    （100个目标、10^6步约2.7s，与逐个调用chip_schedule的计算量相同，但不保存逐行结果）。
+
+    返回:
+        SizingSummary
+    """
+    J2 = max(0, int(J2))
+    budget = MAX_UNITS if budget is None else np.minimum(budget, MAX_UNITS)
+    columns = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (B2, H2, I2, targets, budget)))
+    shape = columns[0].shape
+    B2, H2, I2, targets, budget = (column.flatten() for column in columns)
+    if not (targets > 0).all():
+        raise ValueError("目标边际必须大于0")
+    if not (budget >= 1).all():
+        raise ValueError("单位预算至少为1")
+    count = B2.size
+    steps = np.zeros(count, dtype=np.int64)
+    total_chips = np.zeros(count, dtype=np.int64)
+    last_chips = np.zeros(count, dtype=np.int64)
+    final_prices = np.full(count, np.nan)
+    final_averages = np.full(count, np.nan)
+    final_strongs = np.full(count, np.nan)
+    stops = np.zeros(count, dtype=np.int8)
+
+    factors = 1 - 1 / np.maximum(1, H2)  # 与_factor相同
+    _, kernel = _get_kernels()
+    kernel(B2, factors, I2, targets, budget, J2, steps, total_chips, last_chips,
+           final_prices, final_averages, final_strongs, stops)
+    return SizingSummary(*(column.reshape(shape) for column in
+                           (steps, total_chips, last_chips, final_prices, final_averages,
+                            final_strongs, stops)))
+
+
+# 反求参数的目标
+GOAL_DEPTH = 'depth'         # 不同加仓价位的个数，不少于目标
+GOAL_DRAWDOWN = 'drawdown'   # 可承受的跌幅（相对初始价位的比例），不小于目标
+GOAL_MARGIN = 'margin'       # 全部加仓成交后的保证金（持仓金额/杠杆倍数），不超过目标
+
+# 每轮计算的等分点个数
+SEEK_POINTS = 16
+
+# 默认容差：相对初始区间宽度
+SEEK_TOLERANCE = 1e-6
+
+# 最多细分轮数
+SEEK_MAX_ROUNDS = 20
+
+# 未指定区间时杠杆倍数的搜索范围
+LEVERAGE_BOUNDS = (1.0, 100.0)
+
+
+def _depth(result, B2, H2, I2, J2):
+    return result.levels
+
+
+def _drawdown(result, B2, H2, I2, J2):
+    """价格从初始价位一路下跌、J2步全部成交后，到达强平线前可承受的最大跌幅"""
+    factor = 1 - 1 / np.maximum(1.0, H2)
+    # 第二个价位高于初始价位时阶梯向上，下跌时只有第一步成交
+    ascending = np.ceil(B2 * factor) + I2 > B2
+    return np.where(ascending, 1 - factor, 1 - result.final_strongs / B2)
+
+
+def _margin(result, B2, H2, I2, J2):
+    return result.final_averages * J2 / np.maximum(1.0, H2)
+
+
+# 目标 -> (名称, 指标函数, 是否为下限)
+GOALS = {
+    GOAL_DEPTH: ('加仓价位数', _depth, True),
+    GOAL_DRAWDOWN: ('可承受跌幅', _drawdown, True),
+    GOAL_MARGIN: ('保证金', _margin, False),
+}
+
+
+def evaluate_goal(goal, B2, H2, I2, J2):
+    """计算各组参数的目标指标，参数按NumPy规则广播"""
+    if goal not in GOALS:
+        raise ValueError(f"未知的目标: {goal}")
+    result = 参数扫描.sweep(B2, H2, I2, J2)
+    return GOALS[goal][1](result, B2, H2, I2, J2)
+
+
+def goal_met(goal, metrics, target):
+    """指标是否满足目标：下限型目标不小于target，上限型不超过target"""
+    return metrics >= target if GOALS[goal][2] else metrics <= target
+
+
+class GoalResult:
+    """反求参数的结果
+
+        value        满足目标的参数值；无解时为指标最接近目标的等分点
+        metric       value处的指标值
+        satisfied    是否找到满足目标的参数
+        bracket      最后的(满足, 不满足)相邻两点；区间端点即满足时两点相同
+        rounds       调用参数扫描的轮数
+        evaluations  计算的参数组数
+    """
+    def __init__(self, value, metric, satisfied, bracket, rounds, evaluations):
+        self.value = value
+        self.metric = metric
+        self.satisfied = satisfied
+        self.bracket = bracket
+        self.rounds = rounds
+        self.evaluations = evaluations
+
+
+def _seek(evaluate, goal, target, lo, hi, maximize, tolerance, points):
+    """在[lo, hi]内找满足目标的最大（maximize为False时最小）参数值
+
+    evaluate(values)返回各参数值的指标数组。指标不必单调：先在整个区间上找到
+    最靠近搜索方向一端的满足点，再只在它和下一个不满足点之间细分，
+    返回的值总是实际计算过且满足目标的点。
+    """
+    if goal not in GOALS:
+        raise ValueError(f"未知的目标: {goal}")
+    if not lo < hi:
+        raise ValueError("搜索区间下限必须小于上限")
+    if points < 2:
+        raise ValueError("等分点至少为2个")
+    at_least = GOALS[goal][2]
+    if tolerance is None:
+        tolerance = (hi - lo) * SEEK_TOLERANCE
+
+    # 按搜索方向排列：从不想要的一端到想要的一端，取最后一个满足点
+    start, end = (lo, hi) if maximize else (hi, lo)
+    grid = np.linspace(start, end, points)
+    metrics = evaluate(grid)
+    rounds, evaluations = 1, len(grid)
+    ok = goal_met(goal, metrics, target)
+    if not ok.any():
+        best = int(np.argmax(metrics) if at_least else np.argmin(metrics))
+        return GoalResult(float(grid[best]), metrics[best].item(), False, None,
+                          rounds, evaluations)
+    last = int(np.flatnonzero(ok)[-1])
+    good, good_metric = float(grid[last]), metrics[last].item()
+    if last == len(grid) - 1:
+        return GoalResult(good, good_metric, True, (good, good), rounds, evaluations)
+    bad = float(grid[last + 1])
+
+    while abs(bad - good) > tolerance and rounds < SEEK_MAX_ROUNDS:
+        inner = np.linspace(good, bad, points + 2)[1:-1]
+        metrics = evaluate(inner)
+        rounds += 1
+        evaluations += len(inner)
+        ok = goal_met(goal, metrics, target)
+        hits = np.flatnonzero(ok)
+        if len(hits):
+            last = int(hits[-1])
+            good, good_metric = float(inner[last]), metrics[last].item()
+            if last + 1 < len(inner):
+                bad = float(inner[last + 1])
+        else:
+            bad = float(inner[0])
+    return GoalResult(good, good_metric, True, (good, bad), rounds, evaluations)
+
+
+def solve_leverage(B2, I2, J2, goal, target, bounds=None, maximize=True, tolerance=None,
+                   points=SEEK_POINTS):
+    """反求满足目标的杠杆倍数
+
+    参数:
+        B2, I2, J2: 初始价位、新入价-强平距、迭代次数
+        goal: GOAL_*之一；target: 目标值
+        bounds: (下限, 上限)，默认为LEVERAGE_BOUNDS
+        maximize: True时取满足目标的最大杠杆倍数，False时取最小
+        tolerance: 结果的绝对容差，默认为区间宽度乘以SEEK_TOLERANCE
+        points: 每轮计算的等分点个数
+
+    返回:
+        GoalResult
+    """
+    lo, hi = bounds or LEVERAGE_BOUNDS
+    if lo < 1:
+        raise ValueError("杠杆倍数至少为1")
+
+    def evaluate(values):
+        return evaluate_goal(goal, B2, values, I2, J2)
+
+    return _seek(evaluate, goal, target, lo, hi, maximize, tolerance, points)
+
+
+def solve_offset(B2, H2, J2, goal, target, bounds=None, maximize=True, tolerance=None,
+                 points=SEEK_POINTS):
+    """反求满足目标的新入价-强平距，bounds默认为(0, B2)，其他参数同solve_leverage"""
+    lo, hi = bounds or (0.0, B2)
+
+    def evaluate(values):
+        return evaluate_goal(goal, B2, H2, values, J2)
+
+    return _seek(evaluate, goal, target, lo, hi, maximize, tolerance, points)
@@ -1,760 +1,1360 @@
-import math
-import sys
-import numpy as np
-from collections import defaultdict
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QLabel, QLineEdit, QPushButton, QScrollArea, QTableWidget, 
-                             QTableWidgetItem, QHeaderView, QAbstractItemView, QMessageBox,
-                             QSizePolicy, QToolButton)
-from PyQt5.QtGui import QDoubleValidator, QIntValidator, QFont, QPalette, QColor, QIcon
-from PyQt5.QtCore import Qt, QSize, QPoint
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
-
-class NumericInput(QWidget):
-    def __init__(self, label, default="0", validator=None):
-        super().__init__()
-        layout = QHBoxLayout()
-        self.setLayout(layout)
-        
-        self.label = QLabel(label)
-        self.label.setFont(QFont("Arial", 10))
-        self.input = QLineEdit(default)
-        self.input.setFont(QFont("Arial", 10))
-        self.input.setFixedWidth(150)
-        if validator:
-            self.input.setValidator(validator)
-        
-        layout.addWidget(self.label)
-        layout.addWidget(self.input)
-        layout.setContentsMargins(0, 0, 0, 0)
-
-    def get_value(self):
-        try:
-            if '.' in self.input.text():
-                return float(self.input.text())
-            return int(self.input.text())
-        except ValueError:
-            return 0
-            
-    def clear(self):
-        self.input.clear()
-
-class ResultsWindow(QMainWindow):
-    def __init__(self, data):
-        super().__init__()
-        self.setWindowTitle("计算结果列表")
-        self.setGeometry(300, 200, 900, 600)
-        
-        # 应用简约风格配色
-        palette = QPalette()
-        palette.setColor(QPalette.Window, QColor(250, 250, 250))
-        palette.setColor(QPalette.Base, QColor(255, 255, 255))
-        palette.setColor(QPalette.Button, QColor(240, 240, 240))
-        palette.setColor(QPalette.Highlight, QColor(100, 150, 255))
-        self.setPalette(palette)
-        
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        layout = QVBoxLayout(central_widget)
-        
-        title = QLabel("计算结果列表")
-        title.setFont(QFont("Arial", 14, QFont.Bold))
-        title.setStyleSheet("color: #333333;")
-        title.setAlignment(Qt.AlignCenter)
-        layout.addWidget(title)
-        
-        # 添加滚动区域
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        
-        # 创建表格小部件
-        table = QTableWidget()
-        table.setRowCount(len(data) - 1)
-        table.setColumnCount(len(data[0]))
-        table.setHorizontalHeaderLabels(data[0])
-        
-        # 填充表格数据
-        for row in range(1, len(data)):
-            for col in range(len(data[0])):
-                item = QTableWidgetItem(str(data[row][col]))
-                item.setTextAlignment(Qt.AlignCenter)
-                table.setItem(row-1, col, item)
-        
-        # 表格样式设置
-        table.setFont(QFont("Arial", 10))
-        table.setStyleSheet("""
-            QTableWidget {
-                gridline-color: #e0e0e0;
-                background-color: #ffffff;
-            }
-            QHeaderView::section {
-                background-color: #f0f0f0;
-                padding: 6px;
-                border: 1px solid #e0e0e0;
-            }
-        """)
-        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        table.verticalHeader().setVisible(False)
-        table.setAlternatingRowColors(True)
-        
-        # 设置滚动区域的小部件
-        scroll_area.setWidget(table)
-        layout.addWidget(scroll_area)
-        
-        # 添加筹码信息标签
-        chips_label = QLabel(f"筹码单位数: {data[-1][0]}")
-        chips_label.setFont(QFont("Arial", 11, QFont.Bold))
-        chips_label.setStyleSheet("color: #333333; padding: 10px;")
-        chips_label.setAlignment(Qt.AlignCenter)
-        layout.addWidget(chips_label)
-
-class CustomCanvas(FigureCanvas):
-    """自定义画布类，支持拖拽功能"""
-    def __init__(self, figure):
-        super().__init__(figure)
-        # 拖拽相关变量
-        self.dragging = False
-        self.last_pos = QPoint()
-        self.setCursor(Qt.ArrowCursor)  # 默认箭头光标
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.dragging = True
-            self.last_pos = event.pos()
-            self.setCursor(Qt.ClosedHandCursor)  # 拖拽时显示抓手光标
-        super().mousePressEvent(event)
-
-    def mouseMoveEvent(self, event):
-        if self.dragging:
-            # 计算移动距离
-            dx = event.pos().x() - self.last_pos.x()
-            dy = event.pos().y() - self.last_pos.y()
-            self.last_pos = event.pos()
-            
-            # 移动图表
-            ax = self.figure.axes[0]
-            xlim = ax.get_xlim()
-            ylim = ax.get_ylim()
-            
-            # 计算新的坐标范围
-            scale_x = (xlim[1] - xlim[0]) / self.width()
-            scale_y = (ylim[1] - ylim[0]) / self.height()
-            
-            new_xmin = xlim[0] - dx * scale_x
-            new_xmax = xlim[1] - dx * scale_x
-            new_ymin = ylim[0] + dy * scale_y
-            new_ymax = ylim[1] + dy * scale_y
-            
-            # 设置新范围
-            ax.set_xlim(new_xmin, new_xmax)
-            ax.set_ylim(new_ymin, new_ymax)
-            self.draw_idle()
-        super().mouseMoveEvent(event)
-
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton and self.dragging:
-            self.dragging = False
-            self.setCursor(Qt.OpenHandCursor)  # 释放后显示打开的手形光标
-        super().mouseReleaseEvent(event)
-
-class MainWindow(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("杠杆筹码计算器")
-        self.setGeometry(200, 100, 900, 700)
-        
-        # 应用简约风格配色
-        palette = QPalette()
-        palette.setColor(QPalette.Window, QColor(245, 248, 250))
-        palette.setColor(QPalette.Button, QColor(230, 240, 250))
-        palette.setColor(QPalette.Highlight, QColor(100, 150, 255))
-        palette.setColor(QPalette.Text, QColor(50, 50, 50))
-        self.setPalette(palette)
-        
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        main_layout = QVBoxLayout(central_widget)
-        
-        # 添加标题
-        title = QLabel("左侧杠杆筹码单位计算")
-        title.setFont(QFont("Arial", 18, QFont.Bold))
-        title.setStyleSheet("color: #333366; padding: 10px;")
-        title.setAlignment(Qt.AlignCenter)
-        main_layout.addWidget(title)
-        
-        # 输入区域
-        input_layout = QHBoxLayout()
-        
-        # 左侧输入控件
-        left_input = QWidget()
-        left_layout = QVBoxLayout(left_input)
-        
-        self.b2_input = NumericInput("初始价位(B2): ", "100", QDoubleValidator(0, 1000000, 2))
-        self.h2_input = NumericInput("杠杆倍数(G2): ", "10", QDoubleValidator(0.1, 1000, 2))
-        
-        left_layout.addWidget(self.b2_input)
-        left_layout.addWidget(self.h2_input)
-        
-        # 右侧输入控件
-        right_input = QWidget()
-        right_layout = QVBoxLayout(right_input)
-        
-        self.i2_input = NumericInput("新入价-强平距(I2): ", "10", QDoubleValidator(0.1, 100000, 2))
-        self.j2_input = NumericInput("迭代次数(J2): ", "50", QIntValidator(1, 100000))
-        
-        right_layout.addWidget(self.i2_input)
-        right_layout.addWidget(self.j2_input)
-        
-        input_layout.addWidget(left_input)
-        input_layout.addWidget(right_input)
-        main_layout.addLayout(input_layout)
-        
-        # 按钮区域
-        button_layout = QHBoxLayout()
-        
-        # 计算按钮
-        calc_btn = QPushButton("计算并绘图")
-        calc_btn.setFont(QFont("Arial", 11))
-        calc_btn.setFixedHeight(40)
-        calc_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3366ff; 
-                color: white; 
-                border-radius: 5px;
-                padding: 8px;
-            }
-            QPushButton:hover {
-                background-color: #2255dd;
-            }
-        """)
-        calc_btn.clicked.connect(self.calculate_and_plot)
-        
-        # 清除按钮 
-        clear_btn = QPushButton("清除所有输入")
-        clear_btn.setFont(QFont("Arial", 11))
-        clear_btn.setFixedHeight(40)
-        clear_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #ff6633; 
-                color: white; 
-                border-radius: 5px;
-                padding: 8px;
-            }
-            QPushButton:hover {
-                background-color: #dd5522;
-            }
-        """)
-        clear_btn.clicked.connect(self.clear_all_inputs)
-        
-        button_layout.addWidget(calc_btn)
-        button_layout.addWidget(clear_btn)
-        main_layout.addLayout(button_layout)
-        
-        # 结果区域
-        self.result_widget = QWidget()
-        self.result_layout = QVBoxLayout(self.result_widget)
-        self.result_layout.setContentsMargins(5, 10, 5, 5)
-        self.result_widget.setVisible(False)
-        
-        # 添加查看结果列表的按钮
-        self.view_list_btn = QPushButton("查看完整结果列表")
-        self.view_list_btn.setFont(QFont("Arial", 10))
-        self.view_list_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #44aaff; 
-                color: white; 
-                border-radius: 4px;
-                padding: 6px;
-            }
-            QPushButton:hover {
-                background-color: #3399ee;
-            }
-        """)
-        self.view_list_btn.setFixedHeight(35)
-        self.view_list_btn.setVisible(False)
-        self.result_layout.addWidget(self.view_list_btn)
-        
-        # 创建图表占位区域
-        self.figure = Figure()
-        self.canvas = CustomCanvas(self.figure)  # 使用自定义画布类
-        self.canvas.setMinimumHeight(450)
-        self.result_layout.addWidget(self.canvas)
-        
-        # 添加图表控制按钮区域
-        self.chart_controls = QWidget()
-        self.chart_controls_layout = QHBoxLayout(self.chart_controls)
-        self.chart_controls_layout.setAlignment(Qt.AlignCenter)
-        self.chart_controls_layout.setSpacing(10)  # 设置按钮间距
-        
-        # 放大按钮 - 添加加号图标
-        self.zoom_in_btn = QToolButton()
-        self.zoom_in_btn.setIcon(QIcon.fromTheme("zoom-in"))
-        self.zoom_in_btn.setText("+")  # 添加加号文本
-        self.zoom_in_btn.setToolTip("放大图表")
-        self.zoom_in_btn.setStyleSheet("""
-            QToolButton {
-                background-color: #f0f0f0;
-                border: 1px solid #d0d0d0;
-                border-radius: 4px;
-                padding: 5px;
-                font-weight: bold;
-                font-size: 16px;
-            }
-            QToolButton:hover {
-                background-color: #e0e0e0;
-            }
-            QToolButton:pressed {
-                background-color: #d0d0d0;
-            }
-        """)
-        self.zoom_in_btn.setFixedSize(36, 36)
-        self.zoom_in_btn.clicked.connect(self.zoom_in)
-        
-        # 缩小按钮 - 添加减号图标
-        self.zoom_out_btn = QToolButton()
-        self.zoom_out_btn.setIcon(QIcon.fromTheme("zoom-out"))
-        self.zoom_out_btn.setText("-")  # 添加减号文本
-        self.zoom_out_btn.setToolTip("缩小图表")
-        self.zoom_out_btn.setStyleSheet("""
-            QToolButton {
-                background-color: #f0f0f0;
-                border: 1px solid #d0d0d0;
-                border-radius: 4px;
-                padding: 5px;
-                font-weight: bold;
-                font-size: 16px;
-            }
-            QToolButton:hover {
-                background-color: #e0e0e0;
-            }
-            QToolButton:pressed {
-                background-color: #d0d0d0;
-            }
-        """)
-        self.zoom_out_btn.setFixedSize(36, 36)
-        self.zoom_out_btn.clicked.connect(self.zoom_out)
-        
-        # 拖拽按钮 - 添加小手图标
-        self.drag_btn = QToolButton()
-        self.drag_btn.setIcon(QIcon.fromTheme("transform-move"))
-        self.drag_btn.setText("✋")  # 添加手形符号
-        self.drag_btn.setToolTip("拖拽图表")
-        self.drag_btn.setStyleSheet("""
-            QToolButton {
-                background-color: #f0f0f0;
-                border: 1px solid #d0d0d0;
-                border-radius: 4px;
-                padding: 5px;
-                font-size: 14px;
-            }
-            QToolButton:hover {
-                background-color: #e0e0e0;
-            }
-            QToolButton:pressed {
-                background-color: #d0d0d0;
-            }
-        """)
-        self.drag_btn.setFixedSize(36, 36)
-        self.drag_btn.clicked.connect(self.toggle_drag_mode)
-        
-        # 新增：恢复光标按钮 - 添加箭头图标
-        self.default_cursor_btn = QToolButton()
-        self.default_cursor_btn.setIcon(QIcon.fromTheme("go-home"))
-        self.default_cursor_btn.setText("➜")  # 添加箭头符号
-        self.default_cursor_btn.setToolTip("恢复默认光标")
-        self.default_cursor_btn.setStyleSheet("""
-            QToolButton {
-                background-color: #f0f0f0;
-                border: 1px solid #d0d0d0;
-                border-radius: 4px;
-                padding: 5px;
-                font-size: 14px;
-            }
-            QToolButton:hover {
-                background-color: #e0e0e0;
-            }
-            QToolButton:pressed {
-                background-color: #d0d0d0;
-            }
-        """)
-        self.default_cursor_btn.setFixedSize(36, 36)
-        self.default_cursor_btn.clicked.connect(self.restore_default_cursor)
-        
-        # 添加按钮到布局
-        self.chart_controls_layout.addWidget(self.zoom_in_btn)
-        self.chart_controls_layout.addWidget(self.zoom_out_btn)
-        self.chart_controls_layout.addWidget(self.drag_btn)
-        self.chart_controls_layout.addWidget(self.default_cursor_btn)  # 添加恢复光标按钮
-        
-        self.result_layout.addWidget(self.chart_controls)
-        
-        # 初始化坐标提示变量
-        self.coord_label = QLabel("坐标: ")
-        self.coord_label.setFont(QFont("Arial", 9))
-        self.coord_label.setStyleSheet("color: #666666;")
-        self.coord_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.result_layout.addWidget(self.coord_label)
-        
-        main_layout.addWidget(self.result_widget)
-        
-        # 状态栏
-        self.statusBar().showMessage("准备就绪")
-        
-        # 图表交互相关变量
-        self.current_point_annotation = None
-        self.line_points = []
-        self.ax = None
-        self.original_xlim = None
-        self.original_ylim = None
-        self.drag_mode = False  # 拖拽模式状态
-    
-    # 新增：恢复默认光标功能
-    def restore_default_cursor(self):
-        """恢复默认光标"""
-        self.canvas.setCursor(Qt.ArrowCursor)
-        self.drag_mode = False
-        self.drag_btn.setStyleSheet("""
-            QToolButton {
-                background-color: #f0f0f0;
-                border: 1px solid #d0d0d0;
-                border-radius: 4px;
-                padding: 5px;
-                font-size: 14px;
-            }
-        """)
-        self.statusBar().showMessage("已恢复默认光标")
-    
-    # 切换拖拽模式
-    def toggle_drag_mode(self):
-        """切换拖拽模式状态"""
-        self.drag_mode = not self.drag_mode
-        
-        # 更新按钮状态
-        if self.drag_mode:
-            self.drag_btn.setStyleSheet("""
-                QToolButton {
-                    background-color: #d0d0ff;
-                    border: 1px solid #a0a0ff;
-                    border-radius: 4px;
-                    padding: 5px;
-                    font-size: 14px;
-                }
-            """)
-            self.canvas.setCursor(Qt.OpenHandCursor)  # 设置打开的手形光标
-            self.statusBar().showMessage("拖拽模式已启用 - 按住鼠标左键拖动图表")
-        else:
-            self.drag_btn.setStyleSheet("""
-                QToolButton {
-                    background-color: #f0f0f0;
-                    border: 1px solid #d0d0d0;
-                    border-radius: 4px;
-                    padding: 5px;
-                    font-size: 14px;
-                }
-            """)
-            self.canvas.setCursor(Qt.ArrowCursor)  # 恢复默认箭头光标
-            self.statusBar().showMessage("拖拽模式已禁用")
-    
-    # 放大功能
-    def zoom_in(self):
-        """放大图表视图"""
-        if self.ax:
-            # 获取当前坐标轴范围
-            xlim = self.ax.get_xlim()
-            ylim = self.ax.get_ylim()
-            
-            # 计算新的范围（中心点不变，范围缩小）
-            x_center = (xlim[0] + xlim[1]) / 2
-            y_center = (ylim[0] + ylim[1]) / 2
-            x_range = (xlim[1] - xlim[0]) * 0.7  # 缩小30%
-            y_range = (ylim[1] - ylim[0]) * 0.7
-            
-            # 设置新的坐标轴范围
-            self.ax.set_xlim(x_center - x_range/2, x_center + x_range/2)
-            self.ax.set_ylim(y_center - y_range/2, y_center + y_range/2)
-            
-            # 重绘图表
-            self.canvas.draw()
-            self.statusBar().showMessage("图表已放大")
-    
-    # 缩小功能
-    def zoom_out(self):
-        """缩小图表视图"""
-        if self.ax:
-            # 获取当前坐标轴范围
-            xlim = self.ax.get_xlim()
-            ylim = self.ax.get_ylim()
-            
-            # 计算新的范围（中心点不变，范围扩大）
-            x_center = (xlim[0] + xlim[1]) / 2
-            y_center = (ylim[0] + ylim[1]) / 2
-            x_range = (xlim[1] - xlim[0]) * 1.3  # 扩大30%
-            y_range = (ylim[1] - ylim[0]) * 1.3
-            
-            # 设置新的坐标轴范围，但不超过原始范围
-            new_xmin = max(self.original_xlim[0], x_center - x_range/2)
-            new_xmax = min(self.original_xlim[1], x_center + x_range/2)
-            new_ymin = max(self.original_ylim[0], y_center - y_range/2)
-            new_ymax = min(self.original_ylim[1], y_center + y_range/2)
-            
-            self.ax.set_xlim(new_xmin, new_xmax)
-            self.ax.set_ylim(new_ymin, new_ymax)
-            
-            # 重绘图表
-            self.canvas.draw()
-            self.statusBar().showMessage("图表已缩小")
-    
-    # 清除所有输入功能 
-    def clear_all_inputs(self):
-        """清除所有输入框的内容并重置界面"""
-        # 清除所有输入框
-        self.b2_input.clear()
-        self.h2_input.clear()
-        self.i2_input.clear()
-        self.j2_input.clear()
-        
-        # 隐藏结果区域
-        self.result_widget.setVisible(False)
-        self.view_list_btn.setVisible(False)
-        
-        # 清空图表
-        self.figure.clear()
-        self.canvas.draw()
-        self.coord_label.setText("坐标: ")
-        
-        # 重置状态栏
-        self.statusBar().showMessage("所有输入已清除")
-        
-        # 重置交互变量
-        self.current_point_annotation = None
-        self.line_points = []
-        self.ax = None
-        self.original_xlim = None
-        self.original_ylim = None
-        self.drag_mode = False
-        self.drag_btn.setStyleSheet("""
-            QToolButton {
-                background-color: #f0f0f0;
-                border: 1px solid #d0d0d0;
-                border-radius: 4px;
-                padding: 5px;
-                font-size: 14px;
-            }
-        """)
-        self.canvas.setCursor(Qt.ArrowCursor)  # 恢复默认光标
-
-    def generate_data(self):
-        # 获取输入值
-        B2 = self.b2_input.get_value()
-        H2 = self.h2_input.get_value()
-        I2 = self.i2_input.get_value()
-        J2 = self.j2_input.get_value()
-
-        # 初始化数据结构
-        data_rows = [['序号', '价位', '筹码', '均价', '强平线', '新入价-强平']]
-        prev_strong = None  # 记录上一行的强平线值
-        cumulative_sum = 0   # 累计求和
-
-        for i in range(1, J2 + 1):
-            # 计算当前行价格
-            if i == 1:
-                price = B2
-            else:
-                # 确保prev_strong有值
-                if prev_strong is None:
-                    prev_strong = data_rows[-1][4]  # 从上一行获取强平线值
-                price = math.ceil(prev_strong) + I2  # 上行强平线向上取整
-            
-            chips = 1  # 筹码固定为1
-            cumulative_sum += price
-            average = cumulative_sum / i  # 计算累加均价
-            
-            # 避免除零错误（杠杆倍数至少为1）
-            lever = max(1.0, H2)
-            strong = average * (1 - 1/lever)  # 强平线计算
-            distance = price - strong  # 新价距离基本点
-            
-            # 更新为下轮准备的变量
-            prev_strong = strong
-            
-            # 添加到结果列表
-            row = [i, price, chips, average, strong, distance]
-            data_rows.append(row)
-            
-        return data_rows
-
-    def transfer(self, data):
-        # 使用字典统计每个价位出现的频次（转换为整数）
-        frequency_dict = defaultdict(int)
-        for row in data[1:]:  # 跳过标题行
-            price = row[1]    # 获取价位值
-            int_price = int(price)  # 将浮点数转换为整数
-            frequency_dict[int_price] += 1
-
-        # 转换为要求的列表格式，并按价格降序排序
-        result = [[price, count] for price, count in frequency_dict.items()]
-        result.sort(key=lambda x: x[0], reverse=True)  # 按价格从高到低排序
-        return result
-
-    def plot_chip_distribution(self, data_list):
-        """直接使用列表数据绘制筹码分布图
-        
-        参数:
-            data_list (list): 格式为[[价位, 筹码], ...]的二维列表
-        """
-        if not data_list:
-            QMessageBox.warning(self, "错误", "数据列表为空")
-            return
-        
-        # 按价位排序
-        data_list.sort(key=lambda x: x[0])
-        prices = np.array([p[0] for p in data_list])
-        counts = np.array([p[1] for p in data_list])
-        
-        # 创建图表
-        self.figure.clear()
-        self.ax = self.figure.add_subplot(111)
-        
-        # 柱状图
-        bars = self.ax.bar(prices, counts, width=0.8, color='skyblue', alpha=0.8, label='chip')
-        
-        # 折线图（突出趋势）
-        line, = self.ax.plot(prices, counts, 'ro-', linewidth=1.5, markersize=4, label='chip line')
-        
-        # 存储折线图的点用于交互
-        self.line_points = list(zip(prices, counts))
-        
-        # 保存原始坐标轴范围
-        self.original_xlim = (min(prices) - 5, max(prices) + 5)
-        self.original_ylim = (0, max(counts) * 1.1)
-        
-        # 设置坐标轴
-        self.ax.set_title('chips', fontsize=14)
-        self.ax.set_xlabel('price', fontsize=12)
-        self.ax.set_ylabel('chip', fontsize=12)
-        self.ax.grid(axis='y', alpha=0.3)
-        
-        # 设置简洁的网格和边框
-        self.ax.spines['top'].set_visible(False)
-        self.ax.spines['right'].set_visible(False)
-        
-        # 优化横坐标显示
-        if len(prices) > 10:
-            step = max(1, len(prices) // 10)
-            self.ax.set_xticks(prices[::step])
-        else:
-            self.ax.set_xticks(prices)
-        
-        # 添加图例
-        self.ax.legend()
-        
-        # 紧凑布局
-        self.figure.tight_layout()
-        
-        # 连接鼠标移动事件
-        self.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
-        self.canvas.mpl_connect('button_press_event', self.on_mouse_click)
-        
-        # 更新画布
-        self.canvas.draw()
-
-    def on_mouse_move(self, event):
-        """处理鼠标移动事件，在状态栏显示坐标"""
-        if event.inaxes == self.ax:
-            # 在状态栏显示坐标
-            self.coord_label.setText(f"坐标: X={event.xdata:.2f}, Y={event.ydata:.2f}")
-            
-            # 检查鼠标是否在数据点附近
-            self.check_point_hover(event.xdata, event.ydata)
-        else:
-            self.coord_label.setText("坐标: ")
-            # 移除悬停提示
-            if self.current_point_annotation:
-                self.current_point_annotation.remove()
-                self.current_point_annotation = None
-                self.canvas.draw_idle()
-    
-    def on_mouse_click(self, event):
-        """处理鼠标点击事件"""
-        if event.inaxes == self.ax and event.xdata is not None and event.ydata is not None:
-            # 在状态栏显示点击位置
-            self.statusBar().showMessage(f"点击位置: X={event.xdata:.2f}, Y={event.ydata:.2f}")
-    
-    def check_point_hover(self, x, y):
-        """检查鼠标是否在数据点附近，如果是则显示提示"""
-        min_distance = float('inf')
-        closest_point = None
-        
-        # 寻找最近的数据点
-        for point in self.line_points:
-            px, py = point
-            distance = math.sqrt((px - x)**2 + (py - y)**2)
-            if distance < min_distance:
-                min_distance = distance
-                closest_point = point
-        
-        # 如果距离小于阈值，显示提示
-        if min_distance < 5:  # 5个像素距离阈值
-            if self.current_point_annotation:
-                self.current_point_annotation.remove()
-            
-            # 创建注解对象
-            self.current_point_annotation = self.ax.annotate(
-                f'({closest_point[0]:.1f}, {closest_point[1]:.1f})',
-                xy=closest_point,
-                xytext=(0, 15),
-                textcoords='offset points',
-                arrowprops=dict(arrowstyle="->", connectionstyle="arc3"),
-                bbox=dict(boxstyle="round", fc="w", alpha=0.9)
-            )
-            self.canvas.draw_idle()
-        elif self.current_point_annotation:
-            # 移除注解
-            self.current_point_annotation.remove()
-            self.current_point_annotation = None
-            self.canvas.draw_idle()
-
-    def calculate_and_plot(self):
-        try:
-            # 生成数据
-            self.statusBar().showMessage("正在计算数据...")
-            QApplication.processEvents()
-            result = self.generate_data()
-            
-            # 数据中转
-            middle = self.transfer(result)
-            
-            # 绘制图表
-            self.statusBar().showMessage("正在绘制图表...")
-            QApplication.processEvents()
-            self.plot_chip_distribution(middle)
-            
-            # 显示结果视图
-            self.result_widget.setVisible(True)
-            self.view_list_btn.setVisible(True)
-            
-            # 添加结果列表查看功能
-            self.view_list_btn.disconnect()
-            self.view_list_btn.clicked.connect(lambda: self.show_results(result))
-            
-            self.statusBar().showMessage("计算完成，共生成 {} 行数据".format(len(result)-1))
-            
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"计算过程中发生错误: {str(e)}")
-            self.statusBar().showMessage("错误: " + str(e))
-
-    def show_results(self, data):
-        """显示完整结果列表窗口"""
-        self.results_window = ResultsWindow(data)
-        self.results_window.show()
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
-    sys.exit(app.exec_())
+import math
+import os
+import sys
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+                             QLabel, QLineEdit, QPushButton, QTableView, 
+                             QHeaderView, QAbstractItemView, QMessageBox,
+                             QSizePolicy, QToolButton, QProgressBar, QComboBox,
+                             QShortcut, QCheckBox)
+from PyQt5.QtGui import QDoubleValidator, QIntValidator, QFont, QPalette, QColor, QIcon, QKeySequence
+from PyQt5.QtCore import (Qt, QSize, QObject, QThread, pyqtSignal,
+                          QAbstractTableModel, QModelIndex)
+import 筹码引擎
+import 性能记录
+
+# 悬停提示的距离阈值（像素）
+HOVER_RADIUS = 5
+
+# 计算进度条的最短更新间隔（秒）
+PROGRESS_SECONDS = 0.1
+
+# 使用磁盘缓存的最大行数，更大的迭代次数直接由游程结果按需展开
+DISK_CACHE_MAX_ROWS = 1000000
+
+class NumericInput(QWidget):
+    def __init__(self, label, default="0", validator=None):
+        super().__init__()
+        layout = QHBoxLayout()
+        self.setLayout(layout)
+        
+        self.label = QLabel(label)
+        self.label.setFont(QFont("Arial", 10))
+        self.input = QLineEdit(default)
+        self.input.setFont(QFont("Arial", 10))
+        self.input.setFixedWidth(150)
+        if validator:
+            self.input.setValidator(validator)
+        
+        layout.addWidget(self.label)
+        layout.addWidget(self.input)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def get_value(self):
+        try:
+            if '.' in self.input.text():
+                return float(self.input.text())
+            return int(self.input.text())
+        except ValueError:
+            return 0
+            
+    def clear(self):
+        self.input.clear()
+
+class LadderTableModel(QAbstractTableModel):
+    """直接读取引擎结果的只读表格模型
+
+    data可以是LadderResult（逐行数组）或LadderRuns（游程，按需展开），
+    只有视图请求到的行才会按块展开并格式化，打开时间与行数无关。
+    Qt视图的总高度受int范围限制，行数过多时只显示从offset开始的MAX_ROWS行。
+    筛选时只显示[offset, stop)区间内的行，不复制数据。
+    """
+    BLOCK_SIZE = 256        # 每次展开的行数
+    MAX_BLOCKS = 64         # 最多缓存的块数
+    MAX_ROWS = 10000000     # 视图中最多显示的行数
+
+    def __init__(self, data, parent=None):
+        super().__init__(parent)
+        self.source = data
+        self.offset = 0
+        self.stop = data.n_steps
+        self._blocks = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return max(0, min(self.stop - self.offset, self.MAX_ROWS))
+
+    def set_range(self, start, stop=None):
+        """只显示第start到stop-1行（从0开始），stop为None时显示到最后一行"""
+        n = self.source.n_steps
+        start = max(0, min(start, n - 1))
+        stop = n if stop is None else max(start, min(stop, n))
+        if (start, stop) != (self.offset, self.stop):
+            self.beginResetModel()
+            self.offset = start
+            self.stop = stop
+            self.endResetModel()
+
+    def set_offset(self, offset):
+        """显示从第offset行（从0开始）开始的窗口"""
+        self.set_range(offset)
+
+    def is_filtered(self):
+        return self.stop < self.source.n_steps
+
+    def row_of_step(self, step):
+        """第step步在当前窗口中的行号，不在窗口内时返回None"""
+        row = step - 1 - self.offset
+        if 0 <= row < self.rowCount():
+            return row
+        return None
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(筹码引擎.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return 筹码引擎.COLUMNS[section]
+        return None
+
+    def _block(self, block):
+        """取出第block块的各列（转换为Python数值列表）"""
+        columns = self._blocks.get(block)
+        if columns is None:
+            start = block * self.BLOCK_SIZE
+            rows = self.source.rows(start, start + self.BLOCK_SIZE)
+            columns = self._blocks[block] = [col.tolist() for col in rows.columns]
+            if len(self._blocks) > self.MAX_BLOCKS:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(block)
+        return columns
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            block, offset = divmod(self.offset + index.row(), self.BLOCK_SIZE)
+            return str(self._block(block)[index.column()][offset])
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+class ResultsWindow(QMainWindow):
+    # 查找方式：(名称, 输入提示)
+    SEARCH_MODES = [
+        ("跳转到序号", "序号"),
+        ("价位等于", "价位"),
+        ("新入价-强平低于", "差值"),
+        ("强平线到达", "价格"),
+    ]
+
+    def __init__(self, data, runs=None):
+        super().__init__()
+        self.setWindowTitle("计算结果列表")
+        self.setGeometry(300, 200, 900, 600)
+        
+        # 应用简约风格配色
+        palette = QPalette()
+        palette.setColor(QPalette.Window, QColor(250, 250, 250))
+        palette.setColor(QPalette.Base, QColor(255, 255, 255))
+        palette.setColor(QPalette.Button, QColor(240, 240, 240))
+        palette.setColor(QPalette.Highlight, QColor(100, 150, 255))
+        self.setPalette(palette)
+        
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+        
+        title = QLabel("计算结果列表")
+        title.setFont(QFont("Arial", 14, QFont.Bold))
+        title.setStyleSheet("color: #333333;")
+        title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title)
+        
+        # 查找栏：在游程索引上二分查找，结果直接定位或筛选表格
+        self.runs = runs if runs is not None else data
+        search_layout = QHBoxLayout()
+        self.search_mode = QComboBox()
+        self.search_mode.setFont(QFont("Arial", 10))
+        for name, _ in self.SEARCH_MODES:
+            self.search_mode.addItem(name)
+        self.search_mode.currentIndexChanged.connect(self.on_search_mode_changed)
+        self.search_input = QLineEdit()
+        self.search_input.setFont(QFont("Arial", 10))
+        self.search_input.returnPressed.connect(self.search)
+        search_btn = QPushButton("查找")
+        search_btn.setFont(QFont("Arial", 10))
+        search_btn.clicked.connect(self.search)
+        show_all_btn = QPushButton("显示全部")
+        show_all_btn.setFont(QFont("Arial", 10))
+        show_all_btn.clicked.connect(self.show_all)
+        search_layout.addWidget(self.search_mode)
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(search_btn)
+        search_layout.addWidget(show_all_btn)
+        layout.addLayout(search_layout)
+        self.on_search_mode_changed(0)
+        
+        self.search_label = QLabel("")
+        self.search_label.setFont(QFont("Arial", 9))
+        self.search_label.setStyleSheet("color: #666666;")
+        self.search_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.search_label)
+        
+        # 创建表格视图（自带滚动条，只绘制可见行）
+        self.model = LadderTableModel(data, self)
+        table = QTableView()
+        # 固定行高，避免按内容计算每一行的高度
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table.verticalHeader().setDefaultSectionSize(24)
+        table.setModel(self.model)
+        self.table = table
+        
+        # 表格样式设置
+        table.setFont(QFont("Arial", 10))
+        table.setStyleSheet("""
+            QTableView {
+                gridline-color: #e0e0e0;
+                background-color: #ffffff;
+            }
+            QHeaderView::section {
+                background-color: #f0f0f0;
+                padding: 6px;
+                border: 1px solid #e0e0e0;
+            }
+        """)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.setAlternatingRowColors(True)
+        layout.addWidget(table)
+        
+        if data.n_steps > LadderTableModel.MAX_ROWS:
+            hint = QLabel(f"共 {data.n_steps} 行，列表中显示前 {LadderTableModel.MAX_ROWS} 行")
+            hint.setFont(QFont("Arial", 9))
+            hint.setStyleSheet("color: #666666;")
+            hint.setAlignment(Qt.AlignCenter)
+            layout.addWidget(hint)
+        
+        # 添加筹码信息标签
+        chips_label = QLabel(f"筹码单位数: {data.total_chips}")
+        chips_label.setFont(QFont("Arial", 11, QFont.Bold))
+        chips_label.setStyleSheet("color: #333333; padding: 10px;")
+        chips_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(chips_label)
+
+    def on_search_mode_changed(self, index):
+        self.search_input.setPlaceholderText(self.SEARCH_MODES[index][1])
+        if index == 0:
+            self.search_input.setValidator(QIntValidator(1, 2147483647))
+        else:
+            self.search_input.setValidator(QDoubleValidator())
+        self.search_input.clear()
+
+    def search(self):
+        """按选择的方式查找并定位到结果行"""
+        text = self.search_input.text()
+        try:
+            value = int(text) if self.search_mode.currentIndex() == 0 else float(text)
+        except ValueError:
+            self.search_label.setText("请输入有效的数值")
+            return
+        
+        mode = self.search_mode.currentIndex()
+        if mode == 0:
+            if not 1 <= value <= self.model.source.n_steps:
+                self.search_label.setText(f"序号超出范围 1-{self.model.source.n_steps}")
+                return
+            self.jump_to_step(value)
+            self.search_label.setText(f"第 {value} 步")
+        elif mode == 1:
+            found = self.runs.steps_at_price(value)
+            if found is None:
+                self.search_label.setText(f"没有价位为 {value} 的步")
+                return
+            first, last = found
+            # 只显示该价位的各步
+            self.model.set_range(first - 1, last)
+            self.jump_to_step(first)
+            self.search_label.setText(f"价位 {value} 共 {last - first + 1} 步（第 {first}-{last} 步）")
+        else:
+            if mode == 2:
+                step = self.runs.first_step_distance_below(value)
+                desc = f"新入价-强平低于 {value}"
+            else:
+                step = self.runs.first_step_strong_crosses(value)
+                desc = f"强平线到达 {value}"
+            if step is None:
+                self.search_label.setText(f"没有{desc} 的步")
+                return
+            if step == 0:
+                strong = self.runs.row(0)[4]
+                self.search_label.setText(
+                    f"第 1 步强平线 {strong:g} 已越过 {value}，阶梯内没有首次到达的步")
+                return
+            self.jump_to_step(step)
+            self.search_label.setText(f"第 {step} 步首次{desc}")
+
+    def jump_to_step(self, step):
+        """滚动并选中第step步，不在当前窗口内时移动窗口"""
+        row = self.model.row_of_step(step)
+        if row is None:
+            self.model.set_range(step - 1)
+            row = 0
+        index = self.model.index(row, 0)
+        self.table.selectRow(row)
+        self.table.scrollTo(index, QAbstractItemView.PositionAtTop)
+
+    def show_all(self):
+        """取消筛选，回到第一行"""
+        self.model.set_range(0)
+        self.search_label.setText("")
+        self.table.scrollToTop()
+
+class CalculationWorker(QObject):
+    """在后台线程中运行计算引擎，通过信号把进度和结果送回界面线程"""
+    progress = pyqtSignal(int, int)            # 已计算步数, 总步数
+    finished = pyqtSignal(object, object, object, object)  # 参数, 游程结果, 价位, 筹码
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, cache, params, recorder=None):
+        super().__init__()
+        self.cache = cache
+        self.params = params
+        self.recorder = recorder
+        self._cancel_requested = False
+        self._last_progress = 0.0
+
+    def run(self):
+        try:
+            with 性能记录.profiling('计算'):
+                with 性能记录.stage(self.recorder, '计算'):
+                    result = self.cache.runs(*self.params, progress=self._report_progress)
+                # 游程已按价位聚合，直接得到各价位的筹码
+                with 性能记录.stage(self.recorder, '统计筹码'):
+                    prices, counts = result.histogram()
+        except 筹码引擎.CalculationCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(self.params, result, prices, counts)
+
+    def _report_progress(self, done, total):
+        # 引擎每个游程都会调用：取消请求立即生效，进度按时间节流后才发送
+        if self._cancel_requested:
+            return False
+        now = time.perf_counter()
+        if now - self._last_progress >= PROGRESS_SECONDS:
+            self._last_progress = now
+            self.progress.emit(done, total)
+        return True
+
+    def cancel(self):
+        """请求取消，引擎在下一次进度回调时停止"""
+        self._cancel_requested = True
+
+class CacheWorker(QObject):
+    """在后台线程中展开游程结果并写入磁盘缓存，供下次打开结果列表时内存映射读取
+
+    写入的逐行数据就是结果列表按需展开的数据，命中与未命中时显示的数值相同。
+    """
+    finished = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, cache, params, runs):
+        super().__init__()
+        self.cache = cache
+        self.params = params
+        self.runs = runs
+
+    def run(self):
+        try:
+            self.cache.store(*self.params[:3], self.runs.expand())
+        except OSError as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit()
+
+class SolveWorker(QObject):
+    """在后台线程中反求参数
+
+    输入框只接受有限位小数，求出的值按该精度向满足目标的一侧取整（取最大值时向下、
+    取最小值时向上），再计算一次确认取整后的值仍满足目标；不满足时再向同一侧移动
+    一个最小单位。
+    """
+    finished = pyqtSignal(object, object)   # 反求结果, 取整后的(值, 指标)，不满足目标时为None
+    failed = pyqtSignal(str)
+
+    def __init__(self, solve_for, params, goal, target, bounds, maximize, decimals):
+        super().__init__()
+        self.solve_for = solve_for      # 0为杠杆倍数，1为新入价-强平距
+        self.params = params
+        self.goal = goal
+        self.target = target
+        self.bounds = bounds
+        self.maximize = maximize
+        self.decimals = decimals
+
+    def run(self):
+        import 求解器
+        B2, H2, I2, J2 = self.params
+        try:
+            if self.solve_for == 0:
+                result = 求解器.solve_leverage(B2, I2, J2, self.goal, self.target, self.bounds,
+                                              self.maximize)
+            else:
+                result = 求解器.solve_offset(B2, H2, J2, self.goal, self.target, self.bounds,
+                                            self.maximize)
+            rounded = self._round(result) if result.satisfied else None
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(result, rounded)
+
+    def _round(self, result):
+        import 求解器
+        scale = 10 ** self.decimals
+        rounding = math.floor if self.maximize else math.ceil
+        units = rounding(round(result.value * scale, 6))
+        step = -1 if self.maximize else 1
+        # 取整后的值和再移动一个单位的值一起计算，取第一个满足目标的
+        values = [units / scale, (units + step) / scale]
+        params = list(self.params)
+        params[1 + self.solve_for] = np.array(values)
+        metrics = 求解器.evaluate_goal(self.goal, *params)
+        for value, metric in zip(values, metrics.tolist()):
+            if 求解器.goal_met(self.goal, metric, self.target):
+                return value, metric
+        return None
+
+class TickWorker(QObject):
+    """在后台线程中读取行情并更新持仓状态
+
+    界面线程处理完上一次通知之前不再发送新的通知，行情再快界面也只显示最新状态。
+    """
+    updated = pyqtSignal()
+    failed = pyqtSignal(str)
+    finished = pyqtSignal(int)      # 处理的报价数
+
+    def __init__(self, monitor, source):
+        super().__init__()
+        self.monitor = monitor
+        self.source = source
+        self.pending = False
+        self.latest = None          # (到达时间, 持仓状态)，一次性替换
+        self.stop_event = threading.Event()
+
+    def run(self):
+        import 实时行情
+        count = 0
+        try:
+            for _, price in 实时行情.open_source(self.source, stop_event=self.stop_event):
+                received = time.perf_counter()
+                self.monitor.update(price)
+                self.latest = (received, self.monitor.state)
+                count += 1
+                if not self.pending:
+                    self.pending = True
+                    self.updated.emit()
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(count)
+
+    def stop(self):
+        self.stop_event.set()
+
+class MainWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("杠杆筹码计算器")
+        self.setGeometry(200, 100, 900, 700)
+        
+        # 应用简约风格配色
+        palette = QPalette()
+        palette.setColor(QPalette.Window, QColor(245, 248, 250))
+        palette.setColor(QPalette.Button, QColor(230, 240, 250))
+        palette.setColor(QPalette.Highlight, QColor(100, 150, 255))
+        palette.setColor(QPalette.Text, QColor(50, 50, 50))
+        self.setPalette(palette)
+        
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QVBoxLayout(central_widget)
+        
+        # 添加标题
+        title = QLabel("左侧杠杆筹码单位计算")
+        title.setFont(QFont("Arial", 18, QFont.Bold))
+        title.setStyleSheet("color: #333366; padding: 10px;")
+        title.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(title)
+        
+        # 输入区域
+        input_layout = QHBoxLayout()
+        
+        # 左侧输入控件
+        left_input = QWidget()
+        left_layout = QVBoxLayout(left_input)
+        
+        self.b2_input = NumericInput("初始价位(B2): ", "100", QDoubleValidator(0, 1000000, 2))
+        self.h2_input = NumericInput("杠杆倍数(G2): ", "10", QDoubleValidator(0.1, 1000, 2))
+        
+        left_layout.addWidget(self.b2_input)
+        left_layout.addWidget(self.h2_input)
+        
+        # 右侧输入控件
+        right_input = QWidget()
+        right_layout = QVBoxLayout(right_input)
+        
+        self.i2_input = NumericInput("新入价-强平距(I2): ", "10", QDoubleValidator(0.1, 100000, 2))
+        self.j2_input = NumericInput("迭代次数(J2): ", "50", QIntValidator(1, 1000000000))
+        
+        right_layout.addWidget(self.i2_input)
+        right_layout.addWidget(self.j2_input)
+        
+        input_layout.addWidget(left_input)
+        input_layout.addWidget(right_input)
+        main_layout.addLayout(input_layout)
+        
+        # 按钮区域
+        button_layout = QHBoxLayout()
+        
+        # 计算按钮
+        calc_btn = QPushButton("计算并绘图")
+        calc_btn.setFont(QFont("Arial", 11))
+        calc_btn.setFixedHeight(40)
+        calc_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #3366ff; 
+                color: white; 
+                border-radius: 5px;
+                padding: 8px;
+            }
+            QPushButton:hover {
+                background-color: #2255dd;
+            }
+        """)
+        calc_btn.clicked.connect(self.calculate_and_plot)
+        self.calc_btn = calc_btn
+        
+        # 取消按钮（计算进行中才可用）
+        self.cancel_btn = QPushButton("取消计算")
+        self.cancel_btn.setFont(QFont("Arial", 11))
+        self.cancel_btn.setFixedHeight(40)
+        self.cancel_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #999999; 
+                color: white; 
+                border-radius: 5px;
+                padding: 8px;
+            }
+            QPushButton:hover {
+                background-color: #777777;
+            }
+        """)
+        self.cancel_btn.clicked.connect(self.cancel_calculation)
+        self.cancel_btn.setVisible(False)
+        
+        # 清除按钮 
+        clear_btn = QPushButton("清除所有输入")
+        clear_btn.setFont(QFont("Arial", 11))
+        clear_btn.setFixedHeight(40)
+        clear_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #ff6633; 
+                color: white; 
+                border-radius: 5px;
+                padding: 8px;
+            }
+            QPushButton:hover {
+                background-color: #dd5522;
+            }
+        """)
+        clear_btn.clicked.connect(self.clear_all_inputs)
+        
+        button_layout.addWidget(calc_btn)
+        button_layout.addWidget(self.cancel_btn)
+        button_layout.addWidget(clear_btn)
+        main_layout.addLayout(button_layout)
+        
+        # 反求参数：按目标找杠杆倍数或新入价-强平距，其他参数取输入框的值
+        solve_layout = QHBoxLayout()
+        solve_layout.addWidget(QLabel("反求:"))
+        self.solve_for = QComboBox()
+        self.solve_for.addItems(["杠杆倍数", "新入价-强平距"])
+        solve_layout.addWidget(self.solve_for)
+        self.goal_combo = QComboBox()
+        # 数据为求解器.GOAL_*的值，求解器在第一次反求时才导入
+        self.goal_combo.addItem("加仓价位数 ≥", 'depth')
+        self.goal_combo.addItem("可承受跌幅 ≥", 'drawdown')
+        self.goal_combo.addItem("保证金 ≤", 'margin')
+        solve_layout.addWidget(self.goal_combo)
+        self.goal_target = QLineEdit()
+        self.goal_target.setPlaceholderText("目标（跌幅0.4即40%）")
+        self.goal_target.setValidator(QDoubleValidator())
+        solve_layout.addWidget(self.goal_target)
+        solve_layout.addWidget(QLabel("区间:"))
+        self.goal_lo = QLineEdit()
+        self.goal_lo.setPlaceholderText("下限")
+        self.goal_lo.setValidator(QDoubleValidator())
+        self.goal_hi = QLineEdit()
+        self.goal_hi.setPlaceholderText("上限")
+        self.goal_hi.setValidator(QDoubleValidator())
+        solve_layout.addWidget(self.goal_lo)
+        solve_layout.addWidget(self.goal_hi)
+        self.goal_min = QCheckBox("取最小值")
+        solve_layout.addWidget(self.goal_min)
+        self.solve_btn = QPushButton("求解")
+        self.solve_btn.clicked.connect(self.solve_parameter)
+        solve_layout.addWidget(self.solve_btn)
+        main_layout.addLayout(solve_layout)
+        self.solve_label = QLabel("")
+        self.solve_label.setFont(QFont("Arial", 9))
+        main_layout.addWidget(self.solve_label)
+        
+        # 结果区域
+        self.result_widget = QWidget()
+        self.result_layout = QVBoxLayout(self.result_widget)
+        self.result_layout.setContentsMargins(5, 10, 5, 5)
+        self.result_widget.setVisible(False)
+        
+        # 添加查看结果列表的按钮
+        self.view_list_btn = QPushButton("查看完整结果列表")
+        self.view_list_btn.setFont(QFont("Arial", 10))
+        self.view_list_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #44aaff; 
+                color: white; 
+                border-radius: 4px;
+                padding: 6px;
+            }
+            QPushButton:hover {
+                background-color: #3399ee;
+            }
+        """)
+        self.view_list_btn.setFixedHeight(35)
+        self.view_list_btn.setVisible(False)
+        self.result_layout.addWidget(self.view_list_btn)
+        
+        # 图表区域（画布和图表控制按钮）在第一次绘图时才创建
+        self.figure = None
+        self.canvas = None
+        self.chart = None
+        
+        main_layout.addWidget(self.result_widget)
+        
+        # 状态栏
+        self.statusBar().showMessage("准备就绪")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedWidth(200)
+        self.progress_bar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        
+        # 后台计算线程
+        self.calc_thread = None
+        self.calc_worker = None
+        self.solve_thread = None
+        self.solve_worker = None
+        
+        # 性能记录：按环境变量设置日志和采集方式，Ctrl+Shift+P开关采集
+        性能记录.configure()
+        self.perf = None
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self, activated=self.toggle_profiling)
+        
+        # 图表交互相关变量
+        self.ax = None
+        self.original_xlim = None
+        self.original_ylim = None
+        self.drag_mode = False  # 拖拽模式状态
+        
+        # 实时行情监控
+        self.runs = None
+        self.tick_thread = None
+        self.tick_worker = None
+        self.monitor = None
+        self.live_status = None
+        self.live_latency = 0.0
+        
+        # 计算结果缓存：只修改迭代次数时只计算新增部分
+        self.ladder_cache = 筹码引擎.LadderCache()
+        
+        # 设置了LADDER_CACHE_DIR环境变量时，完整结果列表使用磁盘缓存
+        cache_dir = os.environ.get('LADDER_CACHE_DIR')
+        self.disk_cache = None
+        if cache_dir:
+            import 磁盘缓存
+            try:
+                self.disk_cache = 磁盘缓存.DiskLadderCache(cache_dir)
+            except OSError as e:
+                self.statusBar().showMessage(f"磁盘缓存不可用: {e}")
+        self.cache_thread = None
+        self.cache_worker = None
+    
+    def build_chart_area(self):
+        """创建图表区域；matplotlib在这里才导入，不影响窗口启动时间"""
+        from matplotlib.figure import Figure
+        import 筹码图表
+        
+        # 创建图表占位区域
+        self.figure = Figure()
+        self.canvas = 筹码图表.CustomCanvas(self.figure)  # 使用自定义画布类
+        self.canvas.setMinimumHeight(450)
+        self.result_layout.addWidget(self.canvas)
+        
+        # 图表对象只创建一次，鼠标事件也只连接一次
+        self.chart = 筹码图表.ChipChart(self.figure)
+        self.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+        self.canvas.mpl_connect('button_press_event', self.on_mouse_click)
+        
+        # 添加图表控制按钮区域
+        self.chart_controls = QWidget()
+        self.chart_controls_layout = QHBoxLayout(self.chart_controls)
+        self.chart_controls_layout.setAlignment(Qt.AlignCenter)
+        self.chart_controls_layout.setSpacing(10)  # 设置按钮间距
+        
+        # 放大按钮 - 添加加号图标
+        self.zoom_in_btn = QToolButton()
+        self.zoom_in_btn.setIcon(QIcon.fromTheme("zoom-in"))
+        self.zoom_in_btn.setText("+")  # 添加加号文本
+        self.zoom_in_btn.setToolTip("放大图表")
+        self.zoom_in_btn.setStyleSheet("""
+            QToolButton {
+                background-color: #f0f0f0;
+                border: 1px solid #d0d0d0;
+                border-radius: 4px;
+                padding: 5px;
+                font-weight: bold;
+                font-size: 16px;
+            }
+            QToolButton:hover {
+                background-color: #e0e0e0;
+            }
+            QToolButton:pressed {
+                background-color: #d0d0d0;
+            }
+        """)
+        self.zoom_in_btn.setFixedSize(36, 36)
+        self.zoom_in_btn.clicked.connect(self.zoom_in)
+        
+        # 缩小按钮 - 添加减号图标
+        self.zoom_out_btn = QToolButton()
+        self.zoom_out_btn.setIcon(QIcon.fromTheme("zoom-out"))
+        self.zoom_out_btn.setText("-")  # 添加减号文本
+        self.zoom_out_btn.setToolTip("缩小图表")
+        self.zoom_out_btn.setStyleSheet("""
+            QToolButton {
+                background-color: #f0f0f0;
+                border: 1px solid #d0d0d0;
+                border-radius: 4px;
+                padding: 5px;
+                font-weight: bold;
+                font-size: 16px;
+            }
+            QToolButton:hover {
+                background-color: #e0e0e0;
+            }
+            QToolButton:pressed {
+                background-color: #d0d0d0;
+            }
+        """)
+        self.zoom_out_btn.setFixedSize(36, 36)
+        self.zoom_out_btn.clicked.connect(self.zoom_out)
+        
+        # 拖拽按钮 - 添加小手图标
+        self.drag_btn = QToolButton()
+        self.drag_btn.setIcon(QIcon.fromTheme("transform-move"))
+        self.drag_btn.setText("✋")  # 添加手形符号
+        self.drag_btn.setToolTip("拖拽图表")
+        self.drag_btn.setStyleSheet("""
+            QToolButton {
+                background-color: #f0f0f0;
+                border: 1px solid #d0d0d0;
+                border-radius: 4px;
+                padding: 5px;
+                font-size: 14px;
+            }
+            QToolButton:hover {
+                background-color: #e0e0e0;
+            }
+            QToolButton:pressed {
+                background-color: #d0d0d0;
+            }
+        """)
+        self.drag_btn.setFixedSize(36, 36)
+        self.drag_btn.clicked.connect(self.toggle_drag_mode)
+        
+        # 新增：恢复光标按钮 - 添加箭头图标
+        self.default_cursor_btn = QToolButton()
+        self.default_cursor_btn.setIcon(QIcon.fromTheme("go-home"))
+        self.default_cursor_btn.setText("➜")  # 添加箭头符号
+        self.default_cursor_btn.setToolTip("恢复默认光标")
+        self.default_cursor_btn.setStyleSheet("""
+            QToolButton {
+                background-color: #f0f0f0;
+                border: 1px solid #d0d0d0;
+                border-radius: 4px;
+                padding: 5px;
+                font-size: 14px;
+            }
+            QToolButton:hover {
+                background-color: #e0e0e0;
+            }
+            QToolButton:pressed {
+                background-color: #d0d0d0;
+            }
+        """)
+        self.default_cursor_btn.setFixedSize(36, 36)
+        self.default_cursor_btn.clicked.connect(self.restore_default_cursor)
+        
+        # 添加按钮到布局
+        self.chart_controls_layout.addWidget(self.zoom_in_btn)
+        self.chart_controls_layout.addWidget(self.zoom_out_btn)
+        self.chart_controls_layout.addWidget(self.drag_btn)
+        self.chart_controls_layout.addWidget(self.default_cursor_btn)  # 添加恢复光标按钮
+        
+        self.result_layout.addWidget(self.chart_controls)
+        
+        # 实时行情：文件回放或TCP连接，在图上叠加当前价、强平线和下一加仓价
+        live_controls = QWidget()
+        live_layout = QHBoxLayout(live_controls)
+        live_layout.setContentsMargins(0, 0, 0, 0)
+        live_layout.addWidget(QLabel("实时行情:"))
+        self.live_input = QLineEdit()
+        self.live_input.setPlaceholderText("行情文件路径，或 主机:端口")
+        self.live_input.returnPressed.connect(self.toggle_live)
+        live_layout.addWidget(self.live_input)
+        self.live_btn = QPushButton("开始监控")
+        self.live_btn.clicked.connect(self.toggle_live)
+        live_layout.addWidget(self.live_btn)
+        self.result_layout.addWidget(live_controls)
+        self.live_label = QLabel("")
+        self.live_label.setFont(QFont("Arial", 9))
+        self.result_layout.addWidget(self.live_label)
+        
+        # 初始化坐标提示变量
+        self.coord_label = QLabel("坐标: ")
+        self.coord_label.setFont(QFont("Arial", 9))
+        self.coord_label.setStyleSheet("color: #666666;")
+        self.coord_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.result_layout.addWidget(self.coord_label)
+
+    # 新增：恢复默认光标功能
+    def restore_default_cursor(self):
+        """恢复默认光标"""
+        self.canvas.setCursor(Qt.ArrowCursor)
+        self.drag_mode = False
+        self.drag_btn.setStyleSheet("""
+            QToolButton {
+                background-color: #f0f0f0;
+                border: 1px solid #d0d0d0;
+                border-radius: 4px;
+                padding: 5px;
+                font-size: 14px;
+            }
+        """)
+        self.statusBar().showMessage("已恢复默认光标")
+    
+    # 切换拖拽模式
+    def toggle_drag_mode(self):
+        """切换拖拽模式状态"""
+        self.drag_mode = not self.drag_mode
+        
+        # 更新按钮状态
+        if self.drag_mode:
+            self.drag_btn.setStyleSheet("""
+                QToolButton {
+                    background-color: #d0d0ff;
+                    border: 1px solid #a0a0ff;
+                    border-radius: 4px;
+                    padding: 5px;
+                    font-size: 14px;
+                }
+            """)
+            self.canvas.setCursor(Qt.OpenHandCursor)  # 设置打开的手形光标
+            self.statusBar().showMessage("拖拽模式已启用 - 按住鼠标左键拖动图表")
+        else:
+            self.drag_btn.setStyleSheet("""
+                QToolButton {
+                    background-color: #f0f0f0;
+                    border: 1px solid #d0d0d0;
+                    border-radius: 4px;
+                    padding: 5px;
+                    font-size: 14px;
+                }
+            """)
+            self.canvas.setCursor(Qt.ArrowCursor)  # 恢复默认箭头光标
+            self.statusBar().showMessage("拖拽模式已禁用")
+    
+    # 放大功能
+    def zoom_in(self):
+        """放大图表视图"""
+        if self.ax:
+            # 获取当前坐标轴范围
+            xlim = self.ax.get_xlim()
+            ylim = self.ax.get_ylim()
+            
+            # 计算新的范围（中心点不变，范围缩小）
+            x_center = (xlim[0] + xlim[1]) / 2
+            y_center = (ylim[0] + ylim[1]) / 2
+            x_range = (xlim[1] - xlim[0]) * 0.7  # 缩小30%
+            y_range = (ylim[1] - ylim[0]) * 0.7
+            
+            # 设置新的坐标轴范围
+            self.ax.set_xlim(x_center - x_range/2, x_center + x_range/2)
+            self.ax.set_ylim(y_center - y_range/2, y_center + y_range/2)
+            
+            # 重绘图表
+            self.canvas.draw()
+            self.statusBar().showMessage("图表已放大")
+    
+    # 缩小功能
+    def zoom_out(self):
+        """缩小图表视图"""
+        if self.ax:
+            # 获取当前坐标轴范围
+            xlim = self.ax.get_xlim()
+            ylim = self.ax.get_ylim()
+            
+            # 计算新的范围（中心点不变，范围扩大）
+            x_center = (xlim[0] + xlim[1]) / 2
+            y_center = (ylim[0] + ylim[1]) / 2
+            x_range = (xlim[1] - xlim[0]) * 1.3  # 扩大30%
+            y_range = (ylim[1] - ylim[0]) * 1.3
+            
+            # 设置新的坐标轴范围，但不超过原始范围
+            new_xmin = max(self.original_xlim[0], x_center - x_range/2)
+            new_xmax = min(self.original_xlim[1], x_center + x_range/2)
+            new_ymin = max(self.original_ylim[0], y_center - y_range/2)
+            new_ymax = min(self.original_ylim[1], y_center + y_range/2)
+            
+            self.ax.set_xlim(new_xmin, new_xmax)
+            self.ax.set_ylim(new_ymin, new_ymax)
+            
+            # 重绘图表
+            self.canvas.draw()
+            self.statusBar().showMessage("图表已缩小")
+    
+    # 清除所有输入功能 
+    def clear_all_inputs(self):
+        """清除所有输入框的内容并重置界面"""
+        self.stop_live()
+        
+        # 清除所有输入框
+        self.b2_input.clear()
+        self.h2_input.clear()
+        self.i2_input.clear()
+        self.j2_input.clear()
+        self.solve_label.setText("")
+        
+        # 隐藏结果区域
+        self.result_widget.setVisible(False)
+        self.view_list_btn.setVisible(False)
+        
+        # 清空图表（图表区域尚未创建时无需处理）
+        if self.canvas is not None:
+            self.chart.clear()
+            self.canvas.draw()
+            self.coord_label.setText("坐标: ")
+        
+        # 重置状态栏
+        self.statusBar().showMessage("所有输入已清除")
+        
+        # 重置交互变量
+        self.runs = None
+        self.ax = None
+        self.original_xlim = None
+        self.original_ylim = None
+        self.drag_mode = False
+        if self.canvas is not None:
+            self.drag_btn.setStyleSheet("""
+                QToolButton {
+                    background-color: #f0f0f0;
+                    border: 1px solid #d0d0d0;
+                    border-radius: 4px;
+                    padding: 5px;
+                    font-size: 14px;
+                }
+            """)
+            self.canvas.setCursor(Qt.ArrowCursor)  # 恢复默认光标
+
+    def read_inputs(self):
+        """获取输入值，返回(B2, H2, I2, J2)"""
+        B2 = self.b2_input.get_value()
+        H2 = self.h2_input.get_value()
+        I2 = self.i2_input.get_value()
+        J2 = self.j2_input.get_value()
+        return B2, H2, I2, J2
+
+    def solve_parameter(self):
+        """在后台线程中反求满足目标的参数，完成后填入对应输入框并重新计算"""
+        if self.solve_thread is not None:
+            return
+        goal = self.goal_combo.currentData()
+        try:
+            target = float(self.goal_target.text())
+            bounds = None
+            if self.goal_lo.text() or self.goal_hi.text():
+                bounds = (float(self.goal_lo.text()), float(self.goal_hi.text()))
+        except ValueError:
+            QMessageBox.warning(self, "反求参数", "请输入目标值；指定区间时需同时填写下限和上限")
+            return
+        solve_for = self.solve_for.currentIndex()
+        field = self.h2_input if solve_for == 0 else self.i2_input
+        decimals = field.input.validator().decimals()
+        
+        self.solve_btn.setEnabled(False)
+        self.solve_label.setText(f"正在反求{self.solve_for.currentText()}...")
+        self.solve_thread = QThread()
+        self.solve_worker = SolveWorker(solve_for, self.read_inputs(), goal, target, bounds,
+                                        not self.goal_min.isChecked(), decimals)
+        self.solve_worker.moveToThread(self.solve_thread)
+        self.solve_thread.started.connect(self.solve_worker.run)
+        self.solve_worker.finished.connect(self.on_solve_finished)
+        self.solve_worker.failed.connect(self.on_solve_failed)
+        self.solve_thread.start()
+
+    def finish_solve(self):
+        """结束反求线程，恢复求解按钮"""
+        if self.solve_thread is None:
+            return
+        self.solve_thread.quit()
+        self.solve_thread.wait()
+        self.solve_worker.deleteLater()
+        self.solve_thread.deleteLater()
+        self.solve_thread = None
+        self.solve_worker = None
+        self.solve_btn.setEnabled(True)
+
+    def on_solve_finished(self, result, rounded):
+        import 求解器
+        worker = self.solve_worker
+        self.finish_solve()
+        name = 求解器.GOALS[worker.goal][0]
+        parameter = self.solve_for.itemText(worker.solve_for)
+        if not result.satisfied:
+            self.solve_label.setText(
+                f"区间内没有满足目标的{parameter}，最接近的是 {result.value:g}"
+                f"（{name} {self.format_metric(worker.goal, result.metric)}）")
+            return
+        if rounded is None:
+            self.solve_label.setText(
+                f"{parameter} = {result.value:.6g} 满足目标，"
+                f"但保留 {worker.decimals} 位小数后不再满足，输入框未修改")
+            return
+        value, metric = rounded
+        field = self.h2_input if worker.solve_for == 0 else self.i2_input
+        field.input.setText(f"{value:.{worker.decimals}f}")
+        self.solve_label.setText(f"{parameter} = {value:.{worker.decimals}f}"
+                                 f"（{name} {self.format_metric(worker.goal, metric)}，"
+                                 f"{result.rounds} 轮共计算 {result.evaluations} 组参数）")
+        self.calculate_and_plot()
+
+    def format_metric(self, goal, metric):
+        import 求解器
+        if goal == 求解器.GOAL_DRAWDOWN:
+            return f"{metric:.2%}"
+        return f"{metric:g}"
+
+    def on_solve_failed(self, message):
+        self.finish_solve()
+        self.solve_label.setText("")
+        QMessageBox.warning(self, "反求参数", message)
+
+    def plot_chip_distribution(self, prices, counts, recorder=None):
+        """直接使用数组数据绘制筹码分布图（原地更新已有的图表）
+        
+        参数:
+            prices (ndarray): 升序排列的价位
+            counts (ndarray): 对应价位的筹码数
+            recorder: 性能记录.Recorder，给定时记录各阶段耗时
+        """
+        if len(prices) == 0:
+            QMessageBox.warning(self, "错误", "数据列表为空")
+            return
+        
+        if self.canvas is None:
+            with 性能记录.stage(recorder, '创建图表区域'):
+                self.build_chart_area()
+        self.chart.update(prices, counts, recorder)
+        self.ax = self.chart.ax
+        self.original_xlim = self.chart.original_xlim
+        self.original_ylim = self.chart.original_ylim
+        self.canvas.set_animated_artists(self.chart.animated_artists())
+        
+        # 更新画布
+        with 性能记录.stage(recorder, '绘制'):
+            self.canvas.draw()
+
+    @性能记录.timed_handler('悬停')
+    def on_mouse_move(self, event):
+        """处理鼠标移动事件，在状态栏显示坐标"""
+        if event.inaxes == self.ax:
+            # 在状态栏显示坐标
+            self.coord_label.setText(f"坐标: X={event.xdata:.2f}, Y={event.ydata:.2f}")
+            
+            # 检查鼠标是否在数据点附近（按屏幕像素计算距离）
+            self.check_point_hover(event.x, event.y)
+        else:
+            self.coord_label.setText("坐标: ")
+            # 隐藏悬停提示
+            self.show_point_annotation(None)
+    
+    def on_mouse_click(self, event):
+        """处理鼠标点击事件"""
+        if event.inaxes == self.ax and event.xdata is not None and event.ydata is not None:
+            # 在状态栏显示点击位置
+            self.statusBar().showMessage(f"点击位置: X={event.xdata:.2f}, Y={event.ydata:.2f}")
+    
+    def check_point_hover(self, x, y):
+        """检查鼠标（显示坐标，像素）是否在数据点附近，如果是则显示提示"""
+        radius = HOVER_RADIUS * self.canvas.device_pixel_ratio
+        self.show_point_annotation(self.chart.point_near(x, y, radius))
+
+    def show_point_annotation(self, point):
+        """在point处显示悬停提示，point为None时隐藏；只在变化时局部重绘"""
+        if self.chart.set_hover(point):
+            self.canvas.blit_animated()
+
+    def calculate_and_plot(self):
+        """在后台线程中计算，完成后在界面线程绘图"""
+        if self.calc_thread is not None:
+            return  # 上一次计算尚未结束
+        
+        self.stop_live()
+        params = self.read_inputs()
+        self.statusBar().showMessage("正在计算数据...")
+        self.calc_btn.setEnabled(False)
+        self.cancel_btn.setVisible(True)
+        self.progress_bar.setRange(0, 0)  # 收到进度前显示为忙碌状态
+        self.progress_bar.setVisible(True)
+        
+        # 工作对象移入后台线程，信号以队列方式回到界面线程
+        # 上一张图表的交互统计写入日志，开始记录本次各阶段耗时
+        性能记录.flush_handler_stats()
+        self.perf = 性能记录.Recorder("计算并绘图")
+        
+        self.calc_thread = QThread()
+        self.calc_worker = CalculationWorker(self.ladder_cache, params, self.perf)
+        self.calc_worker.moveToThread(self.calc_thread)
+        self.calc_thread.started.connect(self.calc_worker.run)
+        self.calc_worker.progress.connect(self.on_calculation_progress)
+        self.calc_worker.finished.connect(self.on_calculation_finished)
+        self.calc_worker.failed.connect(self.on_calculation_failed)
+        self.calc_worker.cancelled.connect(self.on_calculation_cancelled)
+        self.calc_thread.start()
+
+    def cancel_calculation(self):
+        """取消正在进行的计算"""
+        if self.calc_worker is not None:
+            self.calc_worker.cancel()
+            self.statusBar().showMessage("正在取消计算...")
+
+    def on_calculation_progress(self, done, total):
+        """更新状态栏进度条（进度按千分比显示，避免超出int范围）"""
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setValue(int(done * 1000 / max(1, total)))
+
+    def finish_calculation(self):
+        """结束后台线程并恢复按钮状态"""
+        self.calc_thread.quit()
+        self.calc_thread.wait()
+        self.calc_worker.deleteLater()
+        self.calc_thread.deleteLater()
+        self.calc_thread = None
+        self.calc_worker = None
+        self.calc_btn.setEnabled(True)
+        self.cancel_btn.setVisible(False)
+        self.progress_bar.setVisible(False)
+
+    def on_calculation_finished(self, params, result, prices, counts):
+        self.finish_calculation()
+        try:
+            # 绘制图表
+            self.statusBar().showMessage("正在绘制图表...")
+            with 性能记录.profiling('绘图'):
+                self.plot_chip_distribution(prices, counts, self.perf)
+            
+            # 显示结果视图
+            self.result_widget.setVisible(True)
+            self.view_list_btn.setVisible(True)
+            
+            # 添加结果列表查看功能
+            self.view_list_btn.disconnect()
+            self.view_list_btn.clicked.connect(lambda: self.show_results(result, params))
+            self.runs = result
+            
+            self.statusBar().showMessage("计算完成，共生成 {} 行数据（{}）".format(
+                result.n_steps, self.perf.summary()))
+            self.perf.finish(params=params, rows=result.n_steps, prices=len(prices))
+            
+        except Exception as e:
+            self.on_calculation_failed(str(e))
+
+    def on_calculation_failed(self, message):
+        if self.calc_thread is not None:
+            self.finish_calculation()
+        QMessageBox.critical(self, "错误", f"计算过程中发生错误: {message}")
+        self.statusBar().showMessage("错误: " + message)
+
+    def on_calculation_cancelled(self):
+        self.finish_calculation()
+        self.statusBar().showMessage("计算已取消")
+
+    def show_results(self, data, params):
+        """显示完整结果列表窗口"""
+        # 表格按需展开可见行；有磁盘缓存且行数不大时直接内存映射读取逐行数据，
+        # 未命中时先用游程结果显示，同时在后台写入缓存。查找始终使用游程结果上的索引
+        recorder = 性能记录.Recorder("结果列表")
+        runs = data
+        with 性能记录.profiling('结果列表'):
+            if self.disk_cache is not None and params[3] <= DISK_CACHE_MAX_ROWS:
+                with recorder.stage('读取数据'):
+                    cached = self.disk_cache.load(*params)
+                if cached is not None:
+                    data = cached
+                else:
+                    self.store_in_cache(params, runs)
+            with recorder.stage('创建窗口'):
+                self.results_window = ResultsWindow(data, runs)
+            with recorder.stage('显示'):
+                self.results_window.show()
+        self.statusBar().showMessage(f"结果列表已打开（{recorder.summary()}）")
+        recorder.finish(params=params, rows=data.n_steps)
+
+    def store_in_cache(self, params, runs):
+        """在后台线程中把游程结果展开后写入磁盘缓存，上一次写入尚未结束时跳过"""
+        if self.cache_thread is not None:
+            return
+        self.cache_thread = QThread()
+        self.cache_worker = CacheWorker(self.disk_cache, params, runs)
+        self.cache_worker.moveToThread(self.cache_thread)
+        self.cache_thread.started.connect(self.cache_worker.run)
+        self.cache_worker.finished.connect(self.finish_cache_store)
+        self.cache_worker.failed.connect(self.on_cache_store_failed)
+        self.cache_thread.start()
+
+    def finish_cache_store(self):
+        """结束磁盘缓存的写入线程"""
+        if self.cache_thread is None:
+            return
+        self.cache_thread.quit()
+        self.cache_thread.wait()
+        self.cache_worker.deleteLater()
+        self.cache_thread.deleteLater()
+        self.cache_thread = None
+        self.cache_worker = None
+
+    def on_cache_store_failed(self, message):
+        self.finish_cache_store()
+        self.statusBar().showMessage("写入磁盘缓存失败（结果列表仍可正常使用）: " + message)
+
+    def toggle_profiling(self):
+        """隐藏快捷键Ctrl+Shift+P：开启或关闭cProfile和tracemalloc采集"""
+        if 性能记录.profile_modes():
+            性能记录.set_profile_modes([])
+            self.statusBar().showMessage("性能采集已关闭")
+        else:
+            性能记录.set_profile_modes(性能记录.PROFILE_MODES)
+            self.statusBar().showMessage("性能采集已开启（cProfile、tracemalloc），结果写入性能日志")
+
+    def toggle_live(self):
+        """开始或停止实时行情监控"""
+        if self.tick_thread is not None:
+            self.stop_live()
+            return
+        source = self.live_input.text().strip()
+        if self.runs is None or not source:
+            self.statusBar().showMessage("请先计算阶梯并输入行情文件路径或 主机:端口")
+            return
+        
+        # 只用已有的阶梯结果建立持仓状态，不重新计算
+        import 实时行情
+        self.monitor = 实时行情.PositionMonitor(self.runs)
+        self.live_status = None
+        self.live_latency = 0.0
+        self.tick_thread = QThread()
+        self.tick_worker = TickWorker(self.monitor, source)
+        self.tick_worker.moveToThread(self.tick_thread)
+        self.tick_thread.started.connect(self.tick_worker.run)
+        self.tick_worker.updated.connect(self.on_tick_update)
+        self.tick_worker.failed.connect(self.on_live_failed)
+        self.tick_worker.finished.connect(self.on_live_finished)
+        self.tick_thread.start()
+        self.live_btn.setText("停止监控")
+        self.statusBar().showMessage(f"正在监控实时行情: {source}")
+
+    def stop_live(self):
+        """停止实时行情监控，保留图上最后的状态"""
+        if self.tick_thread is None:
+            return
+        # 已停止的监控不再发出通知
+        self.tick_worker.blockSignals(True)
+        self.tick_worker.stop()
+        self.tick_thread.quit()
+        self.tick_thread.wait()
+        self.tick_worker.deleteLater()
+        self.tick_thread.deleteLater()
+        self.tick_thread = None
+        self.tick_worker = None
+        self.live_btn.setText("开始监控")
+
+    @性能记录.timed_handler('行情')
+    def on_tick_update(self):
+        """显示最新的持仓状态：只更新叠加层并局部重绘"""
+        worker = self.tick_worker
+        if worker is None:
+            return
+        worker.pending = False
+        received, state = worker.latest
+        info = self.monitor.details(state)
+        
+        self.chart.set_live(info['price'], info['strong'], info['next_price'])
+        self.canvas.blit_animated()
+        
+        # 数值显示在文字标签中，延迟为上一次从收到报价到完成重绘的时间
+        text = f"价格 {info['price']:.2f}  {info['status']}  持仓 {info['steps']} 步"
+        if info['distance'] is not None:
+            text += f"  距强平 {info['distance']:.2f}  保证金率 {info['margin_ratio'] or 0:.0%}"
+        if info['next_price'] is not None:
+            text += f"  下一加仓 {info['next_price']:.2f}"
+        self.live_label.setText(text + f"  延迟 {self.live_latency * 1000:.1f}ms")
+        self.live_latency = time.perf_counter() - received
+        
+        # 状态变化（建仓、警告、强平）时才更新状态栏
+        if info['status'] != self.live_status:
+            self.live_status = info['status']
+            self.statusBar().showMessage(f"实时行情: {info['status']}，持仓 {info['steps']} 步")
+
+    def on_live_failed(self, message):
+        self.stop_live()
+        self.statusBar().showMessage("实时行情错误: " + message)
+
+    def on_live_finished(self, count):
+        self.stop_live()
+        self.statusBar().showMessage(f"实时行情已结束，共 {count} 个报价")
+
+    def closeEvent(self, event):
+        self.stop_live()
+        if self.calc_thread is not None:
+            # 请求取消并等待后台线程结束，线程对象不能在运行中被销毁
+            self.calc_worker.blockSignals(True)
+            self.calc_worker.cancel()
+            self.finish_calculation()
+        if self.solve_thread is not None:
+            # 反求没有中途取消，等待本轮计算结束
+            self.solve_worker.blockSignals(True)
+            self.finish_solve()
+        if self.cache_thread is not None:
+            self.cache_worker.blockSignals(True)
+            self.finish_cache_store()
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.flush()
+            except OSError:
+                pass  # 最近使用时间只影响淘汰顺序
+        性能记录.flush_handler_stats()
+        super().closeEvent(event)
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    sys.exit(app.exec_())
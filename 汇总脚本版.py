@@ -1,103 +1,267 @@
-import math
-import matplotlib.pyplot as plt
-import numpy as np
-
-def generate_data():
-    # 输入参数
-    B2 = float(input("请输入初始价位(B2): "))   # 初始价位
-    H2 = float(input("请输入杠杆倍数(G2): "))        # 杠杆倍数
-    I2 = float(input("请输入新入价-强平距(I2): "))  # 新入价-强平距
-    J2 = int(input("请输入迭代次数(J2): "))     # 生成行数（改为int类型）
-
-    # 初始化数据结构
-    data_rows = [['序号','价位','筹码','均价','强平线','新入价-强平']]
-    prev_strong = None  # 记录上一行的强平线值
-    cumulative_sum = 0   # 累计求和
-
-    for i in range(1, J2 + 1):
-        # 计算当前行价格
-        if i == 1:
-            price = B2
-        else:
-            # 确保prev_strong有值
-            if prev_strong is None:
-                prev_strong = data_rows[-1][4]  # 从上一行获取强平线值
-            price = math.ceil(prev_strong) + I2  # 上行强平线向上取整
-        
-        chips = 1  # 筹码固定为1
-        cumulative_sum += price
-        average = cumulative_sum / i  # 计算累加均价
-        
-        # 避免除零错误（杠杆倍数至少为1）
-        lever = max(1.0, H2)
-        strong = average * (1 - 1/lever)  # 强平线计算
-        distance = price - strong  # 新价距离基本点
-        
-        # 更新为下轮准备的变量
-        prev_strong = strong
-        
-        # 添加到结果列表
-        row = [i, price, chips, average, strong, distance]
-        data_rows.append(row)   
-    return data_rows
-
-def plot_chip_distribution(data):
-    # 跳过表头行（第一行是标题，从第二行开始是数据）
-    data_rows = data[1:]  
-    
-    # 提取价位和筹码数据
-    positions = [row[1] for row in data_rows]
-    frequencies = [row[2] for row in data_rows]
-    
-    # 创建图表
-    plt.figure(figsize=(18, 6))
-    
-    # 绘制柱状图（直方图）
-    # 设置宽度为1避免重叠
-    plt.bar(range(len(positions)), frequencies, width=0.3, 
-            color='skyblue', edgecolor='black', alpha=0.7,
-            label='chip')
-    
-    # 绘制折线图（连接柱状图顶部）
-    plt.plot(range(len(positions)), frequencies, 
-             marker='o', markersize=8, color='red', linewidth=2,
-             label='chip line')
-    
-    # 添加数据标签
-    for i, freq in enumerate(frequencies):
-        plt.text(i, freq + 0.3, str(freq), 
-                 ha='center', va='bottom', fontsize=10)
-    
-    # 设置图表标题和标签
-    plt.title('lever lab', fontsize=16, pad=20)
-    plt.xlabel('price', fontsize=12)
-    plt.ylabel('chip', fontsize=12)
-    
-    # 设置x轴刻度
-    plt.xticks(range(len(positions)), 
-               [f"{pos:.1f}" for pos in positions], 
-               rotation=45)
-    
-    # 添加网格线和图例
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.legend()
-    
-    # 调整布局
-    plt.tight_layout()
-    
-    # 显示图表
-    plt.show()
-    print("图片已生成")
-
-# 主程序
-if __name__ == "__main__":
-    # 生成数据
-    result = generate_data()
-    
-    # 绘制图表
-    plot_chip_distribution(result)
-    
-    # 打印数据
-    print("\n详细数据:")
-    for row in result:
-        print(row)
+"""加仓阶梯脚本版
+
+不带参数运行时逐项提示输入并弹出图表窗口（原交互方式）；
+带参数时为命令行工具，结果以NDJSON或CSV流式写到标准输出，
+只有指定--plot时才导入matplotlib。
+
+示例:
+    python 汇总脚本版.py 100 10 10 50
+    python 汇总脚本版.py 100 10 10 50 --format csv --plot chips.png
+    python 汇总脚本版.py --scenarios 场景.csv --summary
+    python 汇总脚本版.py 100 10 1 50 --target 5 --budget 1000000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import 筹码引擎
+
+# 图上最多显示的柱数，行数更多时相邻行合并为一个柱
+MAX_BARS = 1000
+
+# 柱数不超过该值时才逐个标注数值
+MAX_LABELS = 100
+
+# 流式输出时每次展开的行数
+BLOCK_ROWS = 65536
+
+# 批量场景文件中的参数列
+PARAMS = ('B2', 'H2', 'I2', 'J2')
+
+# --summary输出的列
+SUMMARY_COLUMNS = ['B2', 'H2', 'I2', 'J2', '筹码单位数', '均价', '强平线', '新入价-强平']
+
+def generate_data():
+    # 输入参数
+    B2 = float(input("请输入初始价位(B2): "))   # 初始价位
+    H2 = float(input("请输入杠杆倍数(G2): "))        # 杠杆倍数
+    I2 = float(input("请输入新入价-强平距(I2): "))  # 新入价-强平距
+    J2 = int(input("请输入迭代次数(J2): "))     # 生成行数（改为int类型）
+
+    # 调用共用计算引擎
+    return 筹码引擎.generate_data(B2, H2, I2, J2)
+
+def chip_bars(data):
+    """按加仓顺序得到绘图的柱，返回(价位, 筹码)两个数组
+
+    行数过多时每group行合并为一个柱（价位取组内第一行，筹码求和），柱数不超过MAX_BARS。
+    data为LadderRuns时直接由游程计算，不展开逐行数据，内存与迭代次数无关。
+    """
+    import numpy as np  # 只有绘图用到
+    n = data.n_steps
+    group = -(-n // MAX_BARS)
+    if isinstance(data, 筹码引擎.LadderRuns):
+        starts = np.arange(0, n, max(1, group))
+        # 组内第一步所在游程的价位；筹码固定为1，组内筹码即组内步数
+        positions = data.prices[np.searchsorted(data.last_steps, starts + 1)]
+        frequencies = np.diff(np.append(starts, n))
+        return positions, frequencies
+    
+    # 直接使用引擎输出的价位和筹码列
+    positions = data.prices
+    frequencies = data.chips
+    if group > 1:
+        starts = np.arange(0, len(positions), group)
+        positions = positions[starts]
+        frequencies = np.add.reduceat(frequencies, starts)
+    return positions, frequencies
+
+def plot_chip_distribution(data, path=None):
+    """绘制筹码分布图；给定path时保存为图片文件，否则弹出窗口
+
+    data为LadderResult（逐行结果）或LadderRuns（游程结果）
+    """
+    if path:
+        import matplotlib
+        matplotlib.use('Agg')  # 保存文件时不需要图形界面
+    import matplotlib.pyplot as plt
+    
+    positions, frequencies = chip_bars(data)
+    
+    # 创建图表
+    plt.figure(figsize=(18, 6))
+    
+    # 绘制柱状图（直方图）
+    # 设置宽度为1避免重叠
+    plt.bar(range(len(positions)), frequencies, width=0.3, 
+            color='skyblue', edgecolor='black', alpha=0.7,
+            label='chip')
+    
+    # 绘制折线图（连接柱状图顶部）
+    plt.plot(range(len(positions)), frequencies, 
+             marker='o', markersize=8, color='red', linewidth=2,
+             label='chip line')
+    
+    # 添加数据标签（柱数较少时）
+    if len(frequencies) <= MAX_LABELS:
+        for i, freq in enumerate(frequencies):
+            plt.text(i, freq + 0.3, str(freq), 
+                     ha='center', va='bottom', fontsize=10)
+    
+    # 设置图表标题和标签
+    plt.title('lever lab', fontsize=16, pad=20)
+    plt.xlabel('price', fontsize=12)
+    plt.ylabel('chip', fontsize=12)
+    
+    # 设置x轴刻度（最多约MAX_LABELS个）
+    tick_step = max(1, len(positions) // MAX_LABELS)
+    plt.xticks(range(0, len(positions), tick_step), 
+               [f"{pos:.1f}" for pos in positions[::tick_step]], 
+               rotation=45)
+    
+    # 添加网格线和图例
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.legend()
+    
+    # 调整布局
+    plt.tight_layout()
+    
+    # 保存或显示图表
+    if path:
+        plt.savefig(path)
+        plt.close()
+        return
+    plt.show()
+    print("图片已生成")
+
+def read_scenarios(f):
+    """读取批量场景，每行一组(B2, H2, I2, J2)
+
+    首个非空字符为{时按JSONL读取，否则按带表头的CSV读取，列名为B2,H2,I2,J2。
+    """
+    text = f.read().lstrip('\ufeff')
+    if text.lstrip().startswith('{'):
+        records = (json.loads(line) for line in text.splitlines() if line.strip())
+    else:
+        records = csv.DictReader(text.splitlines())
+    
+    for number, record in enumerate(records, 1):
+        missing = [name for name in PARAMS if record.get(name) in (None, '')]
+        if missing:
+            raise ValueError(f"第{number}组场景缺少参数: {', '.join(missing)}")
+        yield (float(record['B2']), float(record['H2']), float(record['I2']),
+               int(record['J2']))
+
+class RecordWriter:
+    """把记录以NDJSON或CSV格式写到输出流（CSV只写一次表头）"""
+    def __init__(self, out, fmt, columns):
+        self.out = out
+        self.fmt = fmt
+        self.columns = columns
+        if fmt == 'csv':
+            self.writer = csv.writer(out, lineterminator='\n')
+            self.writer.writerow(columns)
+
+    def write(self, values):
+        if self.fmt == 'csv':
+            self.writer.writerow(values)
+        else:
+            self.out.write(json.dumps(dict(zip(self.columns, values)), ensure_ascii=False))
+            self.out.write('\n')
+
+def write_rows(writer, runs, prefix=()):
+    """按块展开游程结果并逐行输出，内存只与块大小有关"""
+    for start in range(0, runs.n_steps, BLOCK_ROWS):
+        block = runs.rows(start, start + BLOCK_ROWS)
+        for row in zip(*(col.tolist() for col in block.columns)):
+            writer.write(prefix + row)
+
+def summarize(params, runs):
+    """一组场景的汇总：参数、筹码单位数和最后一步的均价、强平线、新入价-强平"""
+    if runs.n_steps == 0:
+        return tuple(params) + (0, None, None, None)
+    last = runs.row(runs.n_steps - 1)
+    return tuple(params) + (runs.total_chips, last[3], last[4], last[5])
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="计算加仓阶梯，结果以NDJSON或CSV输出到标准输出")
+    parser.add_argument('params', nargs='*', type=float, metavar='B2 H2 I2 J2',
+                        help="初始价位、杠杆倍数、新入价-强平距、迭代次数")
+    parser.add_argument('-s', '--scenarios', type=argparse.FileType('r', encoding='utf-8'),
+                        help="批量场景文件（CSV或JSONL，列为B2,H2,I2,J2；-表示标准输入）")
+    parser.add_argument('-f', '--format', choices=['ndjson', 'csv'], default='ndjson',
+                        help="输出格式（默认ndjson）")
+    parser.add_argument('--summary', action='store_true',
+                        help="每组场景只输出一行汇总，不输出逐行数据")
+    parser.add_argument('--target', type=float, metavar='D',
+                        help="按目标边际计算每次加仓的单位数：每次加仓后新入价-强平不小于D")
+    parser.add_argument('--budget', type=float, metavar='U',
+                        help="与--target一起使用，总单位数上限")
+    parser.add_argument('--plot', nargs='?', const='', metavar='FILE',
+                        help="绘制筹码分布图：给定文件名时保存图片，否则弹出窗口（仅单组参数）")
+    args = parser.parse_args(argv)
+    
+    if args.scenarios is None and len(args.params) != 4:
+        parser.error("需要4个参数 B2 H2 I2 J2，或使用 --scenarios 指定场景文件")
+    if args.scenarios is not None and args.params:
+        parser.error("--scenarios 与 B2 H2 I2 J2 参数不能同时使用")
+    if args.scenarios is not None and args.plot is not None:
+        parser.error("--plot 只能用于单组参数")
+    if args.budget is not None and args.target is None:
+        parser.error("--budget 需要与 --target 一起使用")
+    if args.params and args.params[3] != int(args.params[3]):
+        parser.error("迭代次数(J2)必须为整数")
+    return parser, args
+
+def main(argv):
+    parser, args = parse_args(argv)
+    if args.scenarios is not None:
+        scenarios = read_scenarios(args.scenarios)
+    else:
+        B2, H2, I2, J2 = args.params
+        scenarios = [(B2, H2, I2, int(J2))]
+    
+    if args.summary:
+        writer = RecordWriter(sys.stdout, args.format, SUMMARY_COLUMNS)
+    elif args.scenarios is not None:
+        writer = RecordWriter(sys.stdout, args.format, ['场景'] + 筹码引擎.COLUMNS)
+    else:
+        writer = RecordWriter(sys.stdout, args.format, 筹码引擎.COLUMNS)
+    
+    try:
+        for number, params in enumerate(scenarios, 1):
+            if args.target is None:
+                runs = 筹码引擎.generate_runs(*params)
+            else:
+                import 求解器  # 只有--target用到，不拖慢普通输出的启动
+                B2, H2, I2, J2 = params
+                runs, stop = 求解器.chip_schedule(B2, H2, I2, args.target, J2, args.budget)
+                if stop != 求解器.STOP_ITERATIONS:
+                    print(f"第{number}组: {求解器.STOP_REASONS[stop]}，共加仓 {runs.n_steps} 次",
+                          file=sys.stderr)
+            if args.summary:
+                writer.write(summarize(params, runs))
+            else:
+                write_rows(writer, runs, (number,) if args.scenarios is not None else ())
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.plot is not None:
+        sys.stdout.flush()
+        plot_chip_distribution(runs, args.plot or None)
+        if args.plot:
+            print(f"图片已保存: {args.plot}", file=sys.stderr)
+
+# 主程序
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        try:
+            main(sys.argv[1:])
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # 下游提前关闭（如 | head），丢弃剩余输出
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(0)
+    
+    # 生成数据
+    result = generate_data()
+    
+    # 绘制图表
+    plot_chip_distribution(result)
+    
+    # 打印数据
+    print("\n详细数据:")
+    for row in result.to_rows():
+        print(row)
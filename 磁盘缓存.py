@@ -0,0 +1,187 @@
+"""加仓阶梯的磁盘缓存
+
+每组参数(B2, H2, I2)的逐行结果按列保存为.npy文件，另有index.json记录
+参数到目录的对应关系、已计算的行数、文件大小和最近使用时间。
+命中时用np.load(mmap_mode='r')内存映射读取，不复制数据，十万行也能瞬间打开。
+逐行结果由游程结果（generate_runs）展开，与未命中时窗口版直接显示的数值完全一致。
+
+更新条目时写入新的目录再切换索引，不在原处替换：旧目录可能仍被打开的结果列表
+内存映射（Windows下无法删除），删除失败的旧目录在下次打开缓存时清理。
+读取时只在内存中更新最近使用时间，随下一次保存或flush()写入索引。
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import numpy as np
+import 筹码引擎
+
+# 各列文件名，顺序与筹码引擎.COLUMNS一致
+FIELDS = ('steps', 'prices', 'chips', 'averages', 'strongs', 'distances')
+
+INDEX_FILE = 'index.json'
+
+# 缓存内容的格式版本，逐行结果的计算来源变化时递增，使旧条目失效
+# （1：generate_data逐步计算；2：由游程结果展开）
+CACHE_FORMAT = 2
+
+# 缓存创建的条目目录名：参数哈希，新版本带写入时间，未完成的带.tmp后缀
+ENTRY_FOLDER = re.compile(r'[0-9a-f]{16}(-[0-9a-f]+)?(\.tmp)?$')
+
+
+class DiskLadderCache:
+    """按(B2, H2, I2)保存逐行结果的磁盘缓存，可在多个线程中使用
+
+    参数:
+        directory: 缓存目录，不存在时自动创建
+        max_bytes: 缓存文件总大小上限，超出时按最近使用时间淘汰
+    """
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._dirty = False  # 内存中的最近使用时间尚未写入索引
+        self._index = self._read_index()
+        self._sweep()
+
+    def _read_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(path, encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = None
+        if (not index or index.get('version') != 筹码引擎.ENGINE_VERSION or
+                index.get('format') != CACHE_FORMAT):
+            # 计算公式或缓存格式变化（或索引损坏）时清空旧的缓存
+            index = {'version': 筹码引擎.ENGINE_VERSION, 'format': CACHE_FORMAT, 'entries': {}}
+        return index
+
+    @staticmethod
+    def _folder(name, entry):
+        return entry.get('folder', name)
+
+    def _sweep(self):
+        # 删除索引中没有的条目目录：旧版本的条目、被替换后未能删除的旧目录和未完成的临时目录
+        used = {self._folder(name, entry) for name, entry in self._index['entries'].items()}
+        for folder in os.listdir(self.directory):
+            path = os.path.join(self.directory, folder)
+            if folder not in used and ENTRY_FOLDER.match(folder) and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _write_index(self):
+        # 先写临时文件再替换，避免中途退出导致索引损坏
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._dirty = False
+
+    def flush(self):
+        """把读取时更新的最近使用时间写入索引"""
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    @staticmethod
+    def _entry_name(B2, H2, I2):
+        key = '|'.join(repr(float(value)) for value in (B2, H2, I2))
+        return hashlib.sha1(key.encode('ascii')).hexdigest()[:16]
+
+    @property
+    def nbytes(self):
+        return sum(entry['bytes'] for entry in self._index['entries'].values())
+
+    def load(self, B2, H2, I2, J2):
+        """读取前J2行，缓存中没有足够的行数时返回None"""
+        J2 = max(0, int(J2))
+        name = self._entry_name(B2, H2, I2)
+        with self._lock:
+            entry = self._index['entries'].get(name)
+            if entry is None or entry['n'] < J2:
+                return None
+            folder = os.path.join(self.directory, self._folder(name, entry))
+            try:
+                columns = [np.load(os.path.join(folder, field + '.npy'), mmap_mode='r')[:J2]
+                           for field in FIELDS]
+            except (OSError, ValueError):
+                # 文件缺失或损坏，丢弃该条目
+                self._remove(name)
+                self._write_index()
+                return None
+            entry['atime'] = time.time()
+            self._dirty = True
+        return 筹码引擎.LadderResult(*columns)
+
+    def store(self, B2, H2, I2, result):
+        """保存逐行结果（由游程结果展开的LadderResult），已有更长的结果时不覆盖"""
+        name = self._entry_name(B2, H2, I2)
+        with self._lock:
+            entry = self._index['entries'].get(name)
+            if entry is not None and entry['n'] >= len(result):
+                return
+
+        # 写入临时目录后改名为新的版本目录，不覆盖仍可能被内存映射的旧目录
+        folder = f'{name}-{time.time_ns():x}'
+        tmp_path = os.path.join(self.directory, folder + '.tmp')
+        os.makedirs(tmp_path)
+        try:
+            for field, column in zip(FIELDS, result.columns):
+                np.save(os.path.join(tmp_path, field + '.npy'), np.ascontiguousarray(column))
+            os.replace(tmp_path, os.path.join(self.directory, folder))
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        with self._lock:
+            old = self._index['entries'].get(name)
+            if old is not None and old['n'] >= len(result):
+                # 其他线程已保存了更长的结果
+                shutil.rmtree(os.path.join(self.directory, folder), ignore_errors=True)
+                return
+            self._index['entries'][name] = {
+                'params': [float(B2), float(H2), float(I2)],
+                'n': len(result),
+                'bytes': sum(column.nbytes for column in result.columns),
+                'atime': time.time(),
+                'folder': folder,
+            }
+            self._evict(keep=name)
+            self._write_index()
+            if old is not None:
+                shutil.rmtree(os.path.join(self.directory, self._folder(name, old)),
+                              ignore_errors=True)
+
+    def data(self, B2, H2, I2, J2):
+        """读取缓存，未命中时计算并保存"""
+        result = self.load(B2, H2, I2, J2)
+        if result is None:
+            result = 筹码引擎.generate_runs(B2, H2, I2, J2).expand()
+            self.store(B2, H2, I2, result)
+        return result
+
+    def _remove(self, name):
+        entry = self._index['entries'].pop(name, None)
+        if entry is not None:
+            shutil.rmtree(os.path.join(self.directory, self._folder(name, entry)),
+                          ignore_errors=True)
+
+    def _evict(self, keep=None):
+        # 按最近使用时间从旧到新淘汰，直到总大小不超过上限
+        entries = self._index['entries']
+        for name in sorted(entries, key=lambda n: entries[n]['atime']):
+            if self.nbytes <= self.max_bytes:
+                break
+            if name != keep:
+                self._remove(name)
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._index['entries']):
+                self._remove(name)
+            self._write_index()
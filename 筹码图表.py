@@ -0,0 +1,402 @@
+"""筹码分布图
+
+ChipChart在同一个Figure上只创建一次坐标轴、柱、折线和悬停提示，
+重新计算后原地更新数据；坐标范围不变时不重新排版。
+所有柱放在一个PolyCollection中，柱的个数不影响图上元素的个数。
+价位范围很宽时按HistogramPyramid合并相邻价位，缩放、拖动后按可见范围
+和像素宽度重新选择桶宽，图上的柱数始终有上限。
+"""
+import numpy as np
+from PyQt5.QtCore import Qt, QPoint, QRect
+from PyQt5.QtGui import QPainter
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.collections import PolyCollection
+from matplotlib.ticker import MaxNLocator
+import 性能记录
+
+# 柱宽（占桶宽的比例）
+BAR_WIDTH = 0.8
+
+# 可见范围内最多显示的柱数
+MAX_BARS = 1000
+
+# 每个桶至少占的像素数
+MIN_BUCKET_PIXELS = 2
+
+
+def bar_vertices(prices, counts, width=BAR_WIDTH):
+    """各柱的四个顶点，形状为(n, 4, 2)"""
+    left = prices - width / 2
+    right = prices + width / 2
+    zeros = np.zeros(len(prices))
+    xs = np.column_stack((left, left, right, right))
+    ys = np.column_stack((zeros, counts, counts, zeros))
+    return np.stack((xs, ys), axis=-1)
+
+
+class HistogramPyramid:
+    """多分辨率筹码直方图
+
+    第0层为原始的(价位, 筹码)；第k层从最低整数价位origin起把价位按2**k
+    合并为一个桶，键为(价位-origin)整除2**k。各层在创建时用np.unique和
+    np.bincount一次算好。
+
+    参数:
+        prices (ndarray): 升序排列的价位
+        counts (ndarray): 对应价位的筹码数
+    """
+    def __init__(self, prices, counts):
+        self.levels = [(np.asarray(prices), np.asarray(counts))]
+        keys = np.floor(prices).astype(np.int64)
+        self.origin = keys[0] if len(keys) else 0
+        keys = keys - self.origin  # 键非负，整除后最终合并为一个桶
+        while len(keys) > 1:
+            keys, inverse = np.unique(keys // 2, return_inverse=True)
+            values = np.bincount(inverse, weights=self.levels[-1][1])
+            self.levels.append((keys, values.astype(np.int64)))
+
+    def _bounds(self, level, xmin, xmax):
+        """第level层中与价位范围[xmin, xmax]相交的桶的下标范围"""
+        keys = self.levels[level][0]
+        if level == 0:
+            return (np.searchsorted(keys, xmin, side='left'),
+                    np.searchsorted(keys, xmax, side='right'))
+        width = 2 ** level
+        return (np.searchsorted(keys, np.floor((xmin - self.origin) / width), side='left'),
+                np.searchsorted(keys, np.floor((xmax - self.origin) / width), side='right'))
+
+    def level_for(self, xmin, xmax, pixels):
+        """可见范围内柱数不超过MAX_BARS、且每个桶不窄于MIN_BUCKET_PIXELS像素的最细一层"""
+        span = max(xmax - xmin, 1e-9)
+        for level in range(len(self.levels)):
+            if 2 ** level * pixels < MIN_BUCKET_PIXELS * span:
+                continue
+            lo, hi = self._bounds(level, xmin, xmax)
+            if hi - lo <= MAX_BARS:
+                return level
+        return len(self.levels) - 1
+
+    def view(self, level, xmin, xmax):
+        """第level层在[xmin, xmax]内的桶，返回(桶中心价位, 筹码, 桶宽, 下标范围)"""
+        keys, values = self.levels[level]
+        lo, hi = self._bounds(level, xmin, xmax)
+        if level == 0:
+            return keys[lo:hi], values[lo:hi], 1, (lo, hi)
+        width = 2 ** level
+        centers = self.origin + keys[lo:hi] * width + (width - 1) / 2
+        return centers, values[lo:hi], width, (lo, hi)
+
+
+class ChipChart:
+    """筹码分布图，图上元素只创建一次
+
+    参数:
+        figure: 绘图用的matplotlib Figure
+    """
+    def __init__(self, figure):
+        self.figure = figure
+        self.ax = None
+        self.bars = None
+        self.line = None
+        self.annotation = None
+        self.live_lines = None      # 实时行情叠加层：当前价、强平线、下一加仓价
+        self.points = None          # 当前显示的(价位, 筹码)，价位升序
+        self.pyramid = None
+        self.level = 0              # 当前显示的层，桶宽为2**level
+        self._view_key = None
+        self.hover_point = None
+        self.original_xlim = None
+        self.original_ylim = None
+        self._layout_key = None
+
+    def _build(self):
+        """创建坐标轴和各元素"""
+        ax = self.figure.add_subplot(111)
+
+        # 柱状图
+        self.bars = PolyCollection([], facecolors='skyblue', alpha=0.8,
+                                   linewidths=0, label='chip')
+        ax.add_collection(self.bars)
+
+        # 折线图（突出趋势）
+        self.line, = ax.plot([], [], 'ro-', linewidth=1.5, markersize=4, label='chip line')
+
+        # 设置坐标轴
+        ax.set_title('chips', fontsize=14)
+        ax.set_xlabel('price', fontsize=12)
+        ax.set_ylabel('chip', fontsize=12)
+        ax.grid(axis='y', alpha=0.3)
+
+        # 设置简洁的网格和边框
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+        # 添加图例
+        ax.legend()
+
+        # 悬停提示，之后只改位置和文字
+        self.annotation = ax.annotate(
+            '',
+            xy=(0, 0),
+            xytext=(0, 15),
+            textcoords='offset points',
+            arrowprops=dict(arrowstyle="->", connectionstyle="arc3"),
+            bbox=dict(boxstyle="round", fc="w", alpha=0.9),
+            visible=False
+        )
+
+        # 实时行情叠加层，只通过局部重绘更新（数值由界面的文字标签显示，逐帧绘制文字太慢）
+        self.live_lines = {
+            'price': ax.axvline(0, color='#3366ff', linewidth=1.2, visible=False),
+            'strong': ax.axvline(0, color='red', linestyle='--', linewidth=1, visible=False),
+            'next': ax.axvline(0, color='green', linestyle=':', linewidth=1, visible=False),
+        }
+        self.ax = ax
+        
+        # 缩放、拖动改变横坐标范围后按新范围重新选择桶宽
+        ax.callbacks.connect('xlim_changed', lambda ax: self.refresh())
+
+    def refresh(self):
+        """按当前横坐标范围和坐标轴像素宽度选择层，只显示可见范围附近的桶"""
+        if self.pyramid is None:
+            return
+        xmin, xmax = self.ax.get_xlim()
+        level = self.pyramid.level_for(xmin, xmax, self.ax.bbox.width)
+        # 左右各多取半个可见范围，小幅拖动后不会露出空白
+        margin = (xmax - xmin) / 2
+        centers, counts, width, bounds = self.pyramid.view(level, xmin - margin, xmax + margin)
+        view_key = (level, bounds)
+        if view_key == self._view_key:
+            return
+        self._view_key = view_key
+        self.level = level
+        
+        self.bars.set_verts(bar_vertices(centers, counts, BAR_WIDTH * width))
+        self.line.set_data(centers, counts)
+        self.points = (centers, counts)
+        self.set_hover(None)
+
+    def update(self, prices, counts, recorder=None):
+        """原地更新柱和折线的数据，返回是否重新排版
+
+        参数:
+            prices (ndarray): 升序排列的价位
+            counts (ndarray): 对应价位的筹码数
+            recorder: 性能记录.Recorder，给定时记录各阶段耗时
+        """
+        prices = np.asarray(prices)
+        counts = np.asarray(counts)
+        if self.ax is None:
+            self._build()
+        self.ax.set_visible(True)
+
+        # 多分辨率直方图只在数据变化时计算一次
+        with 性能记录.stage(recorder, '分桶'):
+            self.pyramid = HistogramPyramid(prices, counts)
+            self._view_key = None
+
+        with 性能记录.stage(recorder, '更新图元'):
+            # 保存原始坐标轴范围，纵坐标按整体视图所用的桶宽计算
+            self.original_xlim = (prices[0] - 5, prices[-1] + 5)
+            self.ax.set_xlim(*self.original_xlim)
+            self.refresh()
+            self.original_ylim = (0, self.points[1].max() * 1.1)
+            self.ax.set_ylim(*self.original_ylim)
+
+            # 优化横坐标显示：整体视图已合并价位时由matplotlib自动选择整数刻度
+            if self.level > 0:
+                self.ax.xaxis.set_major_locator(MaxNLocator(10, integer=True))
+            elif len(prices) > 10:
+                step = max(1, len(prices) // 10)
+                self.ax.set_xticks(prices[::step])
+            else:
+                self.ax.set_xticks(prices)
+
+        # 坐标范围变化时才重新计算紧凑布局
+        layout_key = (self.original_xlim, self.original_ylim)
+        if layout_key == self._layout_key:
+            return False
+        with 性能记录.stage(recorder, '排版'):
+            self.figure.tight_layout()
+        self._layout_key = layout_key
+        return True
+
+    def animated_artists(self):
+        """只通过局部重绘更新的元素：悬停提示和实时行情叠加层"""
+        if self.ax is None:
+            return []
+        return [self.annotation, *self.live_lines.values()]
+
+    def set_live(self, price=None, strong=None, next_price=None):
+        """更新实时行情叠加层的三条竖线，各项为None时隐藏对应的线"""
+        if self.ax is None:
+            return
+        for name, x in (('price', price), ('strong', strong), ('next', next_price)):
+            line = self.live_lines[name]
+            if x is None:
+                line.set_visible(False)
+            else:
+                line.set_xdata([x, x])
+                line.set_visible(True)
+
+    def clear(self):
+        """清空数据并隐藏坐标轴，图上元素保留以便下次更新"""
+        if self.ax is None:
+            return
+        self.set_live()
+        self.bars.set_verts([])
+        self.line.set_data([], [])
+        self.points = None
+        self.pyramid = None
+        self._view_key = None
+        self.set_hover(None)
+        self.ax.set_visible(False)
+        self.original_xlim = None
+        self.original_ylim = None
+
+    def point_near(self, x, y, radius):
+        """离显示坐标(x, y)最近且在radius像素以内的数据点，没有时返回None
+
+        数据点按价位升序排列，先二分查找横向阈值内的点，
+        只对这些候选点换算像素坐标并找出最近点，与缩放比例无关。
+        """
+        if self.points is None:
+            return None
+        xs, ys = self.points
+
+        # 横向阈值换算为价位范围，二分查找候选点
+        inverse = self.ax.transData.inverted()
+        x_lo = inverse.transform((x - radius, y))[0]
+        x_hi = inverse.transform((x + radius, y))[0]
+        lo = np.searchsorted(xs, min(x_lo, x_hi), side='left')
+        hi = np.searchsorted(xs, max(x_lo, x_hi), side='right')
+        if lo == hi:
+            return None
+
+        # 在像素坐标下寻找最近的候选点
+        pixels = self.ax.transData.transform(np.column_stack((xs[lo:hi], ys[lo:hi])))
+        distances = (pixels[:, 0] - x) ** 2 + (pixels[:, 1] - y) ** 2
+        closest = int(np.argmin(distances))
+        if distances[closest] < radius ** 2:
+            return (xs[lo + closest], ys[lo + closest])
+        return None
+
+    def set_hover(self, point):
+        """在point处显示悬停提示，point为None时隐藏，返回提示是否有变化"""
+        if self.annotation is None or point == self.hover_point:
+            return False
+        self.hover_point = point
+        if point is None:
+            self.annotation.set_visible(False)
+        else:
+            self.annotation.xy = point
+            self.annotation.set_text(f'({point[0]:.1f}, {point[1]:.1f})')
+            self.annotation.set_visible(True)
+        return True
+
+
+class CustomCanvas(FigureCanvas):
+    """自定义画布类，支持拖拽功能
+
+    悬停提示等动态元素设为animated，只在缓存的背景上重绘这些元素（blit）；
+    拖拽时平移缓存的图像，松开鼠标后才按新的坐标范围完整重绘一次。
+    """
+    def __init__(self, figure):
+        super().__init__(figure)
+        # 拖拽相关变量
+        self.dragging = False
+        self.last_pos = QPoint()
+        self.drag_offset = QPoint()
+        self.drag_pixmap = None
+        self.setCursor(Qt.ArrowCursor)  # 默认箭头光标
+        
+        # 局部重绘相关变量
+        self.background = None
+        self.animated_artists = []
+        self.mpl_connect('draw_event', self.on_draw)
+
+    def set_animated_artists(self, artists):
+        """设置只通过局部重绘更新的元素"""
+        for artist in artists:
+            artist.set_animated(True)
+        self.animated_artists = list(artists)
+
+    def on_draw(self, event):
+        """完整重绘后缓存背景，并画上动态元素"""
+        self.background = self.copy_from_bbox(self.figure.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in self.animated_artists:
+            if artist.figure is self.figure:
+                self.figure.draw_artist(artist)
+
+    def blit_animated(self):
+        """在缓存的背景上只重绘动态元素"""
+        if self.background is None:
+            self.draw_idle()
+            return
+        self.restore_region(self.background)
+        self.draw_animated()
+        self.blit(self.figure.bbox)
+
+    def axes_rect(self, ax):
+        """坐标轴区域在控件中的矩形（逻辑像素）"""
+        ratio = self.device_pixel_ratio
+        x0, y0, x1, y1 = ax.bbox.extents
+        return QRect(int(x0 / ratio), int(self.height() - y1 / ratio),
+                     int((x1 - x0) / ratio), int((y1 - y0) / ratio))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.figure.axes:
+            self.dragging = True
+            self.last_pos = event.pos()
+            self.drag_offset = QPoint()
+            self.drag_pixmap = self.grab()  # 拖拽期间平移这张图像
+            self.setCursor(Qt.ClosedHandCursor)  # 拖拽时显示抓手光标
+        super().mousePressEvent(event)
+
+    @性能记录.timed_handler('拖拽')
+    def mouseMoveEvent(self, event):
+        if self.dragging:
+            # 只记录移动距离，重绘平移后的图像
+            self.drag_offset = event.pos() - self.last_pos
+            self.update()
+        super().mouseMoveEvent(event)
+
+    def paintEvent(self, event):
+        if not self.dragging or self.drag_pixmap is None:
+            super().paintEvent(event)
+            return
+        # 坐标轴以外保持不动，坐标轴内显示平移后的图像
+        rect = self.axes_rect(self.figure.axes[0])
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.drag_pixmap)
+        painter.setClipRect(rect)
+        painter.fillRect(rect, Qt.white)
+        painter.drawPixmap(self.drag_offset, self.drag_pixmap)
+        painter.end()
+
+    @性能记录.timed_handler('拖拽结束')
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self.dragging:
+            self.dragging = False
+            self.drag_pixmap = None
+            self.setCursor(Qt.OpenHandCursor)  # 释放后显示打开的手形光标
+            
+            # 按总移动距离计算新的坐标范围，完整重绘一次
+            dx = self.drag_offset.x()
+            dy = self.drag_offset.y()
+            if dx or dy:
+                ax = self.figure.axes[0]
+                xlim = ax.get_xlim()
+                ylim = ax.get_ylim()
+                rect = self.axes_rect(ax)
+                scale_x = (xlim[1] - xlim[0]) / max(1, rect.width())
+                scale_y = (ylim[1] - ylim[0]) / max(1, rect.height())
+                ax.set_xlim(xlim[0] - dx * scale_x, xlim[1] - dx * scale_x)
+                ax.set_ylim(ylim[0] + dy * scale_y, ylim[1] + dy * scale_y)
+                self.draw_idle()
+            else:
+                self.update()
+        super().mouseReleaseEvent(event)
@@ -0,0 +1,652 @@
+"""杠杆筹码计算引擎
+
+不依赖Qt和matplotlib，窗口版与脚本版共用同一套计算逻辑。
+计算结果按列存储为连续的NumPy数组，避免逐行构建Python列表。
+"""
+import bisect
+import math
+from collections import OrderedDict
+import numpy as np
+
+# 结果列名（与原表头一致）
+COLUMNS = ['序号', '价位', '筹码', '均价', '强平线', '新入价-强平']
+
+# 按价位查找时视为相等的误差
+PRICE_TOLERANCE = 1e-9
+
+# 计算公式版本号，修改generate_data的计算方式时递增，使磁盘缓存中的旧结果失效
+ENGINE_VERSION = 1
+
+
+class CalculationCancelled(Exception):
+    """进度回调返回False时中止计算"""
+
+
+class LadderResult:
+    """列式存储的加仓阶梯结果
+
+    每一列都是连续的NumPy数组:
+        steps     序号 (int64)
+        prices    价位 (float64)
+        chips     筹码 (int64)
+        averages  均价 (float64)
+        strongs   强平线 (float64)
+        distances 新入价-强平 (float64)
+    """
+    def __init__(self, steps, prices, chips, averages, strongs, distances):
+        self.steps = steps
+        self.prices = prices
+        self.chips = chips
+        self.averages = averages
+        self.strongs = strongs
+        self.distances = distances
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def n_steps(self):
+        return len(self.steps)
+
+    @property
+    def total_chips(self):
+        """筹码单位总数"""
+        return int(self.chips.sum())
+
+    @property
+    def columns(self):
+        """按COLUMNS顺序返回所有列"""
+        return (self.steps, self.prices, self.chips,
+                self.averages, self.strongs, self.distances)
+
+    def column(self, name):
+        """按中文列名获取整列数据"""
+        return self.columns[COLUMNS.index(name)]
+
+    def row(self, index):
+        """获取第index行（从0开始）的数据，返回Python数值列表"""
+        return [col[index].item() for col in self.columns]
+
+    def rows(self, start, stop):
+        """第start到stop-1行（从0开始）的LadderResult，各列为视图"""
+        return LadderResult(*(col[start:stop] for col in self.columns))
+
+    def to_rows(self):
+        """转换为旧版的二维列表格式（第一行为表头）"""
+        rows = [list(COLUMNS)]
+        rows.extend(map(list, zip(*(col.tolist() for col in self.columns))))
+        return rows
+
+
+def _fill_ladder(B2, factor, I2, prices, averages, strongs, start, cumulative_sum, strong):
+    """逐步递推并填充预分配的价位、均价、强平线数组
+
+    从第start+1步开始计算，cumulative_sum和strong为第start步结束时的累计和与强平线，
+    返回填充完成后新的(累计和, 强平线)，便于之后继续向后计算。
+    每一步依赖上一步的强平线，只能顺序计算。安装了numba时该函数会被即时编译。
+    """
+    for j in range(len(prices)):
+        i = start + j + 1
+        # 计算当前行价格
+        if i == 1:
+            price = B2
+        else:
+            price = math.ceil(strong) + I2  # 上行强平线向上取整
+
+        cumulative_sum += price
+        average = cumulative_sum / i  # 计算累加均价
+        strong = average * factor     # 强平线计算
+
+        prices[j] = price
+        averages[j] = average
+        strongs[j] = strong
+    return cumulative_sum, strong
+
+
+def _fill_ladder_ticks(b_ticks, num, den, i_ticks, price_ticks):
+    """整数tick版本的递推，填充预分配的价位数组（单位为tick）
+
+    强平线 = 累计和 / 步数 * num / den，其中 num / den = 1 - 1/杠杆倍数。
+    累计和与强平线向上取整都使用精确的整数运算，不受浮点舍入影响。
+    """
+    cumulative_sum = 0  # 累计求和
+    ceil_strong = 0     # 上一行强平线向上取整
+    for i in range(1, len(price_ticks) + 1):
+        # 计算当前行价格
+        if i == 1:
+            price = b_ticks
+        else:
+            price = ceil_strong + i_ticks
+
+        cumulative_sum += price
+        # 整数向上取整除法
+        ceil_strong = -((-cumulative_sum * num) // (i * den))
+
+        price_ticks[i - 1] = price
+
+
+# 递推核心函数，首次调用时决定使用numba编译版本还是纯Python版本
+_kernels = None
+
+
+def _get_kernels():
+    """返回(浮点递推, 整数tick递推)核心函数，numba未安装时回退到纯Python循环"""
+    global _kernels
+    if _kernels is None:
+        try:
+            from numba import njit
+        except ImportError:
+            _kernels = (_fill_ladder, _fill_ladder_ticks)
+        else:
+            jit = njit(cache=True, nogil=True)
+            _kernels = (jit(_fill_ladder), jit(_fill_ladder_ticks))
+    return _kernels
+
+
+def _exact(value):
+    """把输入的数值按其十进制写法转换为精确分数（如 0.1 -> 1/10）"""
+    from fractions import Fraction  # 只有tick模式用到，延迟导入以加快启动
+    return Fraction(str(value))
+
+
+def _generate_ticks(B2, H2, I2, J2, tick):
+    """整数tick模式的generate_data，价位按tick对齐并精确计算"""
+    tick = _exact(tick)
+    if tick <= 0:
+        raise ValueError("tick必须大于0")
+
+    # 初始价位与新入价-强平距对齐到最近的tick
+    b_ticks = round(_exact(B2) / tick)
+    i_ticks = round(_exact(I2) / tick)
+
+    # 避免除零错误（杠杆倍数至少为1）
+    lever = max(_exact(1), _exact(H2))
+    factor = 1 - 1/lever
+    num, den = factor.numerator, factor.denominator
+
+    # 价位单调趋近不动点（约为 I2 * 杠杆倍数），据此估计中间结果的上界，
+    # 超出int64范围时使用Python整数计算
+    bound = max(abs(b_ticks), (abs(i_ticks) + 1) * math.ceil(lever)) + abs(i_ticks) + 1
+    fits_int64 = (J2 + 1) * bound * max(num, den) < 2**62
+
+    price_ticks = np.empty(J2, dtype=np.int64)
+    kernel = _get_kernels()[1] if fits_int64 else _fill_ladder_ticks
+    kernel(b_ticks, num, den, i_ticks, price_ticks)
+
+    # 由精确的tick价位换算出各列（累计和为精确整数）
+    steps = np.arange(1, J2 + 1, dtype=np.int64)
+    sums = np.cumsum(price_ticks)
+    prices = price_ticks * tick.numerator / tick.denominator
+    averages = sums * tick.numerator / (steps * tick.denominator)
+    strongs = averages * (num / den)
+    chips = np.ones(J2, dtype=np.int64)  # 筹码固定为1
+    return LadderResult(steps, prices, chips, averages, strongs, prices - strongs)
+
+
+def generate_data(B2, H2, I2, J2, tick=None):
+    """计算加仓阶梯
+
+    参数:
+        B2: 初始价位
+        H2: 杠杆倍数
+        I2: 新入价-强平距
+        J2: 迭代次数（生成行数）
+        tick: 最小价格变动单位。默认None为浮点模式（强平线向上取整到整数）；
+              给定tick时使用精确整数模式，价位对齐到tick，强平线向上取整到tick
+
+    返回:
+        LadderResult: 列式存储的计算结果
+    """
+    J2 = max(0, int(J2))
+    if tick is not None:
+        return _generate_ticks(B2, H2, I2, J2, tick)
+
+    state = _StepsState(B2, H2, I2)
+    state.extend(J2)
+    return state.build(J2)
+
+
+class _StepsState:
+    """generate_data的中间状态：已计算的各列数组及继续递推所需的累计和、强平线"""
+    def __init__(self, B2, H2, I2):
+        self.B2 = float(B2)
+        self.I2 = float(I2)
+        # 避免除零错误（杠杆倍数至少为1）
+        lever = max(1.0, H2)
+        self.factor = float(1 - 1/lever)
+
+        self.n = 0                 # 已计算的步数
+        self.cumulative_sum = 0.0  # 累计求和
+        self.strong = 0.0          # 最后一行的强平线值
+        # 按COLUMNS顺序的预分配数组，容量不足时按倍数扩容
+        self.buffers = [np.empty(0, dtype=dtype) for dtype in
+                        (np.int64, np.float64, np.int64, np.float64, np.float64, np.float64)]
+
+    @property
+    def nbytes(self):
+        return sum(buf.nbytes for buf in self.buffers)
+
+    def extend(self, J2):
+        """继续计算到第J2步，只计算缺少的部分"""
+        n = self.n
+        if J2 <= n:
+            return
+        capacity = len(self.buffers[0])
+        if J2 > capacity:
+            capacity = max(J2, 2 * capacity)
+            grown = []
+            for buf in self.buffers:
+                new_buf = np.empty(capacity, dtype=buf.dtype)
+                new_buf[:n] = buf[:n]
+                grown.append(new_buf)
+            self.buffers = grown
+
+        steps, prices, chips, averages, strongs, distances = self.buffers
+        self.cumulative_sum, self.strong = _get_kernels()[0](
+            self.B2, self.factor, self.I2, prices[n:J2], averages[n:J2], strongs[n:J2],
+            n, self.cumulative_sum, self.strong)
+        steps[n:J2] = np.arange(n + 1, J2 + 1)
+        chips[n:J2] = 1  # 筹码固定为1
+        np.subtract(prices[n:J2], strongs[n:J2], out=distances[n:J2])  # 新价距离基本点
+        self.n = J2
+
+    def build(self, J2):
+        """返回前J2步（不超过已计算的步数）的LadderResult，各列为数组视图"""
+        return LadderResult(*(buf[:J2] for buf in self.buffers))
+
+
+class LadderRuns:
+    """游程压缩的加仓阶梯
+
+    连续若干步价位相同的区间合并为一个游程，按步数顺序存储:
+        prices       游程价位 (float64)
+        counts       游程步数 (int64)
+        first_steps  游程第一步的序号 (int64)
+        last_steps   游程最后一步的序号 (int64)
+        sums_before  游程开始前的累计和 (float64)
+
+    内存占用只与不同价位的个数有关。逐步的均价、强平线等由累计和解析得到，
+    需要逐行数据时再通过rows()/expand()按需展开。
+    """
+    def __init__(self, prices, counts, first_steps, last_steps, sums_before,
+                 total_sum, factor, saturated=False):
+        self.prices = prices
+        self.counts = counts
+        self.first_steps = first_steps
+        self.last_steps = last_steps
+        self.sums_before = sums_before
+        self.factor = factor
+        self.saturated = saturated  # 最后一个价位是否会永远保持不变
+        self.n_steps = int(last_steps[-1]) if len(last_steps) else 0
+        self.total_sum = total_sum
+        # 查询用的索引，首次查询时建立
+        self._price_order = None
+        self._run_distance_min = None
+        if self.n_steps:
+            self.final_average = total_sum / self.n_steps
+            self.final_strong = self.final_average * factor
+        else:
+            self.final_average = 0.0
+            self.final_strong = 0.0
+
+    def __len__(self):
+        return len(self.prices)
+
+    @property
+    def total_chips(self):
+        """筹码单位总数（筹码固定为1）"""
+        return self.n_steps
+
+    def sorted_runs(self):
+        """按价位升序返回 (价位, 筹码, 第一步, 最后一步) 四个数组"""
+        order = np.argsort(self.prices, kind='stable')
+        return (self.prices[order], self.counts[order],
+                self.first_steps[order], self.last_steps[order])
+
+    def histogram(self):
+        """按整数价位（向零取整）统计筹码，返回按价位升序的(价位, 筹码)数组"""
+        prices, counts, _, _ = self.sorted_runs()
+        int_prices = np.trunc(prices).astype(np.int64)
+        # 价位互不相同，只有初始价位可能与相邻价位落在同一个整数桶里
+        keys, starts = np.unique(int_prices, return_index=True)
+        if len(keys) == len(int_prices):
+            return keys, counts
+        return keys, np.add.reduceat(counts, starts)
+
+    def _at(self, steps):
+        """第steps步（从1开始的数组）的价位、均价、强平线"""
+        steps = np.asarray(steps, dtype=np.int64)
+        run = np.searchsorted(self.last_steps, steps)
+        prices = self.prices[run]
+        sums = self.sums_before[run] + (steps - self.first_steps[run] + 1) * prices
+        averages = sums / steps
+        return prices, averages, averages * self.factor
+
+    def rows(self, start, stop):
+        """展开第start到stop-1行（从0开始）为LadderResult"""
+        start = max(0, start)
+        stop = min(stop, self.n_steps)
+        steps = np.arange(start + 1, max(start, stop) + 1, dtype=np.int64)
+        prices, averages, strongs = self._at(steps)
+        chips = np.ones(len(steps), dtype=np.int64)  # 筹码固定为1
+        return LadderResult(steps, prices, chips, averages, strongs, prices - strongs)
+
+    def levels(self):
+        """按加仓顺序列出各价位档，返回(价位, 累计步数, 均价, 强平线)四个数组
+
+        同一价位的各步一起成交，累计步数、均价和强平线都取该价位最后一步的值。
+        """
+        prices, averages, strongs = self._at(self.last_steps)
+        return prices, self.last_steps, averages, strongs
+
+    def _distance(self, step):
+        """第step步的新入价-强平"""
+        prices, _, strongs = self._at([step])
+        return prices[0] - strongs[0]
+
+    def _strong(self, step):
+        """第step步的强平线"""
+        return self._at([step])[2][0]
+
+    def steps_at_price(self, price):
+        """价位等于price的所有步，返回(第一步, 最后一步)，不存在时返回None
+
+        各游程价位互不相同，在按价位排序的游程上二分查找。
+        """
+        if self._price_order is None:
+            self._price_order = np.argsort(self.prices, kind='stable')
+        sorted_prices = self.prices[self._price_order]
+        i = np.searchsorted(sorted_prices, price - PRICE_TOLERANCE)
+        if i == len(sorted_prices) or abs(sorted_prices[i] - price) > PRICE_TOLERANCE:
+            return None
+        run = self._price_order[i]
+        return int(self.first_steps[run]), int(self.last_steps[run])
+
+    def first_step_distance_below(self, value):
+        """新入价-强平第一次低于value的步，不存在时返回None
+
+        新入价-强平只在每个游程内单调，换价位时会跳变。先用各游程首尾两步的
+        较小值（只计算一次）找到第一个满足条件的游程，再在游程内二分查找。
+        """
+        if self.n_steps == 0:
+            return None
+        if self._run_distance_min is None:
+            first_prices, _, first_strongs = self._at(self.first_steps)
+            last_prices, _, last_strongs = self._at(self.last_steps)
+            self._run_distance_min = np.minimum(first_prices - first_strongs,
+                                                last_prices - last_strongs)
+        hits = np.flatnonzero(self._run_distance_min < value)
+        if not len(hits):
+            return None
+        run = hits[0]
+        first, last = int(self.first_steps[run]), int(self.last_steps[run])
+        if self._distance(first) < value:
+            return first
+        # 游程内递减：二分查找第一个低于value的步
+        lo, hi = first, last
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self._distance(mid) < value:
+                hi = mid
+            else:
+                lo = mid
+        return hi
+
+    def first_step_strong_crosses(self, level):
+        """强平线第一次到达level的步
+
+        第1步的强平线已经越过level（按强平线的变化方向）时返回0，
+        到最后一步仍未到达时返回None。均价沿阶梯单调变化，强平线也单调，直接按步二分查找。
+        """
+        n = self.n_steps
+        if n == 0:
+            return None
+        if self._strong(n) >= self._strong(1):
+            reached = lambda step: self._strong(step) >= level
+        else:
+            reached = lambda step: self._strong(step) <= level
+        if reached(1):
+            return 1 if self._strong(1) == level else 0
+        if not reached(n):
+            return None
+        lo, hi = 1, n
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if reached(mid):
+                hi = mid
+            else:
+                lo = mid
+        return hi
+
+    def row(self, index):
+        """获取第index行（从0开始）的数据，返回Python数值列表"""
+        return self.rows(index, index + 1).row(0)
+
+    def expand(self):
+        """展开为逐行的LadderResult"""
+        return self.rows(0, self.n_steps)
+
+
+def _change_estimate(excess, price, ceil_strong, factor):
+    """解析估计游程内强平线取整结果第一次变化的步数，永不变化时返回None
+
+    excess为游程开始时的 累计和 - 步数*price，游程内均价 = price + excess / t。
+    """
+    if excess > 0:
+        # 均价下降，强平线降到 ceil_strong - 1 及以下时变化
+        gap = (ceil_strong - 1) - factor * price
+        if gap > 0:
+            return math.ceil(factor * excess / gap)
+    elif excess < 0:
+        # 均价上升，强平线超过 ceil_strong 时变化
+        gap = factor * price - ceil_strong
+        if gap > 0:
+            return math.floor(-factor * excess / gap) + 1
+    return None
+
+
+def _run_end(cumulative_sum, n, price, ceil_strong, factor, J2):
+    """价位price从第n+1步开始持续，返回该游程的最后一步
+
+    游程内第t步的均价为 (cumulative_sum + (t-n)*price) / t，随t单调趋近price，
+    因此强平线向上取整的结果只会在某一步发生一次变化。先解析求出这一步，
+    再用与逐步计算相同的浮点表达式校正，保证结果与逐步循环一致。
+    """
+    def holds(t):
+        # 第t步的强平线向上取整后是否仍等于ceil_strong
+        return math.ceil((cumulative_sum + (t - n) * price) / t * factor) == ceil_strong
+
+    estimate = _change_estimate(cumulative_sum - n * price, price, ceil_strong, factor)
+    if estimate is None:
+        estimate = J2 + 1  # J2 + 1 表示在迭代范围内不会变化
+    estimate = min(max(estimate, n + 1), J2 + 1)
+
+    # 在估计值附近倍增查找区间：lo 满足holds，hi 不满足（或为J2+1）
+    if estimate <= J2 and holds(estimate):
+        lo, stride = estimate, 1
+        while True:
+            hi = lo + stride
+            if hi > J2:
+                hi = J2 + 1
+                break
+            if not holds(hi):
+                break
+            lo, stride = hi, stride * 2
+    else:
+        hi, stride = estimate, 1
+        while True:
+            lo = hi - stride
+            if lo <= n:
+                lo = n
+                break
+            if holds(lo):
+                break
+            hi, stride = lo, stride * 2
+
+    # 二分定位第一个发生变化的步数
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if holds(mid):
+            lo = mid
+        else:
+            hi = mid
+    return min(hi, J2)
+
+
+def generate_runs(B2, H2, I2, J2, progress=None):
+    """以游程形式计算加仓阶梯，迭代次数很大时直接解析跳过稳定区间
+
+    均价在每个游程内单调趋近当前价位，价位序列（第2步起）单调变化并最终稳定，
+    所以循环次数只与不同价位的个数有关，与J2无关。J2为10^9时同样可以瞬间返回。
+
+    参数与generate_data相同，返回LadderRuns。
+    progress: 可选的进度回调 progress(已计算步数, J2)，每个游程调用一次，返回False时抛出
+        CalculationCancelled。回调应只检查取消标志，显示进度时自行按时间节流
+    """
+    J2 = max(0, int(J2))
+    state = _RunsState(B2, H2, I2)
+    state.extend(J2, progress)
+    return state.build(J2)
+
+
+class _RunsState:
+    """generate_runs的中间状态：已计算的游程及继续计算所需的累计和、步数
+
+    游程内第t步的累计和统一按 游程开始前的累计和 + (t - 游程第一步 + 1) * 价位 计算，
+    因此分多次扩展与一次算完、以及按步展开的结果完全一致。
+    """
+    def __init__(self, B2, H2, I2):
+        self.I2 = I2
+        # 避免除零错误（杠杆倍数至少为1）
+        lever = max(1.0, H2)
+        self.factor = 1 - 1/lever
+
+        # 第一行价格为初始价位
+        self.prices = [B2]
+        self.firsts = [1]
+        self.lasts = [1]
+        self.sums = [0]
+        self.cumulative_sum = 0 + B2  # 累计求和
+        self.n = 1                    # 已计算的步数
+
+    @property
+    def nbytes(self):
+        # 四个列表，每个元素约为一个指针加一个数值对象
+        return len(self.prices) * 4 * 32
+
+    def extend(self, J2, progress=None):
+        """继续计算到第J2步，progress的用法见generate_runs"""
+        factor = self.factor
+        run_prices, run_firsts, run_lasts, run_sums = self.prices, self.firsts, self.lasts, self.sums
+        cumulative_sum = self.cumulative_sum
+        n = self.n
+        while n < J2:
+            if progress is not None:
+                # 中止前保存已完成的部分，下次可以继续
+                self.cumulative_sum = cumulative_sum
+                self.n = n
+                if progress(n, J2) is False:
+                    raise CalculationCancelled()
+
+            # 上行强平线向上取整
+            ceil_strong = math.ceil(cumulative_sum / n * factor)
+            price = ceil_strong + self.I2
+            last = _run_end(cumulative_sum, n, price, ceil_strong, factor, J2)
+
+            if price == run_prices[-1]:
+                run_lasts[-1] = last
+            else:
+                run_prices.append(price)
+                run_firsts.append(n + 1)
+                run_lasts.append(last)
+                run_sums.append(cumulative_sum)
+
+            cumulative_sum = run_sums[-1] + (last - run_firsts[-1] + 1) * price
+            n = last
+        self.cumulative_sum = cumulative_sum
+        self.n = max(n, self.n)
+
+    def build(self, J2):
+        """返回前J2步（不超过已计算的步数）的LadderRuns"""
+        factor = self.factor
+        if J2 < 1:
+            empty = np.empty(0, dtype=np.int64)
+            return LadderRuns(np.empty(0), empty, empty, empty, np.empty(0), 0, factor)
+
+        # 截取到包含第J2步的游程
+        r = bisect.bisect_left(self.lasts, J2)
+        prices = np.array(self.prices[:r + 1], dtype=np.float64)
+        first_steps = np.array(self.firsts[:r + 1], dtype=np.int64)
+        last_steps = np.array(self.lasts[:r + 1], dtype=np.int64)
+        last_steps[-1] = J2
+        sums_before = np.array(self.sums[:r + 1], dtype=np.float64)
+        total_sum = self.sums[r] + (J2 - self.firsts[r] + 1) * self.prices[r]
+
+        # 判断阶梯是否已饱和：最后一个价位在之后的任意步数都不再变化
+        ceil_strong = math.ceil(total_sum / J2 * factor)
+        price = ceil_strong + self.I2
+        saturated = (price == self.prices[r] and
+                     _change_estimate(total_sum - J2 * price, price,
+                                      ceil_strong, factor) is None)
+
+        return LadderRuns(prices, last_steps - first_steps + 1, first_steps, last_steps,
+                          sums_before, total_sum, factor, saturated)
+
+
+class LadderCache:
+    """按(B2, H2, I2)缓存计算状态的LRU缓存
+
+    迭代次数J2增大时只计算缺少的后缀，J2减小时直接截取已有结果。
+    缓存条目数或占用内存超过上限时淘汰最久未使用的条目。
+    """
+    def __init__(self, max_entries=32, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return sum(state.nbytes for state in self._entries.values())
+
+    def _state(self, kind, B2, H2, I2):
+        key = (kind, B2, H2, I2)
+        state = self._entries.get(key)
+        if state is None:
+            factory = _StepsState if kind == 'data' else _RunsState
+            state = self._entries[key] = factory(B2, H2, I2)
+        else:
+            self._entries.move_to_end(key)
+        return state
+
+    def _evict(self):
+        # 至少保留最近使用的一个条目
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or
+                                          self.nbytes > self.max_bytes):
+            self._entries.popitem(last=False)
+
+    def data(self, B2, H2, I2, J2):
+        """带缓存的generate_data（浮点模式），返回的各列为只读视图"""
+        J2 = max(0, int(J2))
+        state = self._state('data', B2, H2, I2)
+        state.extend(J2)
+        result = state.build(J2)
+        # 各列与缓存共享内存，设为只读防止被意外修改
+        for column in result.columns:
+            column.flags.writeable = False
+        self._evict()
+        return result
+
+    def runs(self, B2, H2, I2, J2, progress=None):
+        """带缓存的generate_runs"""
+        J2 = max(0, int(J2))
+        state = self._state('runs', B2, H2, I2)
+        state.extend(J2, progress)
+        result = state.build(J2)
+        self._evict()
+        return result
+
+    def clear(self):
+        self._entries.clear()
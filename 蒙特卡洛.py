@@ -0,0 +1,305 @@
+"""蒙特卡洛模拟
+
+用随机价格路径检验加仓阶梯：路径从初始价位出发（第1步已成交），价格到达
+后面的加仓价位时按该价位成交（跳空越过几个价位时一起成交），成交后价格
+不高于当时的强平线即强平，该路径到此结束。
+
+路径按块生成，一块中的全部路径在NumPy数组上一次处理，内存只与块大小有关。
+各块的随机数流由同一个种子派生，结果与是否使用多进程、进程数无关。
+
+python 蒙特卡洛.py 100 10 10 50 --paths 1000000 --seed 1
+"""
+import argparse
+import sys
+
+import numpy as np
+import 筹码引擎
+
+# 每块的元素个数上限（路径数×时间步数），单块约占用该数值×25字节内存
+CHUNK_ELEMENTS = 1 << 20
+
+# 默认的时间步数和每步的年数（一年252个交易日）
+N_STEPS = 252
+DT = 1 / 252
+
+
+class PathModel:
+    """价格路径模型：几何布朗运动，可叠加复合泊松跳跃（Merton跳跃扩散）
+
+        drift       年化期望收益率（已扣除跳跃的平均影响）
+        volatility  年化波动率
+        dt          每个时间步的年数
+        jump_rate   每年的平均跳跃次数，0为纯几何布朗运动
+        jump_mean   单次跳跃对数幅度的均值（负数为向下跳空）
+        jump_std    单次跳跃对数幅度的标准差
+    """
+    def __init__(self, drift=0.0, volatility=0.5, dt=DT,
+                 jump_rate=0.0, jump_mean=0.0, jump_std=0.0):
+        if volatility < 0 or jump_std < 0 or jump_rate < 0:
+            raise ValueError("波动率、跳跃频率和跳跃幅度的标准差不能为负数")
+        if dt <= 0:
+            raise ValueError("时间步长必须大于0")
+        self.drift = drift
+        self.volatility = volatility
+        self.dt = dt
+        self.jump_rate = jump_rate
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+
+    def log_returns(self, rng, n_paths, n_steps):
+        """生成(n_paths, n_steps)的逐步对数收益 (float64)"""
+        dt = self.dt
+        drift = self.drift - 0.5 * self.volatility ** 2
+        if self.jump_rate > 0:
+            # 扣除跳跃带来的平均收益，使期望收益率仍为drift
+            drift -= self.jump_rate * np.expm1(self.jump_mean + 0.5 * self.jump_std ** 2)
+        returns = rng.standard_normal((n_paths, n_steps))
+        returns *= self.volatility * np.sqrt(dt)
+        returns += drift * dt
+        if self.jump_rate > 0:
+            jumps = rng.poisson(self.jump_rate * dt, (n_paths, n_steps))
+            where = np.nonzero(jumps)
+            counts = jumps[where]
+            # n次跳跃的对数幅度之和服从N(n*均值, n*方差)
+            returns[where] += (counts * self.jump_mean
+                               + np.sqrt(counts) * self.jump_std * rng.standard_normal(len(counts)))
+        return returns
+
+
+class SimulationResult:
+    """模拟结果
+
+    阶梯的各价位档（按加仓顺序，见LadderRuns.levels()）:
+        prices        价位 (float64)
+        steps         该价位成交后的累计步数 (int64)
+        strongs       该价位成交后的强平线 (float64)
+
+    每条路径:
+        levels_hit    强平前（或到期时）已成交的价位档数 (int32，至少为1)
+        liquidated    是否被强平 (bool)
+        liquidation_times  强平发生的时间步（从1开始），未强平为0 (int32)
+    """
+    def __init__(self, prices, steps, strongs, levels_hit, liquidated, liquidation_times, n_steps):
+        self.prices = prices
+        self.steps = steps
+        self.strongs = strongs
+        self.levels_hit = levels_hit
+        self.liquidated = liquidated
+        self.liquidation_times = liquidation_times
+        self.n_steps = n_steps
+
+    def __len__(self):
+        return len(self.levels_hit)
+
+    @property
+    def fills(self):
+        """每条路径成交的总步数（筹码单位数） (int64)"""
+        return self.steps[self.levels_hit - 1]
+
+    @property
+    def liquidation_rate(self):
+        return float(self.liquidated.mean()) if len(self) else 0.0
+
+    def level_hit_rates(self):
+        """每个价位档在强平前被触及的路径比例，与prices一一对应"""
+        counts = np.bincount(self.levels_hit, minlength=len(self.prices) + 1)[1:]
+        # 触及第r档的路径 = 成交档数不少于r的路径
+        return np.cumsum(counts[::-1])[::-1] / max(1, len(self))
+
+    def level_liquidation_rates(self):
+        """按强平前成交的价位档统计的强平路径比例，与prices一一对应"""
+        counts = np.bincount(self.levels_hit[self.liquidated], minlength=len(self.prices) + 1)
+        return counts[1:] / max(1, len(self))
+
+    def fill_distribution(self):
+        """成交步数的分布，返回(步数, 路径数)，只列出出现过的步数"""
+        counts = np.bincount(self.levels_hit, minlength=len(self.prices) + 1)[1:]
+        present = np.flatnonzero(counts)
+        return self.steps[present], counts[present]
+
+    def summary(self):
+        """主要统计量，返回dict"""
+        fills = self.fills
+        times = self.liquidation_times[self.liquidated]
+        return {
+            'paths': len(self),
+            'levels': len(self.prices),
+            'liquidation_rate': self.liquidation_rate,
+            'all_levels_hit_rate': float(self.level_hit_rates()[-1]) if len(self.prices) else 0.0,
+            'mean_fills': float(fills.mean()) if len(self) else 0.0,
+            'median_fills': float(np.median(fills)) if len(self) else 0.0,
+            'p95_fills': float(np.percentile(fills, 95)) if len(self) else 0.0,
+            'max_fills': int(fills.max()) if len(self) else 0,
+            'median_liquidation_time': float(np.median(times)) if len(times) else None,
+        }
+
+
+def ladder_levels(runs):
+    """模拟用的阶梯价位档：(价位, 累计步数, 强平线)，价位按加仓顺序单调"""
+    prices, steps, _, strongs = runs.levels()
+    return prices, steps, strongs
+
+
+def _simulate_chunk(prices, strongs, model, n_paths, n_steps, seed):
+    """模拟一块路径，返回(成交档数, 是否强平, 强平时间步)
+
+    在对数价格（相对初始价位）上比较：价格单调下降的阶梯在路径的累计最低价
+    不高于某档价位时成交该档，上升的阶梯则看累计最高价；成交档数随时间
+    不减，每个时刻的强平线取当时已成交的最后一档。
+    """
+    rng = np.random.default_rng(seed)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 价位或强平线不为正时取-inf：永远不会触及/强平
+        log_prices = np.log(np.where(prices > 0, prices, 0) / prices[0])
+        log_strongs = np.log(np.where(strongs > 0, strongs, 0) / prices[0])
+
+    path = model.log_returns(rng, n_paths, n_steps)
+    np.cumsum(path, axis=1, out=path)
+
+    # 路径起点（对数价格0）即第1档，累计极值从0开始
+    if len(prices) > 1 and prices[-1] > prices[0]:
+        extreme = np.maximum.accumulate(path, axis=1)
+        np.maximum(extreme, 0, out=extreme)
+        levels = np.searchsorted(log_prices, extreme, side='right')
+    else:
+        extreme = np.minimum.accumulate(path, axis=1)
+        np.minimum(extreme, 0, out=extreme)
+        # 不低于累计最低价的档数 = 总档数 - 低于累计最低价的档数
+        levels = len(prices) - np.searchsorted(log_prices[::-1], extreme, side='left')
+    np.take(log_strongs, levels - 1, out=extreme)
+    hit = path <= extreme
+    path = extreme = None
+
+    rows = np.arange(n_paths)
+    first = hit.argmax(axis=1)
+    liquidated = hit[rows, first]
+    levels_hit = np.where(liquidated, levels[rows, first], levels[:, -1]).astype(np.int32)
+    times = np.where(liquidated, first + 1, 0).astype(np.int32)
+    return levels_hit, liquidated, times
+
+
+def _chunks(n_paths, chunk_size, seed):
+    """按chunk_size切分路径，返回[(起点, 终点, 随机数种子)]"""
+    bounds = list(range(0, n_paths, chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(bounds))
+    return [(start, min(start + chunk_size, n_paths), child)
+            for start, child in zip(bounds, seeds)]
+
+
+def simulate(runs, n_paths, n_steps=N_STEPS, model=None, seed=None,
+             chunk_size=None, workers=1, progress=None):
+    """用n_paths条随机路径模拟加仓阶梯的执行
+
+    参数:
+        runs: 加仓阶梯（LadderRuns，如generate_runs的结果），初始价位为第一个价位
+        n_paths: 路径数
+        n_steps: 每条路径的时间步数
+        model: PathModel，默认为年化波动率50%、无漂移、无跳跃
+        seed: 随机数种子，相同的种子和chunk_size得到相同的结果
+        chunk_size: 每块的路径数，默认按CHUNK_ELEMENTS计算
+        workers: 进程数，1为在当前进程中计算，None为CPU核数
+        progress: 进度回调 progress(已完成路径数, 总路径数)
+
+    返回:
+        SimulationResult
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    import os
+
+    if runs.n_steps == 0:
+        raise ValueError("加仓阶梯为空")
+    if n_steps < 1:
+        raise ValueError("时间步数必须大于0")
+    model = model or PathModel()
+    prices, steps, strongs = ladder_levels(runs)
+    chunk_size = chunk_size or max(1, CHUNK_ELEMENTS // n_steps)
+    chunks = _chunks(n_paths, chunk_size, seed)
+
+    levels_hit = np.empty(n_paths, dtype=np.int32)
+    liquidated = np.empty(n_paths, dtype=bool)
+    times = np.empty(n_paths, dtype=np.int32)
+
+    finished = 0
+
+    def store(start, stop, result):
+        nonlocal finished
+        levels_hit[start:stop], liquidated[start:stop], times[start:stop] = result
+        finished += stop - start
+        if progress:
+            progress(finished, n_paths)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        for start, stop, child in chunks:
+            store(start, stop, _simulate_chunk(prices, strongs, model, stop - start, n_steps, child))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 同时在途的任务数保持为进程数的两倍，结果到达后立即写入
+            pending = {}
+            chunk_iter = iter(chunks)
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = next(chunk_iter, None)
+                    if chunk is None:
+                        break
+                    start, stop, child = chunk
+                    future = executor.submit(_simulate_chunk, prices, strongs, model,
+                                             stop - start, n_steps, child)
+                    pending[future] = (start, stop)
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, stop = pending.pop(future)
+                    store(start, stop, future.result())
+
+    return SimulationResult(prices, steps, strongs, levels_hit, liquidated, times, n_steps)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="用随机价格路径模拟加仓阶梯的成交和强平")
+    parser.add_argument('B2', type=float, help="初始价位")
+    parser.add_argument('H2', type=float, help="杠杆倍数")
+    parser.add_argument('I2', type=float, help="新入价-强平距")
+    parser.add_argument('J2', type=int, help="迭代次数")
+    parser.add_argument('-n', '--paths', type=int, default=100000, help="路径数（默认100000）")
+    parser.add_argument('--steps', type=int, default=N_STEPS, help=f"每条路径的时间步数（默认{N_STEPS}）")
+    parser.add_argument('--dt', type=float, default=DT, help="每步的年数（默认1/252）")
+    parser.add_argument('--drift', type=float, default=0.0, help="年化期望收益率")
+    parser.add_argument('--volatility', type=float, default=0.5, help="年化波动率（默认0.5）")
+    parser.add_argument('--jump-rate', type=float, default=0.0, help="每年的平均跳跃次数")
+    parser.add_argument('--jump-mean', type=float, default=0.0, help="跳跃对数幅度的均值")
+    parser.add_argument('--jump-std', type=float, default=0.0, help="跳跃对数幅度的标准差")
+    parser.add_argument('--seed', type=int, default=None, help="随机数种子")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="进程数（0为CPU核数）")
+    args = parser.parse_args(argv)
+
+    try:
+        model = PathModel(args.drift, args.volatility, args.dt,
+                          args.jump_rate, args.jump_mean, args.jump_std)
+        runs = 筹码引擎.generate_runs(args.B2, args.H2, args.I2, args.J2)
+        result = simulate(runs, args.paths, args.steps, model, args.seed,
+                          workers=args.workers or None)
+    except ValueError as e:
+        parser.error(str(e))
+
+    summary = result.summary()
+    print(f"路径数: {summary['paths']}，价位档数: {summary['levels']}")
+    print(f"强平比例: {summary['liquidation_rate']:.4%}")
+    print(f"全部价位成交的比例: {summary['all_levels_hit_rate']:.4%}")
+    print(f"成交步数: 平均 {summary['mean_fills']:.2f}，中位数 {summary['median_fills']:g}，"
+          f"95%分位 {summary['p95_fills']:g}，最多 {summary['max_fills']}")
+    if summary['median_liquidation_time'] is not None:
+        print(f"强平时间步中位数: {summary['median_liquidation_time']:g}")
+    print()
+    print("价位\t累计步数\t强平线\t触及比例\t在此档强平")
+    hit_rates = result.level_hit_rates()
+    liquidation_rates = result.level_liquidation_rates()
+    for i in range(len(result.prices)):
+        print(f"{result.prices[i]:g}\t{result.steps[i]}\t{result.strongs[i]:.4f}\t"
+              f"{hit_rates[i]:.4%}\t{liquidation_rates[i]:.4%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))